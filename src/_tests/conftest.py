@@ -0,0 +1,45 @@
+from collections.abc import Callable
+
+import numpy as np
+import pytest
+
+from quantpunc.quantification.rasterize import rasterize_disks
+
+
+def random_puncta(
+    seed: int = 0,
+    shape: tuple[int, int] = (200, 240),
+    n_puncta: int = 150,
+    max_radius: float = 5,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+
+    return rasterize_disks(
+        shape=shape,
+        centers=rng.uniform(0, max(shape), size=(n_puncta, 2)),
+        radii=rng.uniform(1, max_radius, size=n_puncta),
+    )
+
+
+def grid_masks(
+    shape: tuple[int, int] = (200, 240),
+    cell_size: int = 40,
+    left_out: tuple[int, ...] = (3, 8, 17),
+) -> np.ndarray:
+    # Rectangular cells, some of them left out.
+    rows, cols = np.indices(shape)
+    cells_per_row = -(-shape[1] // cell_size)
+    masks = (rows // cell_size) * cells_per_row + cols // cell_size + 1
+    masks[np.isin(masks, left_out)] = 0
+
+    return masks
+
+
+@pytest.fixture
+def make_puncta() -> Callable[..., np.ndarray]:
+    return random_puncta
+
+
+@pytest.fixture
+def make_masks() -> Callable[..., np.ndarray]:
+    return grid_masks
@@ -0,0 +1,238 @@
+import numpy as np
+import pytest
+from skimage import data
+from skimage.feature import blob_dog, blob_doh, blob_log
+from skimage.feature.blob import _prune_blobs
+
+from quantpunc.quantification import blob_detection
+from quantpunc.quantification.blob_detection import (
+    compute_scale_space,
+    detect_blobs,
+    prune_blobs,
+    scale_sigmas,
+    scale_space_peaks,
+    sweep_blobs,
+)
+from quantpunc.quantification.progress import (
+    CancelToken,
+    TaskCancelled,
+    stage_progress,
+)
+
+blob_methods = [
+    ("LoG", blob_log, {"num_sigma": 5}),
+    ("DoG", blob_dog, {"sigma_ratio": 1.6}),
+    ("DoH", blob_doh, {"num_sigma": 5}),
+]
+
+
+@pytest.mark.parametrize(("method", "skimage_method", "scales"), blob_methods)
+def test_detect_blobs_matches_skimage(method, skimage_method, scales) -> None:
+    image = data.hubble_deep_field()[:256, :256, 0]
+
+    for threshold, overlap in [(0.02, 0.5), (0.005, 0.2)]:
+        expected = skimage_method(
+            image,
+            min_sigma=2,
+            max_sigma=6,
+            threshold=threshold,
+            overlap=overlap,
+            **scales,
+        )
+        blobs = detect_blobs(
+            image=image,
+            method=method,
+            min_sigma=2,
+            max_sigma=6,
+            threshold=threshold,
+            overlap=overlap,
+            **scales,
+        )
+
+        np.testing.assert_array_equal(blobs, expected)
+
+
+@pytest.mark.parametrize(("method", "skimage_method", "scales"), blob_methods)
+def test_sweep_matches_detection(method, skimage_method, scales) -> None:
+    image = data.hubble_deep_field()[:256, :256, 0]
+    thresholds = [0.002, 0.01, 0.05]
+
+    blobs_per_threshold = sweep_blobs(
+        image=image,
+        method=method,
+        min_sigma=2,
+        max_sigma=6,
+        thresholds=thresholds,
+        overlap=0.5,
+        **scales,
+    )
+
+    for threshold in thresholds:
+        blobs = detect_blobs(
+            image=image,
+            method=method,
+            min_sigma=2,
+            max_sigma=6,
+            threshold=threshold,
+            overlap=0.5,
+            **scales,
+        )
+
+        np.testing.assert_array_equal(blobs_per_threshold[threshold], blobs)
+
+
+@pytest.mark.parametrize("method", ["LoG", "DoG", "DoH"])
+def test_parallel_scale_space_matches_sequential(method) -> None:
+    image = data.hubble_deep_field()[:128, :128, 0]
+    sigmas = scale_sigmas(
+        method=method, dtype=np.float64, min_sigma=2, max_sigma=6, num_sigma=5
+    )
+
+    sequential = compute_scale_space(
+        image=image, method=method, sigmas=sigmas, n_workers=1
+    )
+    parallel = compute_scale_space(
+        image=image, method=method, sigmas=sigmas, n_workers=3
+    )
+
+    np.testing.assert_array_equal(parallel, sequential)
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.3, 0.9])
+def test_prune_blobs_matches_skimage(overlap) -> None:
+    rng = np.random.default_rng(0)
+    blobs = np.column_stack(
+        (
+            rng.uniform(0, 100, size=(500, 2)),
+            rng.choice([1.0, 2.0, 3.5], size=500),
+        )
+    )
+
+    expected = _prune_blobs(blobs.copy(), overlap)
+
+    np.testing.assert_array_equal(prune_blobs(blobs, overlap), expected)
+
+
+@pytest.mark.parametrize(("method", "skimage_method", "scales"), blob_methods)
+def test_tiled_detection_matches_whole_image(
+    method, skimage_method, scales
+) -> None:
+    # Odd sizes leave partial tiles at the bottom and right borders.
+    image = data.hubble_deep_field()[:300, :270, 0]
+
+    for threshold in [0.002, 0.02]:
+        blobs = detect_blobs(
+            image=image,
+            method=method,
+            min_sigma=2,
+            max_sigma=6,
+            threshold=threshold,
+            overlap=0.5,
+            **scales,
+        )
+        tiled_blobs = detect_blobs(
+            image=image,
+            method=method,
+            min_sigma=2,
+            max_sigma=6,
+            threshold=threshold,
+            overlap=0.5,
+            memory_budget_mb=1,
+            n_workers=2,
+            **scales,
+        )
+
+        np.testing.assert_array_equal(tiled_blobs, blobs)
+
+
+def test_scale_space_reports_progress_per_scale() -> None:
+    image = data.hubble_deep_field()[:128, :128, 0]
+    sigmas = scale_sigmas(
+        method="LoG", dtype=np.float64, min_sigma=2, max_sigma=6, num_sigma=5
+    )
+
+    fractions = []
+    compute_scale_space(
+        image=image,
+        method="LoG",
+        sigmas=sigmas,
+        progress=lambda fraction, message: fractions.append(fraction),
+    )
+
+    assert fractions == [(i + 1) / len(sigmas) for i in range(len(sigmas))]
+
+
+def test_cancelled_detection_stops() -> None:
+    image = data.hubble_deep_field()[:256, :256, 0]
+    cancel_token = CancelToken()
+    n_tiles = []
+
+    def cancel_after_first_tile(fraction: float, message: str) -> None:
+        n_tiles.append(fraction)
+        cancel_token.cancel()
+
+    with pytest.raises(TaskCancelled):
+        detect_blobs(
+            image=image,
+            method="DoG",
+            min_sigma=2,
+            max_sigma=6,
+            threshold=0.02,
+            overlap=0.5,
+            memory_budget_mb=1,
+            progress=stage_progress(
+                progress=cancel_after_first_tile, cancel_token=cancel_token
+            ),
+        )
+
+    assert len(n_tiles) == 1
+
+
+def test_cancelled_sweep_stops_before_pruning(monkeypatch) -> None:
+    # Not used by other tests, so that its peaks are not cached.
+    image = data.hubble_deep_field()[:128, 128:256, 0]
+    cancel_token = CancelToken()
+    messages = []
+
+    def cancel_after_scale_space(fraction: float, message: str) -> None:
+        messages.append(message)
+
+        if fraction >= 0.8:
+            cancel_token.cancel()
+
+    def fail(**kwargs):
+        raise AssertionError("Blobs were pruned after cancelling.")
+
+    monkeypatch.setattr(blob_detection, "prune_blobs", fail)
+
+    with pytest.raises(TaskCancelled):
+        sweep_blobs(
+            image=image,
+            method="LoG",
+            min_sigma=2,
+            max_sigma=6,
+            thresholds=[0.01, 0.05],
+            overlap=0.5,
+            num_sigma=5,
+            progress=stage_progress(
+                progress=cancel_after_scale_space, cancel_token=cancel_token
+            ),
+        )
+
+    assert messages == ["Filtering scales"] * 5
+
+
+def test_cached_peaks_skip_scale_space(monkeypatch) -> None:
+    image = data.hubble_deep_field()[:128, :128, 0]
+    scales = {"method": "LoG", "min_sigma": 2, "max_sigma": 6}
+
+    blobs, responses = scale_space_peaks(image=image, **scales)
+
+    def fail(**kwargs):
+        raise AssertionError("The scale space was recomputed.")
+
+    monkeypatch.setattr(blob_detection, "scale_space", fail)
+    cached_blobs, cached_responses = scale_space_peaks(image=image, **scales)
+
+    np.testing.assert_array_equal(cached_blobs, blobs)
+    np.testing.assert_array_equal(cached_responses, responses)
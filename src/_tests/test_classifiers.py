@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from quantpunc.quantification.classifiers import (
+    CLASSIFIER_REGISTRY,
+    compare_classifiers,
+    make_classifier_pipeline,
+    register_default_classifiers,
+    single_threaded,
+)
+
+register_default_classifiers()
+
+
+def test_compare_classifiers() -> None:
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(2000, 4)).astype(np.float32)
+    labels = np.where(features[:, 0] + features[:, 1] > 0, 1, 2)
+
+    results = compare_classifiers(
+        features=features, labels=labels, n_estimators=20, n_jobs=2
+    )
+
+    assert set(results) == set(CLASSIFIER_REGISTRY)
+
+    for result in results.values():
+        assert result["fit_s"] > 0
+        assert result["predict_s_per_mp"] > 0
+        assert result["accuracy"] > 0.9
+
+
+def test_rejects_unknown_classifier() -> None:
+    with pytest.raises(ValueError):
+        make_classifier_pipeline(name="Support Vector Machine")
+
+
+def test_single_threaded_prediction() -> None:
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(500, 4)).astype(np.float32)
+    labels = np.where(features[:, 0] > 0, 1, 2)
+
+    model = make_classifier_pipeline(
+        name="Random Forest", n_estimators=10, n_jobs=4
+    ).fit(features, labels)
+    tile_model = single_threaded(model)
+
+    assert tile_model[-1].n_jobs == 1
+    assert model[-1].n_jobs == 4
+    np.testing.assert_array_equal(
+        tile_model.predict_proba(features), model.predict_proba(features)
+    )
+
+    linear_model = make_classifier_pipeline(name="Logistic Regression").fit(
+        features, labels
+    )
+
+    assert single_threaded(linear_model) is linear_model
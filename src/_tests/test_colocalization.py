@@ -43,6 +43,7 @@ def test_colocalization(
         QPushButton, name="iou_button"
     )
     qtbot.mouseClick(iou_button, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(lambda: not colocalization_widget.task_runner.is_running())
 
     if mask_selection == "None":
         value_idx = table_widget.iou_table_view.dict_model.index(0, 0)
@@ -111,3 +112,55 @@ def test_rejects_multidimensional_img(make_napari_viewer_proxy) -> None:
     value = table_widget.iou_table_view.dict_model.data(value_idx)
 
     assert value is None
+
+
+@pytest.mark.parametrize("mask_selection", ["None", "hello_world_mask"])
+def test_object_colocalization(
+    make_napari_viewer_proxy, qtbot, mask_selection
+) -> None:
+    viewer = make_napari_viewer_proxy()
+    table_widget = TableWidget(viewer=viewer)
+    colocalization_widget = ColocalizationWidget(
+        viewer=viewer, table_widget=table_widget
+    )
+
+    test_dir = Path(__file__).parent
+
+    coloc_0 = imread(test_dir / "data" / "coloc_0.tif")
+    coloc_1 = imread(test_dir / "data" / "coloc_1.tif")
+    example_masks = imread(test_dir / "data" / "hello_world_mask.tif")
+
+    viewer.add_labels(data=coloc_0, name="coloc_0")
+    viewer.add_labels(data=coloc_1, name="coloc_1")
+    viewer.add_image(data=example_masks, name="hello_world_mask")
+
+    colocalization_widget.first_combobox.setCurrentIndex(
+        colocalization_widget.first_combobox.findText("coloc_0")
+    )
+    colocalization_widget.second_combobox.setCurrentIndex(
+        colocalization_widget.second_combobox.findText("coloc_1")
+    )
+    colocalization_widget.mask_combobox.setCurrentIndex(
+        colocalization_widget.mask_combobox.findText(mask_selection)
+    )
+    colocalization_widget.method_combobox.setCurrentIndex(
+        colocalization_widget.method_combobox.findText("Object overlap")
+    )
+
+    colocalization_widget.compute_colocalization()
+    qtbot.waitUntil(lambda: not colocalization_widget.task_runner.is_running())
+
+    summary_model = table_widget.object_summary_table_view.dict_model
+    object_model = table_widget.object_table_view.dict_model
+    summary = next(iter(summary_model.data_dict.values()))["data"]
+    object_data = next(iter(object_model.data_dict.values()))["data"]
+
+    assert len(object_data) > 0
+    assert (list(summary) == [-1]) == (mask_selection == "None")
+
+    num_puncta = sum(counts[0] for counts in summary.values())
+    num_matched = sum(row[5] != 0 for row in object_data.values())
+
+    if mask_selection == "None":
+        assert num_puncta == len(object_data)
+        assert summary[-1][1] == num_matched
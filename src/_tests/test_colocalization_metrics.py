@@ -0,0 +1,157 @@
+import tracemalloc
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from quantpunc.quantification.colocalization_metrics import (
+    iou_per_mask,
+    pairwise_iou_per_mask,
+    prefix_popcounts,
+)
+
+
+def loop_iou(first, second, masks) -> dict:
+    first_nonzero = first > 0
+    second_nonzero = second > 0
+    scores = {}
+
+    for label in np.unique(masks):
+        if label == 0:
+            continue
+
+        region = masks == label
+        intersection = (first_nonzero & second_nonzero & region).sum()
+        union = ((first_nonzero | second_nonzero) & region).sum()
+        scores[label] = 0 if union == 0 else round(intersection / union, 4)
+
+    return scores
+
+
+@pytest.mark.parametrize("mask_dtype", [np.uint16, np.int32, np.float32])
+def test_iou_per_mask_matches_loop(mask_dtype) -> None:
+    rng = np.random.default_rng(0)
+    first = rng.integers(0, 3, size=(120, 90)).astype(np.uint16)
+    second = rng.integers(0, 2, size=(120, 90)).astype(np.uint16)
+
+    rows, cols = np.indices(first.shape)
+    masks = ((rows // 30) * 3 + cols // 30 + 1).astype(mask_dtype)
+    masks[masks == 4] = 0
+    # A mask without any puncta has an empty union.
+    first[masks == 5] = 0
+    second[masks == 5] = 0
+
+    scores = iou_per_mask(first=first, second=second, masks=masks)
+
+    assert scores == loop_iou(first, second, masks)
+    assert scores[5] == 0
+    assert 4 not in scores
+
+
+def test_iou_per_mask_with_sparse_mask_ids() -> None:
+    first = np.zeros((4, 4), dtype=np.uint8)
+    second = np.zeros((4, 4), dtype=np.uint8)
+    first[:2] = 1
+    second[:, :2] = 1
+    masks = np.full((4, 4), 2**31 - 1, dtype=np.int64)
+    masks[2:] = -5
+
+    scores = iou_per_mask(first=first, second=second, masks=masks)
+
+    assert scores == loop_iou(first, second, masks)
+
+
+def test_iou_without_masks() -> None:
+    first = np.array([[1, 1, 0, 0]])
+    second = np.array([[0, 1, 1, 0]])
+
+    assert iou_per_mask(first=first, second=second, masks=None) == {
+        -1: round(1 / 3, 4)
+    }
+    assert iou_per_mask(first=first * 0, second=second * 0, masks=None) == {
+        -1: 0
+    }
+
+
+@pytest.mark.parametrize("mask_kind", ["none", "int", "float", "sparse"])
+def test_pairwise_iou_matches_iou_per_pair(
+    make_puncta, make_masks, mask_kind: str
+) -> None:
+    shape = (97, 131)
+    layers = {
+        f"channel_{i}": make_puncta(
+            seed=i, shape=shape, n_puncta=60, max_radius=6
+        )
+        for i in range(4)
+    }
+
+    masks = make_masks(shape=shape, cell_size=20, left_out=(3,))
+    masks = {
+        "none": None,
+        "int": masks,
+        "float": masks.astype(np.float32),
+        "sparse": masks * 100003,
+    }[mask_kind]
+
+    scores = pairwise_iou_per_mask(layers=layers, masks=masks)
+
+    for first, second in combinations(layers, 2):
+        expected = iou_per_mask(
+            first=layers[first], second=layers[second], masks=masks
+        )
+        pair_scores = {
+            mask_val: iou
+            for (mask_val, *pair), (_, _, iou) in scores.items()
+            if pair == [first, second]
+        }
+
+        assert pair_scores == expected
+
+
+def test_prefix_popcounts_without_bitwise_count(monkeypatch) -> None:
+    rng = np.random.default_rng(0)
+    words = rng.integers(0, 2**63, size=100, dtype=np.uint64)
+    bits = np.array([0, 1, 63, 64, 650, 3200, 6399, 6400])
+    bit_string = "".join(format(word, "064b")[::-1] for word in words.tolist())
+    expected = [bit_string[:bit].count("1") for bit in bits.tolist()]
+
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+
+    assert prefix_popcounts(words, bits).tolist() == expected
+
+
+def peak_memory(function) -> int:
+    tracemalloc.start()
+
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_pairwise_iou_needs_less_memory_than_dense_iou(
+    make_puncta, make_masks
+) -> None:
+    shape = (512, 512)
+    layers = {
+        f"channel_{i}": make_puncta(
+            seed=i, shape=shape, n_puncta=400, max_radius=6
+        ).astype(np.int32)
+        for i in range(6)
+    }
+    masks = make_masks(shape=shape, cell_size=64, left_out=(3,)).astype(
+        np.int32
+    )
+
+    def dense_iou() -> None:
+        for first, second in combinations(layers, 2):
+            iou_per_mask(
+                first=layers[first], second=layers[second], masks=masks
+            )
+
+    packed_peak = peak_memory(
+        lambda: pairwise_iou_per_mask(layers=layers, masks=masks)
+    )
+
+    assert packed_peak < peak_memory(dense_iou)
@@ -1,16 +1,36 @@
 from pathlib import Path
 from typing import cast
 
+import joblib
 import numpy as np
+import pandas as pd
 import pytest
+from napari.components import ViewerModel
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QPushButton
 from tifffile import imread
 
+from quantpunc.quantification.abstract_puncta_labeler import (
+    AbstractPunctaLabeler,
+    supports_progress,
+)
 from quantpunc.quantification.default_puncta_labelers import (
+    BlobLoGLabeler,
     RFCPunctaLabeler,
 )
+from quantpunc.quantification.feature_cache import (
+    FEATURE_CACHE,
+    PROBABILITY_CACHE,
+)
+from quantpunc.quantification.model_io import save_pipeline
+from quantpunc.quantification.probability_map import threshold_probability
+from quantpunc.quantification.progress import (
+    CancelToken,
+    TaskCancelled,
+    stage_progress,
+)
 from quantpunc.quantification.puncta_analyzer import PunctaAnalyzer
+from quantpunc.quantification.tiling import tile_count, tile_size_for_budget
 from quantpunc.table.table_widget import TableWidget
 
 labelers_to_test = [
@@ -72,6 +92,10 @@ def test_blob_labelers(make_napari_viewer_proxy, qtbot, labeler) -> None:
             QPushButton, name="train_button"
         )
         qtbot.mouseClick(train_button, Qt.MouseButton.LeftButton)
+        qtbot.waitUntil(
+            lambda: not puncta_analyzer.task_runner.is_running(),
+            timeout=60_000,
+        )
 
     masks_to_test = ["None", "hello_world_mask"]
 
@@ -87,10 +111,18 @@ def test_blob_labelers(make_napari_viewer_proxy, qtbot, labeler) -> None:
         )
 
         qtbot.mouseClick(label_button, Qt.MouseButton.LeftButton)
+        qtbot.waitUntil(
+            lambda: not puncta_analyzer.task_runner.is_running(),
+            timeout=60_000,
+        )
 
         assert "hello_world_puncta" in viewer.layers
 
         qtbot.mouseClick(count_button, Qt.MouseButton.LeftButton)
+        qtbot.waitUntil(
+            lambda: not puncta_analyzer.task_runner.is_running(),
+            timeout=60_000,
+        )
 
         assert table_widget.save_initialized
 
@@ -138,3 +170,363 @@ def test_rejects_multilayer_img(make_napari_viewer_proxy, labeler) -> None:
     assert "example_img_puncta" not in viewer.layers
 
     assert not table_widget.save_initialized
+
+
+def test_feature_matrix_matches_per_pixel_rows() -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    feature_names, feature_data = rfc_labeler.preprocess_image(img=example_img)
+    features, labels = rfc_labeler.extract_ilastish_features(
+        img=example_img, annotation_layer=annotations
+    )
+
+    # The rows the labeler used to build, one dict per annotated pixel.
+    nonzero_indices = np.nonzero(annotations)
+    rows = []
+
+    for label, pixel_features in zip(
+        annotations[nonzero_indices],
+        feature_data[nonzero_indices],
+        strict=True,
+    ):
+        row = {f: pixel_features[i] for i, f in enumerate(feature_names)}
+        row["label"] = label
+        rows.append(row)
+
+    expected = pd.DataFrame.from_records(rows)
+
+    np.testing.assert_array_equal(features, expected[feature_names].to_numpy())
+    np.testing.assert_array_equal(labels, expected["label"].to_numpy())
+
+    flat_features = feature_data.reshape(-1, len(feature_names))
+
+    assert np.shares_memory(flat_features, feature_data)
+    np.testing.assert_array_equal(
+        flat_features[np.flatnonzero(annotations)], features
+    )
+
+
+def test_incremental_training_set() -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    annotated = np.flatnonzero(annotations)
+    partial_annotations = annotations.copy()
+    partial_annotations.flat[annotated[::2]] = 0
+
+    _, _, only_added = rfc_labeler.update_training_set(
+        img=example_img, annotations=partial_annotations
+    )
+
+    assert not only_added
+
+    features, labels, only_added = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+
+    assert only_added
+    assert rfc_labeler.annotations_unchanged(
+        img=example_img, annotations=annotations
+    )
+
+    erased_annotations = annotations.copy()
+    erased_annotations.flat[annotated[1]] = 0
+
+    assert not rfc_labeler.annotations_unchanged(
+        img=example_img, annotations=erased_annotations
+    )
+
+    features, labels, only_added = rfc_labeler.update_training_set(
+        img=example_img, annotations=erased_annotations
+    )
+
+    assert not only_added
+
+    expected_features, expected_labels = rfc_labeler.extract_ilastish_features(
+        img=example_img, annotation_layer=erased_annotations
+    )
+    order = np.argsort(rfc_labeler._train_indices)
+
+    np.testing.assert_array_equal(features[order], expected_features)
+    np.testing.assert_array_equal(labels[order], expected_labels)
+
+
+@pytest.mark.parametrize("method", ["impurity", "permutation"])
+def test_compact_model(method) -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+    n_features = features.shape[1]
+
+    kept = rfc_labeler.compact_model(min_importance=0.05, method=method)
+
+    assert 0 < len(kept) < n_features
+    assert rfc_labeler.feature_names() == kept
+    assert rfc_labeler.model.n_features_in_ == len(kept)
+
+    predicted = rfc_labeler.predict(img=example_img)
+
+    assert predicted.shape == example_img.shape
+
+
+def test_probability_map_matches_prediction() -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.n_estimators = 25
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+
+    predicted = rfc_labeler.predict(img=example_img)
+    probability = rfc_labeler.cached_probability(
+        img=example_img, puncta_label=2, memory_budget_mb=64
+    )
+
+    assert probability is rfc_labeler.cached_probability(
+        img=example_img, puncta_label=2, memory_budget_mb=64
+    )
+
+    # Ties between the two classes are resolved differently by predict.
+    above = threshold_probability(probability, 0.5)
+    tied = probability == 0.5
+
+    np.testing.assert_array_equal(above[~tied], (predicted == 2)[~tied])
+
+
+def test_tiled_labeling_matches_whole_image() -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.n_estimators = 10
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+
+    n_features = len(rfc_labeler.feature_names())
+    tile_size = tile_size_for_budget(
+        memory_budget_mb=8,
+        bytes_per_pixel=3 * 4 * n_features + 16 * 8,
+        n_workers=2,
+        halo=rfc_labeler.feature_halo(),
+    )
+
+    assert tile_count(shape=example_img.shape, tile_size=tile_size) > 4
+
+    # The small budget also stores the map as uint8 instead of float16, so
+    # the threshold sits between the tree votes to avoid ties.
+    labeled = {}
+
+    for memory_budget_mb in (None, 8):
+        FEATURE_CACHE.clear()
+        PROBABILITY_CACHE.clear()
+
+        labeled[memory_budget_mb] = rfc_labeler.label_puncta(
+            image=example_img,
+            masks=None,
+            label_intensity=7,
+            puncta_label=2,
+            threshold=0.45,
+            memory_budget_mb=memory_budget_mb,
+            n_workers=2,
+        )
+
+    np.testing.assert_array_equal(labeled[8], labeled[None])
+    assert (labeled[8] == 7).any()
+
+
+def test_classification_reports_progress_per_tile() -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.n_estimators = 5
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+
+    fractions = []
+    rfc_labeler.predict_probability(
+        img=example_img,
+        puncta_label=2,
+        memory_budget_mb=8,
+        progress=lambda fraction, message: fractions.append(fraction),
+    )
+
+    assert len(fractions) > 1
+    assert fractions == sorted(fractions)
+    assert fractions[-1] == 1
+
+    cancel_token = CancelToken()
+    cancel_token.cancel()
+
+    with pytest.raises(TaskCancelled):
+        rfc_labeler.predict_probability(
+            img=example_img,
+            puncta_label=2,
+            memory_budget_mb=8,
+            progress=stage_progress(progress=None, cancel_token=cancel_token),
+        )
+
+
+def test_rethreshold_only_when_threshold_changes(qtbot, monkeypatch) -> None:
+    viewer = ViewerModel()
+    puncta_analyzer = PunctaAnalyzer(
+        viewer=viewer, table_widget=TableWidget(viewer=viewer)
+    )
+
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    viewer.add_image(data=example_img, name="hello_world")
+    puncta_analyzer.img_combobox.setCurrentIndex(
+        puncta_analyzer.img_combobox.findText("hello_world")
+    )
+    puncta_analyzer.method_combobox.setCurrentIndex(
+        puncta_analyzer.method_combobox.findText("Random Forest Classifier")
+    )
+
+    rfc_labeler = cast(RFCPunctaLabeler, puncta_analyzer.blob_labeler)
+    rfc_labeler.puncta_line_edit.setText("2")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.n_estimators = 5
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+    rfc_labeler.label_puncta(
+        image=example_img,
+        masks=None,
+        label_intensity=1,
+        **rfc_labeler.labeling_parameters(),
+    )
+
+    relabel_calls = []
+    monkeypatch.setattr(
+        puncta_analyzer,
+        "get_puncta_labels",
+        lambda: relabel_calls.append(True),
+    )
+
+    rfc_labeler.rethreshold()
+
+    assert relabel_calls == []
+
+    rfc_labeler.threshold_line_edit.setText("0.7")
+    rfc_labeler.puncta_line_edit.setText("")
+    rfc_labeler.rethreshold()
+
+    assert relabel_calls == []
+
+    rfc_labeler.puncta_line_edit.setText("2")
+    rfc_labeler.rethreshold()
+
+    assert relabel_calls == [True]
+
+
+def test_saved_model_round_trip(qtbot, tmp_path) -> None:
+    test_dir = Path(__file__).parent
+    example_img = imread(test_dir / "data" / "hello_world.tif")
+    annotations = imread(test_dir / "data" / "hello_world_annotations.tif")
+
+    rfc_labeler = RFCPunctaLabeler(viewer=ViewerModel(), puncta_analyzer=None)
+    rfc_labeler.initialize_widgets()
+    rfc_labeler.puncta_line_edit.setText("2")
+    rfc_labeler.background_line_edit.setText("3")
+
+    features, labels, _ = rfc_labeler.update_training_set(
+        img=example_img, annotations=annotations
+    )
+    rfc_labeler.n_estimators = 10
+    rfc_labeler.train_seg_model(features=features, labels=labels)
+    rfc_labeler.compact_model(min_importance=0.05)
+
+    model_path = tmp_path / "rfc_model.joblib"
+    rfc_labeler.save_model(path=model_path)
+
+    loaded_labeler = RFCPunctaLabeler(
+        viewer=ViewerModel(), puncta_analyzer=None
+    )
+    loaded_labeler.initialize_widgets()
+    mismatched = loaded_labeler.load_model(path=model_path)
+
+    assert mismatched == []
+    assert loaded_labeler.feature_names() == rfc_labeler.feature_names()
+    assert loaded_labeler.puncta_line_edit.text() == "2"
+    assert loaded_labeler.background_line_edit.text() == "3"
+
+    np.testing.assert_array_equal(
+        loaded_labeler.predict(img=example_img),
+        rfc_labeler.predict(img=example_img),
+    )
+
+
+def test_load_model_rejects_other_files(tmp_path) -> None:
+    rfc_labeler = RFCPunctaLabeler(viewer=None, puncta_analyzer=None)
+
+    old_model_path = tmp_path / "old_model.joblib"
+    joblib.dump({"format_version": 1, "metadata": {}}, old_model_path)
+
+    with pytest.raises(ValueError, match="incompatible version"):
+        rfc_labeler.load_model(path=old_model_path)
+
+    text_path = tmp_path / "notes.joblib"
+    text_path.write_text("not a model")
+
+    with pytest.raises(ValueError, match="not a readable"):
+        rfc_labeler.load_model(path=text_path)
+
+    truncated_path = tmp_path / "truncated.joblib"
+    joblib.dump({"format_version": 2, "model": None}, truncated_path)
+    truncated_path.write_bytes(truncated_path.read_bytes()[:20])
+
+    with pytest.raises(ValueError, match="not a readable"):
+        rfc_labeler.load_model(path=truncated_path)
+
+    no_settings_path = tmp_path / "no_settings.joblib"
+    save_pipeline(path=no_settings_path, model=None, metadata={"sigmas": []})
+
+    with pytest.raises(ValueError, match="families"):
+        rfc_labeler.load_model(path=no_settings_path)
+
+
+def test_supports_progress() -> None:
+    class LegacyLabeler(AbstractPunctaLabeler):
+        def __init__(self, viewer, puncta_analyzer):
+            super().__init__(viewer, puncta_analyzer)
+
+        def label_puncta(self, image, masks, label_intensity):
+            return np.zeros_like(image)
+
+        def initialize_widgets(self):
+            return None
+
+    assert not supports_progress(LegacyLabeler(None, None))
+    assert supports_progress(BlobLoGLabeler(None, None))
+    assert supports_progress(RFCPunctaLabeler(None, None))
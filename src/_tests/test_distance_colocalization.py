@@ -0,0 +1,115 @@
+import numpy as np
+from scipy import ndimage as ndi
+
+from quantpunc.quantification.distance_colocalization import (
+    distance_colocalization,
+)
+
+
+def brute_force_distances(first: np.ndarray, second: np.ndarray):
+    first_ids, n_first = ndi.label(first != 0)
+    second_ids, n_second = ndi.label(second != 0)
+    first_centroids = np.array(
+        ndi.center_of_mass(first_ids, first_ids, range(1, n_first + 1))
+    )
+    second_centroids = np.array(
+        ndi.center_of_mass(second_ids, second_ids, range(1, n_second + 1))
+    )
+    distances = np.linalg.norm(
+        first_centroids[:, None] - second_centroids[None], axis=2
+    )
+
+    return distances.min(axis=1), distances.min(axis=0)
+
+
+def test_nearest_distances_match_brute_force(make_puncta) -> None:
+    first, second = (
+        make_puncta(seed=i, shape=(200, 200), n_puncta=60, max_radius=3)
+        for i in range(2)
+    )
+    first_nearest, _ = brute_force_distances(first, second)
+
+    table, _ = distance_colocalization(
+        first=first, second=second, masks=None, radii=[2.0]
+    )
+
+    np.testing.assert_allclose(
+        table["nearest_distance"], first_nearest, atol=1e-4
+    )
+
+
+def test_curve_counts_puncta_within_each_radius(make_puncta) -> None:
+    first, second = (
+        make_puncta(seed=i, shape=(200, 200), n_puncta=60, max_radius=3)
+        for i in range(2)
+    )
+    first_nearest, second_nearest = brute_force_distances(first, second)
+    radii = [10.0, 2.5, 5.0]
+
+    _, curve = distance_colocalization(
+        first=first, second=second, masks=None, radii=radii
+    )
+
+    assert list(curve) == [(-1, 2.5), (-1, 5.0), (-1, 10.0)]
+
+    for (_, radius), row in curve.items():
+        first_within = int((first_nearest <= radius).sum())
+        second_within = int((second_nearest <= radius).sum())
+
+        assert row[:2] == (len(first_nearest), first_within)
+        assert row[3:5] == (len(second_nearest), second_within)
+
+
+def test_curve_per_mask() -> None:
+    first = np.zeros((10, 30), dtype=np.uint8)
+    second = np.zeros((10, 30), dtype=np.uint8)
+    masks = np.zeros((10, 30), dtype=np.uint16)
+    masks[:, :15] = 1
+    masks[:, 15:] = 2
+
+    # Mask 1 holds two puncta 3 pixels apart, mask 2 a lone first punctum.
+    first[4, 4] = 1
+    second[4, 7] = 1
+    first[4, 25] = 1
+
+    table, curve = distance_colocalization(
+        first=first, second=second, masks=masks, radii=[1, 3]
+    )
+
+    assert curve == {
+        (1, 1.0): (1, 0, 0.0, 1, 0, 0.0),
+        (1, 3.0): (1, 1, 1.0, 1, 1, 1.0),
+        (2, 1.0): (1, 0, 0.0, 0, 0, 0),
+        (2, 3.0): (1, 0, 0.0, 0, 0, 0),
+    }
+    assert table["nearest_partner"].tolist() == [1, 1]
+    assert table["mask_label"].tolist() == [1, 2]
+
+
+def test_layer_without_puncta(make_puncta) -> None:
+    first = make_puncta(seed=0, shape=(200, 200), n_puncta=60, max_radius=3)
+    second = np.zeros_like(first)
+
+    table, curve = distance_colocalization(
+        first=first, second=second, masks=None, radii=[5]
+    )
+
+    assert (table["nearest_partner"] == 0).all()
+    assert np.isinf(table["nearest_distance"]).all()
+    assert curve[(-1, 5.0)][1:3] == (0, 0.0)
+
+
+def test_touching_instances_stay_apart() -> None:
+    first = np.zeros((8, 12), dtype=np.uint16)
+    first[2:5, 2:5] = 3
+    first[2:5, 5:8] = 7
+    second = np.where(first == 3, 4, np.where(first == 7, 9, 0))
+
+    table, curve = distance_colocalization(
+        first=first, second=second, masks=None, radii=[0]
+    )
+
+    assert table.index.tolist() == [3, 7]
+    assert table["nearest_partner"].tolist() == [4, 9]
+    assert table["nearest_distance"].tolist() == [0, 0]
+    assert curve[(-1, 0.0)] == (2, 2, 1.0, 2, 2, 1.0)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from skimage import data
+from skimage.feature import hessian_matrix, hessian_matrix_eigvals
+
+from quantpunc.quantification.feature_bank import (
+    FEATURE_FAMILIES,
+    FeatureBank,
+)
+from quantpunc.quantification.tiling import iter_tiles
+
+
+def test_hessian_eigenvalues_match_skimage() -> None:
+    img = data.camera().astype(np.float32) / 255
+    feature_bank = FeatureBank(families=["hessian_eig"], sigmas=[2])
+
+    features = feature_bank.compute(img=img)
+    expected = hessian_matrix_eigvals(
+        hessian_matrix(
+            img, sigma=2, mode="nearest", use_gaussian_derivatives=False
+        )
+    )
+
+    np.testing.assert_allclose(features[..., 0], expected[0], atol=1e-6)
+    np.testing.assert_allclose(features[..., 1], expected[1], atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    "families", [["gaussian", "LoG", "gradient"], list(FEATURE_FAMILIES)]
+)
+def test_tiles_match_full_image(families) -> None:
+    img = data.camera()[:300, :300].astype(np.float32) / 255
+    feature_bank = FeatureBank(families=families, sigmas=[0.7, 3.5])
+
+    features = feature_bank.compute(img=img)
+
+    assert features.shape[-1] == len(feature_bank.feature_names())
+
+    for padded, core, core_in_padded in iter_tiles(
+        img.shape, tile_size=64, halo=feature_bank.halo()
+    ):
+        tile_features = feature_bank.compute(img=img[padded])
+
+        np.testing.assert_array_equal(
+            tile_features[core_in_padded], features[core]
+        )
+
+
+def test_rejects_unknown_family() -> None:
+    with pytest.raises(ValueError):
+        FeatureBank(families=["gabor"])
+
+
+def test_selected_features_match_full_bank() -> None:
+    img = data.camera()[:200, :200].astype(np.float32) / 255
+    full_bank = FeatureBank(families=FEATURE_FAMILIES, sigmas=[0.7, 3.5])
+    selected = ["LoG-0.7", "hess_eig_min-3.5", "struct_eig_max-0.7"]
+    feature_bank = FeatureBank(
+        families=FEATURE_FAMILIES, sigmas=[0.7, 3.5], selected=selected
+    )
+
+    names = full_bank.feature_names()
+    columns = [names.index(name) for name in feature_bank.feature_names()]
+
+    np.testing.assert_array_equal(
+        feature_bank.compute(img=img), full_bank.compute(img=img)[..., columns]
+    )
+
+    with pytest.raises(ValueError):
+        FeatureBank(selected=["struct_eig_max-0.7"])
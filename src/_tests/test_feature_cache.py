@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from quantpunc.quantification.feature_cache import FeatureCache, feature_key
+
+
+def test_feature_key_depends_on_content_and_config() -> None:
+    img = np.arange(16, dtype=np.uint16).reshape(4, 4)
+    edited_img = img.copy()
+    edited_img[0, 0] = 1
+
+    key = feature_key(img=img, config=("ilastish", (1,)))
+
+    assert key == feature_key(img=img.copy(), config=("ilastish", (1,)))
+    assert key != feature_key(img=edited_img, config=("ilastish", (1,)))
+    assert key != feature_key(img=img, config=("ilastish", (2,)))
+
+
+def test_lru_eviction() -> None:
+    cache = FeatureCache(max_memory_mb=1)
+    stack = np.zeros((256, 256, 2), dtype=np.float32)
+
+    cache.put("first", stack.copy())
+    cache.put("second", stack.copy())
+    cache.get("first")
+    cache.put("third", stack.copy())
+
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+    assert cache.memory_bytes <= 1024**2
+
+
+def test_spill_to_disk(tmp_path) -> None:
+    cache = FeatureCache(max_memory_mb=0.1, spill_dir=tmp_path)
+    stack = np.random.rand(128, 128, 3).astype(np.float32)
+
+    cached = cache.put("large", stack)
+
+    assert isinstance(cached, np.memmap)
+    assert (tmp_path / "large.npy").exists()
+
+    cache.clear()
+
+    np.testing.assert_array_equal(cache.get("large"), stack)
+
+
+def test_allocate_respects_memory_budget(tmp_path) -> None:
+    shape = (512, 512, 4)
+    cache = FeatureCache(max_memory_mb=64)
+
+    assert not isinstance(
+        cache.allocate("fits", shape=shape, dtype=np.float32), np.memmap
+    )
+    assert (
+        cache.allocate(
+            "budget", shape=shape, dtype=np.float32, max_memory_mb=2
+        )
+        is None
+    )
+
+    cache.spill_dir = tmp_path
+    stack = cache.allocate(
+        "budget", shape=shape, dtype=np.float32, max_memory_mb=2
+    )
+
+    assert isinstance(stack, np.memmap)
+
+
+def test_spilled_stack_is_visible_only_after_put(tmp_path) -> None:
+    cache = FeatureCache(max_memory_mb=0.1, spill_dir=tmp_path)
+    stack = cache.allocate("large", shape=(128, 128, 3), dtype=np.float32)
+    stack[:] = 1
+
+    assert cache.get("large") is None
+    assert not (tmp_path / "large.npy").exists()
+
+    cached = cache.put("large", stack)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["large.npy"]
+    assert not cached.flags.writeable
+
+    cache.clear()
+
+    np.testing.assert_array_equal(cache.get("large"), 1)
+
+
+def test_discard_removes_partial_stack(tmp_path) -> None:
+    cache = FeatureCache(max_memory_mb=0.1, spill_dir=tmp_path)
+    stack = cache.allocate("large", shape=(128, 128, 3), dtype=np.float32)
+
+    with pytest.raises(RuntimeError):
+        try:
+            stack[:64] = 1
+            raise RuntimeError("Tile failed")
+        except RuntimeError:
+            cache.discard(stack)
+            raise
+
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get("large") is None
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+from napari.components import ViewerModel
+from scipy import ndimage as ndi
+
+from quantpunc.quantification.incremental_counts import (
+    PunctaCountState,
+    paint_bounding_box,
+)
+from quantpunc.quantification.puncta_analyzer import PunctaAnalyzer
+from quantpunc.table.table_widget import TableWidget
+
+
+def make_image(shape: tuple[int, int] = (200, 240)) -> np.ndarray:
+    rng = np.random.default_rng(2)
+
+    return rng.integers(0, 4000, size=shape).astype(np.uint16)
+
+
+def assert_same_count(state: PunctaCountState, expected: PunctaCountState):
+    # IDs differ after edits, so puncta are compared by their statistics.
+    assert state.counts() == expected.counts()
+    assert state.num_split() == expected.num_split()
+    assert sorted(state.puncta_stats().values()) == sorted(
+        expected.puncta_stats().values()
+    )
+
+    by_position = ["bbox_min_row", "bbox_min_col", "area"]
+    pd.testing.assert_frame_equal(
+        state.stats.sort_values(by_position).reset_index(drop=True),
+        expected.stats.sort_values(by_position).reset_index(drop=True),
+    )
+
+
+@pytest.mark.parametrize("with_masks", [False, True])
+def test_updates_match_recount(
+    make_puncta, make_masks, with_masks: bool
+) -> None:
+    puncta, image = make_puncta(max_radius=6), make_image()
+    masks = make_masks() if with_masks else None
+    state = PunctaCountState(puncta, image, masks, key="")
+
+    rng = np.random.default_rng(1)
+
+    for _ in range(30):
+        row, col = rng.integers(0, 200), rng.integers(0, 240)
+        height, width = rng.integers(1, 15, size=2)
+        window = (slice(row, row + height), slice(col, col + width))
+
+        # Erasing splits puncta, painting merges them or adds new ones.
+        puncta[window] = rng.choice([0, 1])
+        state.update(puncta_data=puncta, edited=window)
+
+    assert_same_count(state, PunctaCountState(puncta, image, masks, key=""))
+
+
+def test_changed_window_finds_unreported_edits(
+    make_puncta, make_masks
+) -> None:
+    puncta, image, masks = (
+        make_puncta(max_radius=6),
+        make_image(),
+        make_masks(),
+    )
+    state = PunctaCountState(puncta, image, masks, key="")
+
+    assert state.changed_window(puncta) is None
+
+    # Flipping pixels makes sure each of them changes.
+    puncta[50:60, 70:75] ^= 1
+    puncta[120, 30] ^= 1
+    window = state.changed_window(puncta)
+
+    assert window == (slice(50, 121), slice(30, 75))
+
+    state.update(puncta_data=puncta, edited=window)
+
+    assert_same_count(state, PunctaCountState(puncta, image, masks, key=""))
+
+
+def test_intensity_is_truncated_sum(make_puncta) -> None:
+    puncta = make_puncta(max_radius=6)
+    image = np.random.default_rng(3).uniform(0, 10, size=puncta.shape)
+    state = PunctaCountState(puncta, image, None, key="")
+
+    puncta_ids, num_puncta = ndi.label(puncta)
+    sums = ndi.sum_labels(
+        image, labels=puncta_ids, index=range(1, num_puncta + 1)
+    )
+
+    assert [
+        intensity for _, intensity, _ in state.puncta_stats().values()
+    ] == [int(total) for total in sums]
+
+
+def test_paint_bounding_box_of_index_atoms() -> None:
+    atom = (
+        (np.array([4, 9, 6]), np.array([12, 3, 7])),
+        np.array([0, 0, 0]),
+        1,
+    )
+
+    assert paint_bounding_box(atom) == (slice(4, 10), slice(3, 13))
+
+
+def test_count_state_is_dropped_with_its_layer(qtbot, make_puncta) -> None:
+    viewer = ViewerModel()
+    puncta_analyzer = PunctaAnalyzer(
+        viewer=viewer, table_widget=TableWidget(viewer=viewer)
+    )
+
+    viewer.add_image(data=make_image(), name="image")
+    puncta_layer = viewer.add_labels(data=make_puncta(), name="image_puncta")
+    puncta_analyzer.img_combobox.setCurrentIndex(
+        puncta_analyzer.img_combobox.findText("image")
+    )
+
+    puncta_analyzer.get_puncta_counts_and_stats()
+    qtbot.waitUntil(lambda: not puncta_analyzer.task_runner.is_running())
+
+    assert list(puncta_analyzer.count_states) == [puncta_layer.unique_id]
+
+    viewer.layers.remove(puncta_layer)
+
+    assert puncta_analyzer.count_states == {}
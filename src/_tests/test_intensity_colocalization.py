@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+from quantpunc.quantification.intensity_colocalization import (
+    COSTES_STEPS,
+    intensity_colocalization,
+)
+
+
+def make_channels(shape: tuple[int, int] = (150, 170)):
+    rng = np.random.default_rng(0)
+    signal = ndi.gaussian_filter(rng.random(shape), 3) * 4000
+    first = signal + rng.normal(0, 60, shape)
+    second = 0.7 * signal + 300 + rng.normal(0, 80, shape)
+
+    return (
+        first.clip(0).astype(np.uint16),
+        second.clip(0).astype(np.uint16),
+    )
+
+
+def brute_force_costes(first: np.ndarray, second: np.ndarray):
+    first = first.astype(np.float64)
+    second = second.astype(np.float64)
+    first_var = ((first - first.mean()) ** 2).sum()
+    second_var = ((second - second.mean()) ** 2).sum()
+    cov = ((first - first.mean()) * (second - second.mean())).sum()
+    slope = (
+        second_var
+        - first_var
+        + np.sqrt((second_var - first_var) ** 2 + 4 * cov**2)
+    ) / (2 * cov)
+    intercept = second.mean() - slope * first.mean()
+    step = (first.max() - first.min()) / COSTES_STEPS
+
+    for j in range(COSTES_STEPS - 1, -1, -1):
+        threshold = first.min() + (j + 1) * step
+        below = (first < threshold) & (second < slope * threshold + intercept)
+        r = (
+            np.corrcoef(first[below], second[below])[0, 1]
+            if below.sum() > 1
+            else np.nan
+        )
+
+        if not r > 0:
+            return threshold, slope * threshold + intercept
+
+    threshold = first.min() + step
+
+    return threshold, slope * threshold + intercept
+
+
+def brute_force_coefficients(first, second, thresholds):
+    first = first.astype(np.float64)
+    second = second.astype(np.float64)
+    first_threshold, second_threshold = thresholds
+    first_above = first > first_threshold
+    second_above = second > second_threshold
+    both = first_above & second_above
+
+    return (
+        np.corrcoef(first, second)[0, 1],
+        first_threshold,
+        second_threshold,
+        first[both].sum() / first[first_above].sum(),
+        second[both].sum() / second[second_above].sum(),
+    )
+
+
+@pytest.mark.parametrize("tile_size", [2048, 37])
+@pytest.mark.parametrize("thresholds", [None, (500.0, 900.0)])
+def test_coefficients_match_brute_force(
+    make_masks, tile_size, thresholds
+) -> None:
+    first, second = make_channels()
+    masks = make_masks(shape=(150, 170), cell_size=50, left_out=(2,))
+
+    coefficients = intensity_colocalization(
+        first=first,
+        second=second,
+        masks=masks,
+        thresholds=thresholds,
+        tile_size=tile_size,
+    )
+
+    assert sorted(coefficients) == sorted(set(np.unique(masks)) - {0})
+
+    for mask_val, (pixels, *row) in coefficients.items():
+        in_mask = masks == mask_val
+        mask_thresholds = (
+            brute_force_costes(first[in_mask], second[in_mask])
+            if thresholds is None
+            else thresholds
+        )
+        expected = brute_force_coefficients(
+            first[in_mask], second[in_mask], mask_thresholds
+        )
+
+        assert pixels == in_mask.sum()
+        np.testing.assert_allclose(row, np.round(expected, 4), atol=2e-4)
+
+
+def test_whole_image_without_masks() -> None:
+    first, second = make_channels()
+
+    coefficients = intensity_colocalization(
+        first=first, second=second, masks=None, thresholds=(0, 0)
+    )
+
+    assert list(coefficients) == [-1]
+    assert coefficients[-1][0] == first.size
+    assert coefficients[-1][1] == pytest.approx(
+        np.corrcoef(first.ravel(), second.ravel())[0, 1], abs=1e-4
+    )
+
+
+def test_undefined_coefficients_are_nan(make_masks) -> None:
+    first, second = make_channels()
+    masks = make_masks(shape=(150, 170), cell_size=50, left_out=(2,))
+    second[masks == 1] = 7
+
+    coefficients = intensity_colocalization(
+        first=first, second=second, masks=masks
+    )
+
+    assert np.isnan(coefficients[1][1:]).all()
+    assert not np.isnan(coefficients[3][1:]).any()
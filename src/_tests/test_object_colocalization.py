@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+from scipy.optimize import linear_sum_assignment
+
+from quantpunc.quantification.object_colocalization import (
+    object_colocalization,
+    overlap_matrix,
+)
+
+
+def dense_ious(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    first_ids, n_first = ndi.label(first != 0)
+    second_ids, n_second = ndi.label(second != 0)
+    ious = np.zeros((n_first, n_second))
+
+    for i in range(n_first):
+        for j in range(n_second):
+            a, b = first_ids == i + 1, second_ids == j + 1
+            ious[i, j] = (a & b).sum() / (a | b).sum()
+
+    return ious
+
+
+def test_overlap_matrix_counts_shared_pixels() -> None:
+    first = np.array([[1, 1, 0, 2], [1, 1, 0, 2]])
+    second = np.array([[0, 3, 3, 3], [1, 1, 0, 0]])
+
+    overlaps = overlap_matrix(
+        first_ids=first, second_ids=second, n_first=2, n_second=3
+    ).toarray()
+
+    np.testing.assert_array_equal(overlaps, [[2, 0, 1], [0, 0, 1]])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_hungarian_matches_are_optimal(make_puncta, seed: int) -> None:
+    first, second = (
+        make_puncta(
+            seed=2 * seed + i, shape=(120, 120), n_puncta=40, max_radius=6
+        )
+        for i in range(2)
+    )
+    ious = dense_ious(first, second)
+
+    table, _ = object_colocalization(
+        first=first, second=second, masks=None, method="hungarian"
+    )
+
+    rows, cols = linear_sum_assignment(ious, maximize=True)
+    matches = table["match"].to_numpy()
+    matched = np.flatnonzero(matches)
+
+    np.testing.assert_allclose(
+        ious[matched, matches[matched] - 1].sum(), ious[rows, cols].sum()
+    )
+    np.testing.assert_allclose(table["best_iou"], ious.max(axis=1).round(4))
+    assert (ious[matched, matches[matched] - 1] > 0).all()
+
+
+def test_greedy_matches_are_one_to_one(make_puncta) -> None:
+    first, second = (
+        make_puncta(seed=i, shape=(120, 120), n_puncta=40, max_radius=6)
+        for i in range(2)
+    )
+
+    table, _ = object_colocalization(
+        first=first, second=second, masks=None, method="greedy", min_iou=0.2
+    )
+
+    matches = table["match"].to_numpy()
+    matches = matches[matches != 0]
+
+    assert len(np.unique(matches)) == len(matches)
+    assert (table.loc[table["match"] != 0, "match_iou"] >= 0.2).all()
+
+
+def test_summary_counts_colocalized_puncta_per_mask() -> None:
+    first = np.zeros((10, 20), dtype=np.uint8)
+    second = np.zeros((10, 20), dtype=np.uint8)
+    masks = np.zeros((10, 20), dtype=np.uint16)
+    masks[:, :10] = 1
+    masks[:, 10:] = 2
+
+    # Mask 1 holds a matched pair and an unmatched first punctum. Mask 2
+    # holds a single second punctum.
+    first[1:4, 1:4] = 1
+    second[2:5, 2:5] = 1
+    first[6:8, 6:8] = 1
+    second[5:8, 13:16] = 1
+
+    table, summary = object_colocalization(
+        first=first, second=second, masks=masks
+    )
+
+    assert summary == {1: (2, 1, 0.5, 1, 1, 1.0), 2: (0, 0, 0, 1, 0, 0.0)}
+    assert table["mask_label"].tolist() == [1, 1]
+    assert table["match_iou"].tolist() == [round(4 / 14, 4), 0]
+
+
+def test_touching_instances_stay_apart() -> None:
+    first = np.zeros((8, 12), dtype=np.uint16)
+    second = np.zeros((8, 12), dtype=np.uint16)
+    # Two touching puncta labelled with instance IDs, and a binary layer
+    # with a punctum on each of them.
+    first[2:5, 2:5] = 3
+    first[2:5, 5:8] = 7
+    second[2:5, 2:5] = 1
+    second[2:5, 6:9] = 1
+
+    table, summary = object_colocalization(
+        first=first, second=second, masks=None
+    )
+
+    assert table.index.tolist() == [3, 7]
+    assert table["area"].tolist() == [9, 9]
+    assert table["match"].tolist() == [1, 2]
+    assert table["match_iou"].tolist() == [1.0, 0.5]
+    assert summary == {-1: (2, 2, 1.0, 2, 2, 1.0)}
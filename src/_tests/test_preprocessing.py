@@ -31,6 +31,10 @@ def test_preprocess_pipeline(
     )
 
     qtbot.mouseClick(process_button, Qt.LeftButton)
+    qtbot.waitUntil(
+        lambda: not preprocessing_widget.task_runner.is_running(),
+        timeout=30_000,
+    )
 
     if should_process:
         assert "example_img_processed" in viewer.layers
@@ -50,7 +54,7 @@ def test_process_with_no_selection(make_napari_viewer_proxy):
     assert len(viewer.layers) == 0
 
 
-def run_denoising_test(viewer, preprocessing_widget, method, mode):
+def run_denoising_test(qtbot, viewer, preprocessing_widget, method, mode):
     method_idx = preprocessing_widget.method_combobox.findText(method)
     preprocessing_widget.method_combobox.setCurrentIndex(method_idx)
 
@@ -58,6 +62,10 @@ def run_denoising_test(viewer, preprocessing_widget, method, mode):
     preprocessing_widget.mode_combobox.setCurrentIndex(mode_idx)
 
     preprocessing_widget.process_images()
+    qtbot.waitUntil(
+        lambda: not preprocessing_widget.task_runner.is_running(),
+        timeout=30_000,
+    )
 
     assert "example_img_processed" in viewer.layers
 
@@ -65,7 +73,7 @@ def run_denoising_test(viewer, preprocessing_widget, method, mode):
 
 
 @pytest.mark.parametrize("method", ["BayesShrink", "VisuShrink"])
-def test_different_denoising_methods(make_napari_viewer_proxy, method):
+def test_different_denoising_methods(make_napari_viewer_proxy, qtbot, method):
     viewer = make_napari_viewer_proxy()
     preprocessing_widget = Preprocessor(viewer=viewer)
 
@@ -80,7 +88,11 @@ def test_different_denoising_methods(make_napari_viewer_proxy, method):
     )
     preprocessing_widget.img_combobox.setCurrentIndex(example_img_idx)
 
-    soft_img = run_denoising_test(viewer, preprocessing_widget, method, "soft")
-    hard_img = run_denoising_test(viewer, preprocessing_widget, method, "hard")
+    soft_img = run_denoising_test(
+        qtbot, viewer, preprocessing_widget, method, "soft"
+    )
+    hard_img = run_denoising_test(
+        qtbot, viewer, preprocessing_widget, method, "hard"
+    )
 
     assert not np.array_equal(soft_img, hard_img)
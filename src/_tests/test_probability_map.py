@@ -0,0 +1,30 @@
+import numpy as np
+
+from quantpunc.quantification.probability_map import (
+    probability_dtype_for_budget,
+    probability_for_display,
+    quantize_probability,
+    threshold_probability,
+)
+
+
+def test_uint8_threshold_matches_float() -> None:
+    probability = np.linspace(0, 1, 1001)
+    quantized = quantize_probability(probability, dtype=np.uint8)
+
+    for threshold in (0.1, 0.5, 0.9):
+        above = threshold_probability(quantized, threshold)
+        expected = probability > threshold
+        undecided = np.abs(probability - threshold) < 1 / 255
+
+        np.testing.assert_array_equal(above[~undecided], expected[~undecided])
+
+    np.testing.assert_allclose(
+        probability_for_display(quantized), probability, atol=0.5 / 255
+    )
+
+
+def test_dtype_for_budget() -> None:
+    assert probability_dtype_for_budget((1024, 1024), 64) == np.float16
+    assert probability_dtype_for_budget((8192, 8192), 64) == np.uint8
+    assert probability_dtype_for_budget((8192, 8192), None) == np.float16
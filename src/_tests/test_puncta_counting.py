@@ -0,0 +1,69 @@
+import numpy as np
+from scipy import ndimage as ndi
+
+from quantpunc.quantification.puncta_counting import (
+    contingency_table,
+    dominant_masks,
+    puncta_per_mask,
+    split_puncta,
+)
+
+
+def test_counts_match_puncta_in_each_mask(make_puncta, make_masks) -> None:
+    puncta, masks = make_puncta(), make_masks()
+    puncta_ids, _ = ndi.label(puncta)
+    mask_labels = np.unique(masks)
+    mask_labels = mask_labels[mask_labels != 0]
+
+    table = contingency_table(puncta_ids=puncta_ids, masks=masks)
+    counts = puncta_per_mask(table=table, mask_labels=mask_labels)
+
+    expected = {}
+
+    for mask_val in mask_labels:
+        ids_in_mask = np.unique(puncta_ids[masks == mask_val])
+        expected[mask_val] = int(np.count_nonzero(ids_in_mask))
+
+    assert counts == expected
+
+
+def test_dominant_and_split_puncta(make_puncta, make_masks) -> None:
+    puncta, masks = make_puncta(), make_masks()
+    puncta_ids, num_puncta = ndi.label(puncta)
+
+    table = contingency_table(puncta_ids=puncta_ids, masks=masks)
+    dominant = dominant_masks(table=table, n_puncta=num_puncta)
+    split = split_puncta(table=table)
+
+    expected_split = []
+
+    for punctum in range(1, num_puncta + 1):
+        mask_ids, pixel_counts = np.unique(
+            masks[puncta_ids == punctum], return_counts=True
+        )
+        pixel_counts = pixel_counts[mask_ids != 0]
+        mask_ids = mask_ids[mask_ids != 0]
+
+        if len(mask_ids) == 0:
+            assert dominant[punctum - 1] == 0
+        else:
+            assert dominant[punctum - 1] == mask_ids[np.argmax(pixel_counts)]
+
+        if len(mask_ids) > 1:
+            expected_split.append(punctum)
+
+    assert len(expected_split) > 0
+    np.testing.assert_array_equal(split, expected_split)
+
+
+def test_sparse_and_dense_tables_agree(make_puncta, make_masks) -> None:
+    puncta, masks = make_puncta(), make_masks()
+    puncta_ids, _ = ndi.label(puncta)
+
+    dense = contingency_table(puncta_ids=puncta_ids, masks=masks)
+    # Large mask IDs make the dense histogram too big, so np.unique is used.
+    sparse = contingency_table(puncta_ids=puncta_ids, masks=masks * 10**6)
+
+    np.testing.assert_array_equal(sparse[0], dense[0])
+    np.testing.assert_array_equal(sparse[1], dense[1] * 10**6)
+    np.testing.assert_array_equal(sparse[2], dense[2])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+from skimage.draw import disk
+
+from quantpunc.quantification.rasterize import (
+    instance_disk_stats,
+    rasterize_disks,
+)
+
+
+@pytest.mark.parametrize("integer_centers", [True, False])
+def test_rasterize_disks_matches_skimage(integer_centers) -> None:
+    rng = np.random.default_rng(0)
+    shape = (120, 150)
+    n_disks = 200
+
+    centers = rng.uniform(-10, 160, size=(n_disks, 2))
+    radii = rng.uniform(0.3, 12, size=n_disks)
+
+    if integer_centers:
+        centers = np.round(centers)
+        radii = rng.choice([5, 6, 7], size=n_disks) * np.sqrt(2)
+
+    expected = np.zeros(shape, dtype=np.uint16)
+    expected_ids = np.zeros(shape, dtype=np.uint16)
+
+    for i, (center, radius) in enumerate(zip(centers, radii, strict=True)):
+        y, x = disk(center=center, radius=radius, shape=shape)
+        expected[y, x] = 3
+        expected_ids[y, x] = np.maximum(expected_ids[y, x], i + 1)
+
+    labels = rasterize_disks(
+        shape=shape, centers=centers, radii=radii, label_value=3
+    )
+    ids = rasterize_disks(
+        shape=shape, centers=centers, radii=radii, instance_ids=True
+    )
+
+    np.testing.assert_array_equal(labels, expected)
+    np.testing.assert_array_equal(ids, expected_ids)
+
+
+def test_instance_disk_stats_match_labels() -> None:
+    rng = np.random.default_rng(1)
+    shape = (100, 90)
+    n_disks = 150
+
+    centers = np.round(rng.uniform(-5, 105, size=(n_disks, 2)))
+    radii = rng.uniform(1, 8, size=n_disks)
+    image = rng.integers(0, 1000, size=shape).astype(np.uint16)
+
+    ids = rasterize_disks(
+        shape=shape, centers=centers, radii=radii, instance_ids=True
+    )
+    areas, sums = instance_disk_stats(
+        labels=ids, centers=centers, radii=radii, image=image
+    )
+
+    index = np.arange(1, n_disks + 1)
+    expected_areas = np.bincount(ids.ravel(), minlength=n_disks + 1)[1:]
+    expected_sums = ndi.sum(image, labels=ids, index=index)
+
+    np.testing.assert_array_equal(areas, expected_areas)
+    np.testing.assert_allclose(sums, expected_sums)
@@ -0,0 +1,65 @@
+import numpy as np
+from scipy import ndimage as ndi
+from skimage.measure import regionprops
+
+from quantpunc.quantification.rasterize import rasterize_disks
+from quantpunc.quantification.region_stats import region_stats
+
+
+def test_region_stats_match_regionprops() -> None:
+    rng = np.random.default_rng(0)
+    shape = (150, 170)
+
+    centers = rng.uniform(0, 170, size=(80, 2))
+    radii = rng.uniform(0.5, 6, size=80)
+    labels, _ = ndi.label(
+        rasterize_disks(shape=shape, centers=centers, radii=radii)
+    )
+    image = rng.integers(0, 4000, size=shape).astype(np.uint16)
+
+    stats = region_stats(labels=labels, image=image)
+
+    for props in regionprops(labels, intensity_image=image):
+        row = stats.loc[props.label]
+
+        assert row["area"] == props.area
+        assert row["min_intensity"] == props.intensity_min
+        assert row["max_intensity"] == props.intensity_max
+        np.testing.assert_allclose(row["mean_intensity"], props.intensity_mean)
+        np.testing.assert_allclose(row["std_intensity"], props.intensity_std)
+        np.testing.assert_allclose(
+            row[["centroid_row", "centroid_col"]], props.centroid
+        )
+        np.testing.assert_array_equal(
+            row[
+                [
+                    "bbox_min_row",
+                    "bbox_min_col",
+                    "bbox_max_row",
+                    "bbox_max_col",
+                ]
+            ],
+            props.bbox,
+        )
+        np.testing.assert_allclose(
+            row["eccentricity"], props.eccentricity, atol=1e-12
+        )
+
+    assert stats["boundary_distance"].isna().all()
+
+
+def test_boundary_distance() -> None:
+    labels = np.zeros((20, 30), dtype=np.uint16)
+    labels[9:12, 4:7] = 1
+    labels[9:12, 13:16] = 2
+
+    masks = np.zeros((20, 30), dtype=np.uint16)
+    masks[2:18, 2:12] = 1
+    masks[2:18, 12:28] = 2
+
+    stats = region_stats(labels=labels, image=np.ones((20, 30)), masks=masks)
+
+    # Centroid (10, 5) is 3 pixels from the left edge pixel of mask 1, and
+    # (10, 14) 2 pixels from the edge shared by the two masks.
+    assert stats.loc[1, "boundary_distance"] == 3
+    assert stats.loc[2, "boundary_distance"] == 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from quantpunc.quantification.sampling import balanced_sample
+
+
+@pytest.mark.parametrize("mode", ["spatial", "stratified"])
+def test_balanced_sample_caps_each_class(mode) -> None:
+    shape = (200, 200)
+    annotations = np.zeros(shape, dtype=np.uint8)
+    annotations[:150] = 2
+    annotations[180:185, 90:110] = 1
+
+    pixel_indices = np.flatnonzero(annotations)
+    labels = annotations.ravel()[pixel_indices]
+
+    rows = balanced_sample(
+        labels=labels,
+        max_per_class=1000,
+        pixel_indices=pixel_indices,
+        shape=shape,
+        mode=mode,
+        seed=1,
+    )
+
+    assert np.count_nonzero(labels[rows] == 1) == 100
+    assert np.count_nonzero(labels[rows] == 2) == 1000
+
+    repeated = balanced_sample(
+        labels=labels,
+        max_per_class=1000,
+        pixel_indices=pixel_indices,
+        shape=shape,
+        mode=mode,
+        seed=1,
+    )
+
+    np.testing.assert_array_equal(rows, repeated)
+
+
+def test_spatial_sample_covers_annotated_area() -> None:
+    shape = (256, 256)
+    pixel_indices = np.arange(shape[0] * shape[1])
+    labels = np.ones(len(pixel_indices), dtype=np.uint8)
+
+    rows = balanced_sample(
+        labels=labels,
+        max_per_class=256,
+        pixel_indices=pixel_indices,
+        shape=shape,
+        mode="spatial",
+    )
+
+    y, x = np.unravel_index(pixel_indices[rows], shape)
+    cells = np.unique((y // 16) * 16 + x // 16)
+
+    assert len(cells) == 256
@@ -0,0 +1,81 @@
+import threading
+
+from qtpy.QtWidgets import QPushButton
+
+from quantpunc.task_runner import TaskRunner
+
+
+def test_result_is_returned_on_gui_thread(qtbot) -> None:
+    task_runner = TaskRunner()
+    qtbot.addWidget(task_runner)
+
+    worker_threads = []
+    results = []
+
+    def task(progress, cancel_token):
+        worker_threads.append(threading.current_thread())
+        progress(0.5, "Halfway")
+
+        return 42
+
+    def on_returned(result):
+        results.append((result, threading.current_thread()))
+
+    assert task_runner.run(task=task, on_returned=on_returned)
+
+    qtbot.waitUntil(lambda: not task_runner.is_running())
+
+    assert worker_threads[0] is not threading.main_thread()
+    assert results == [(42, threading.main_thread())]
+
+
+def test_cancelled_task_stops_at_next_stage(qtbot) -> None:
+    task_runner = TaskRunner()
+    qtbot.addWidget(task_runner)
+
+    started = threading.Event()
+    proceed = threading.Event()
+    stages = []
+
+    def task(progress, cancel_token):
+        started.set()
+        proceed.wait(timeout=5)
+
+        for stage in range(3):
+            progress(stage / 3, "Stage")
+            stages.append(stage)
+
+    task_runner.run(task=task, on_returned=stages.append)
+    started.wait(timeout=5)
+
+    # A second task is refused while the first one runs.
+    assert not task_runner.run(task=task, on_returned=stages.append)
+
+    task_runner.cancel()
+    proceed.set()
+
+    qtbot.waitUntil(lambda: not task_runner.is_running())
+
+    assert stages == []
+
+
+def test_button_is_disabled_while_running(qtbot) -> None:
+    task_runner = TaskRunner()
+    button = QPushButton()
+    qtbot.addWidget(task_runner)
+    qtbot.addWidget(button)
+
+    proceed = threading.Event()
+
+    def task(progress, cancel_token):
+        proceed.wait(timeout=5)
+        raise ValueError("Failed")
+
+    task_runner.run(task=task, on_returned=print, button=button)
+
+    assert not button.isEnabled()
+
+    proceed.set()
+    qtbot.waitUntil(lambda: not task_runner.is_running())
+
+    assert button.isEnabled()
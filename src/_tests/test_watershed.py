@@ -53,6 +53,7 @@ def test_watershed(
         QPushButton, name="watershed_button"
     )
     qtbot.mouseClick(watershed_button, Qt.MouseButton.LeftButton)
+    qtbot.waitUntil(lambda: not watershed_widget.task_runner.is_running())
 
     assert "hello_world_labels_watershed" in viewer.layers
 
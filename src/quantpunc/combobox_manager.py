@@ -1,6 +1,7 @@
 from typing import TYPE_CHECKING, Callable, List, Tuple
 
-from qtpy.QtWidgets import QComboBox
+from qtpy.QtCore import Qt
+from qtpy.QtWidgets import QComboBox, QListWidget, QListWidgetItem
 
 if TYPE_CHECKING:
     from napari import Viewer
@@ -10,6 +11,7 @@ class ComboBoxManager:
     def __init__(self, viewer: "Viewer"):
         self.viewer = viewer
         self.comboboxes: List[Tuple[QComboBox, Callable | None]] = []
+        self.list_widgets: List[Tuple[QListWidget, Callable | None]] = []
 
         self.viewer.layers.events.inserted.connect(self._add_layer)
         self.viewer.layers.events.removed.connect(self._remove_layer)
@@ -22,6 +24,51 @@ class ComboBoxManager:
         self.comboboxes.append((combobox, filter_fn))
         self._populate_combobox(combobox, filter_fn)
 
+    def register_list_widget(
+        self,
+        list_widget: QListWidget,
+        filter_fn: Callable | None = None,
+    ) -> None:
+        """
+        Keeps a list of layers for selecting several of them in sync with
+        the layer list, like the registered comboboxes.
+        """
+
+        self.list_widgets.append((list_widget, filter_fn))
+        self._populate_list_widget(list_widget, filter_fn)
+
+    def _populate_list_widget(
+        self, list_widget: QListWidget, filter_fn: Callable | None
+    ) -> None:
+        """
+        Adds layer names and data from the layer list to the list widget,
+        keeping layers that were selected selected.
+        """
+
+        selected = [
+            item.data(Qt.ItemDataRole.UserRole)
+            for item in list_widget.selectedItems()
+        ]
+
+        list_widget.blockSignals(True)
+        list_widget.clear()
+
+        for layer in self.viewer.layers:
+            if filter_fn is None or filter_fn(layer):
+                item = self._add_list_item(list_widget, layer)
+                item.setSelected(any(layer is other for other in selected))
+
+        list_widget.blockSignals(False)
+
+    def _add_list_item(
+        self, list_widget: QListWidget, layer
+    ) -> QListWidgetItem:
+        item = QListWidgetItem(layer.name)
+        item.setData(Qt.ItemDataRole.UserRole, layer)
+        list_widget.addItem(item)
+
+        return item
+
     def _populate_combobox(
         self, combobox: QComboBox, filter_fn: Callable | None
     ) -> None:
@@ -56,6 +103,10 @@ class ComboBoxManager:
             if filter_fn is None or filter_fn(layer):
                 combobox.addItem(layer.name, userData=layer)
 
+        for list_widget, filter_fn in self.list_widgets:
+            if filter_fn is None or filter_fn(layer):
+                self._add_list_item(list_widget, layer)
+
     def _remove_layer(self, event) -> None:
         layer = event.value
         layer.events.name.disconnect(self._rename_layer)
@@ -65,6 +116,17 @@ class ComboBoxManager:
             if idx != -1:
                 combobox.removeItem(idx)
 
+        for list_widget, _ in self.list_widgets:
+            for row in range(list_widget.count()):
+                item = list_widget.item(row)
+
+                if item.data(Qt.ItemDataRole.UserRole) is layer:
+                    list_widget.takeItem(row)
+                    break
+
     def _rename_layer(self, event) -> None:
         for combobox, filter_fn in self.comboboxes:
             self._populate_combobox(combobox, filter_fn)
+
+        for list_widget, filter_fn in self.list_widgets:
+            self._populate_list_widget(list_widget, filter_fn)
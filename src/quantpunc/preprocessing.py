@@ -15,6 +15,8 @@ from skimage.exposure import equalize_adapthist, rescale_intensity
 from skimage.restoration import denoise_wavelet
 
 from quantpunc.combobox_manager import ComboBoxManager
+from quantpunc.quantification.progress import CancelToken, ProgressCallback
+from quantpunc.task_runner import TaskRunner
 
 if TYPE_CHECKING:
     from napari import Viewer
@@ -27,6 +29,11 @@ class Preprocessor(QWidget):
         self._init_widget()
 
     def process_images(self) -> None:
+        """
+        Processes the selected image on a worker thread and adds the result
+        to the viewer.
+        """
+
         layer = self.img_combobox.currentData()
 
         if type(layer).__name__ == "Image":
@@ -36,16 +43,36 @@ class Preprocessor(QWidget):
                 show_error("The selected image must be 2D.")
                 return
 
-            img_name = layer.name
-            processed_img = self.preprocess_pipeline(img=img)
-            processed_name = f"{img_name}_processed"
-
-            if processed_name in self.viewer.layers:
-                self.viewer.layers.remove(processed_name)
-
-            self.viewer.add_image(data=processed_img, name=processed_name)
-
-    def preprocess_pipeline(self, img: np.ndarray) -> np.ndarray:
+            processed_name = f"{layer.name}_processed"
+            mode = self.mode_combobox.currentText()
+            method = self.method_combobox.currentText()
+
+            def task(
+                progress: ProgressCallback, cancel_token: CancelToken
+            ) -> np.ndarray:
+                return self.preprocess_pipeline(
+                    img=img, mode=mode, method=method, progress=progress
+                )
+
+            def add_processed_image(processed_img: np.ndarray) -> None:
+                if processed_name in self.viewer.layers:
+                    self.viewer.layers.remove(processed_name)
+
+                self.viewer.add_image(data=processed_img, name=processed_name)
+
+            self.task_runner.run(
+                task=task,
+                on_returned=add_processed_image,
+                button=self.process_button,
+            )
+
+    def preprocess_pipeline(
+        self,
+        img: np.ndarray,
+        mode: str | None = None,
+        method: str | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> np.ndarray:
         """
         Processes an image using wavelet denoising, intensity rescaling, and
         adaptive histogram equalization.
@@ -55,18 +82,31 @@ class Preprocessor(QWidget):
         image: np.ndarray
             Array of a image layer.
 
+        mode: str | None
+            Denoising mode. None uses the selected one.
+
+        method: str | None
+            Thresholding method. None uses the selected one.
+
+        progress: ProgressCallback | None
+            Called before each stage.
+
         Returns
         -------
         np.ndarray
             Array of a processed image.
         """
 
-        current_mode = self.mode_combobox.currentText()
-        current_method = self.method_combobox.currentText()
+        mode = mode or self.mode_combobox.currentText()
+        method = method or self.method_combobox.currentText()
 
-        img = denoise_wavelet(
-            image=img, mode=current_mode, method=current_method
-        )
+        if progress is not None:
+            progress(0, "Denoising")
+
+        img = denoise_wavelet(image=img, mode=mode, method=method)
+
+        if progress is not None:
+            progress(0.5, "Equalizing")
 
         img = rescale_intensity(image=img, out_range=np.float64)
         img = equalize_adapthist(image=img)
@@ -95,9 +135,11 @@ class Preprocessor(QWidget):
         self.method_combobox = QComboBox()
         self.method_combobox.addItems(["BayesShrink", "VisuShrink"])
 
-        process_button = QPushButton("Process")
-        process_button.setObjectName("process_button")
-        process_button.clicked.connect(self.process_images)
+        self.process_button = QPushButton("Process")
+        self.process_button.setObjectName("process_button")
+        self.process_button.clicked.connect(self.process_images)
+
+        self.task_runner = TaskRunner()
 
         preprocessing_layout.addWidget(img_label)
         preprocessing_layout.addWidget(self.img_combobox)
@@ -105,7 +147,8 @@ class Preprocessor(QWidget):
         preprocessing_layout.addWidget(self.mode_combobox)
         preprocessing_layout.addWidget(method_label)
         preprocessing_layout.addWidget(self.method_combobox)
-        preprocessing_layout.addWidget(process_button)
+        preprocessing_layout.addWidget(self.process_button)
+        preprocessing_layout.addWidget(self.task_runner)
         preprocessing_layout.setSpacing(5)
         preprocessing_layout.setContentsMargins(10, 20, 10, 10)
 
@@ -1,9 +1,12 @@
+import inspect
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
 import numpy as np
 from qtpy.QtWidgets import QLayout
 
+from quantpunc.quantification.progress import CancelToken, ProgressCallback
+
 if TYPE_CHECKING:
     from napari import Viewer
 
@@ -19,11 +22,49 @@ class AbstractPunctaLabeler(ABC):
 
     @abstractmethod
     def label_puncta(
-        self, image: np.ndarray, masks: np.ndarray | None, label_intensity: int
+        self,
+        image: np.ndarray,
+        masks: np.ndarray | None,
+        label_intensity: int,
+        progress: ProgressCallback | None = None,
+        cancel_token: CancelToken | None = None,
     ) -> np.ndarray:
         """Labeling function should account for the case where the user provides no masks.
-        Returns a binary puncta image with 0 as background. Return an empty numpy array to produce no labels."""
+        Returns a binary puncta image with 0 as background. Return an empty numpy array to produce no labels.
+        Runs on a worker thread, so it must not add or change layers.
+        Labelers may report the fraction done to progress and should raise TaskCancelled between stages once cancel_token is cancelled.
+        Both are optional: labelers whose label_puncta does not take them are called without them.
+        Any other parameters are passed as the keyword arguments returned by labeling_parameters."""
+
+    def labeling_parameters(self) -> dict:
+        """Reads the keyword arguments of label_puncta from the labeler's widgets. Runs on the GUI thread, since widgets must not be read from the worker thread.
+        Raises ValueError with a message for the user if a parameter is invalid."""
+        return {}
+
+    def update_viewer(self) -> None:
+        """Adds or updates layers produced by the last call to label_puncta besides the puncta labels. Runs on the GUI thread."""
+        return None
+
+    def layer_metadata(self) -> dict:
+        """Returns metadata for the labels layer produced by the last call to label_puncta."""
+        return {}
 
     @abstractmethod
     def initialize_widgets(self) -> QLayout:
         """Returns a layout with widgets that will be used to parameterize the puncta labeler."""
+
+
+def supports_progress(labeler: AbstractPunctaLabeler) -> bool:
+    """
+    Whether a labeler's label_puncta takes the progress and cancel_token
+    arguments, which labelers written before they were added do not.
+    """
+
+    parameters = inspect.signature(labeler.label_puncta).parameters.values()
+
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters):
+        return True
+
+    names = {p.name for p in parameters}
+
+    return {"progress", "cancel_token"} <= names
@@ -0,0 +1,861 @@
+import math
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import ndimage as ndi
+from scipy import spatial
+from skimage.feature import hessian_matrix_det
+from skimage.util import img_as_float
+
+from quantpunc.quantification.feature_cache import (
+    SCALE_SPACE_CACHE,
+    feature_key,
+)
+from quantpunc.quantification.progress import (
+    ProgressCallback,
+    sub_progress,
+)
+from quantpunc.quantification.rasterize import instance_disk_stats
+from quantpunc.quantification.tiling import (
+    TileSlices,
+    iter_tiles,
+    tile_count,
+    tile_size_for_budget,
+)
+
+SCALE_SPACE_METHODS = ("LoG", "DoG", "DoH")
+
+
+def float_image(image: np.ndarray) -> np.ndarray:
+    image = img_as_float(image)
+
+    if image.dtype == np.float16:
+        return image.astype(np.float32)
+
+    return image
+
+
+def scale_sigmas(
+    method: str,
+    dtype: np.dtype,
+    min_sigma: float,
+    max_sigma: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+) -> np.ndarray:
+    """
+    Computes the Gaussian scales of a scale space the way skimage's blob
+    functions do.
+
+    Parameters
+    ----------
+    method: str
+        "LoG", "DoG" or "DoH".
+
+    dtype: np.dtype
+        Floating point type of the image.
+
+    min_sigma: float
+        Smallest scale.
+
+    max_sigma: float
+        Largest scale.
+
+    num_sigma: int
+        Number of scales of LoG and DoH.
+
+    sigma_ratio: float
+        Ratio between successive scales of DoG.
+
+    Returns
+    -------
+    np.ndarray
+        Scales of the cube levels. DoG has one more scale than levels.
+    """
+
+    if method not in SCALE_SPACE_METHODS:
+        raise ValueError(f"Unknown scale space: {method}.")
+
+    if method == "DoH":
+        return np.linspace(min_sigma, max_sigma, num_sigma)
+
+    min_sigmas = np.full(2, min_sigma, dtype=dtype)
+    max_sigmas = np.full(2, max_sigma, dtype=dtype)
+
+    if method == "LoG":
+        return np.linspace(min_sigmas, max_sigmas, num_sigma)[:, 0]
+
+    if sigma_ratio <= 1.0:
+        raise ValueError("sigma_ratio must be > 1.0")
+
+    k = int(np.mean(np.log(max_sigmas / min_sigmas) / np.log(sigma_ratio) + 1))
+
+    return np.array([min_sigmas * (sigma_ratio**i) for i in range(k + 1)])[
+        :, 0
+    ]
+
+
+def ordered_map(
+    fn: Callable, items: Iterable, n_workers: int
+) -> Iterator[np.ndarray]:
+    """
+    Applies fn to items in a thread pool and yields the results in order,
+    keeping at most n_workers results in flight to bound memory.
+    """
+
+    with ThreadPoolExecutor(max_workers=max(n_workers, 1)) as executor:
+        pending: deque = deque()
+
+        for item in items:
+            pending.append(executor.submit(fn, item))
+
+            if len(pending) >= max(n_workers, 1):
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def compute_scale_space(
+    image: np.ndarray,
+    method: str,
+    sigmas: np.ndarray,
+    sigma_ratio: float = 1.6,
+    n_workers: int = 1,
+    progress: ProgressCallback | None = None,
+) -> np.ndarray:
+    """
+    Computes the blob response of an image at every scale. Scales are
+    filtered concurrently in a thread pool, since the filters release the
+    GIL.
+
+    Parameters
+    ----------
+    image: np.ndarray
+        Array of a user-specified image.
+
+    method: str
+        "LoG", "DoG" or "DoH".
+
+    sigmas: np.ndarray
+        Scales from scale_sigmas.
+
+    sigma_ratio: float
+        Ratio between successive scales of DoG.
+
+    n_workers: int
+        Number of scales filtered concurrently.
+
+    progress: ProgressCallback | None
+        Called after each scale is filtered.
+
+    Returns
+    -------
+    np.ndarray
+        Cube of shape (H, W, n_levels) in which blobs are local maxima.
+    """
+
+    image = float_image(image)
+    dtype = image.dtype
+
+    def report(n_done: int) -> None:
+        if progress is not None:
+            progress(n_done / len(sigmas), "Filtering scales")
+
+    if method == "LoG":
+        cube = np.empty(image.shape + (len(sigmas),), dtype=dtype)
+
+        def log_level(s: float) -> np.ndarray:
+            # s**2 provides scale invariance.
+            return -ndi.gaussian_laplace(image, [s, s]) * s**2
+
+        levels = ordered_map(log_level, sigmas, n_workers)
+
+        for i, level in enumerate(levels):
+            cube[..., i] = level
+            report(i + 1)
+
+        return cube
+
+    if method == "DoG":
+        cube = np.empty(image.shape + (len(sigmas) - 1,), dtype=dtype)
+
+        def gaussian_level(s: float) -> np.ndarray:
+            return ndi.gaussian_filter(image, [s, s], mode="reflect")
+
+        levels = ordered_map(gaussian_level, sigmas, n_workers)
+        previous = next(levels)
+        report(1)
+
+        for i, current in enumerate(levels):
+            cube[..., i] = previous - current
+            previous = current
+            report(i + 2)
+
+        # Normalization factor for consistency in DoG magnitude.
+        cube *= 1 / (sigma_ratio - 1)
+
+        return cube
+
+    cube = np.empty(image.shape + (len(sigmas),), dtype=dtype)
+
+    def doh_level(s: float) -> np.ndarray:
+        return hessian_matrix_det(image, sigma=s, approximate=True)
+
+    for i, level in enumerate(ordered_map(doh_level, sigmas, n_workers)):
+        cube[..., i] = level
+        report(i + 1)
+
+    return cube
+
+
+def scale_space_key(
+    image: np.ndarray, method: str, sigmas: np.ndarray, sigma_ratio: float
+) -> str:
+    config = (
+        "scale_space",
+        method,
+        tuple(sigmas.tolist()),
+        sigma_ratio if method == "DoG" else None,
+    )
+
+    return feature_key(img=image, config=config)
+
+
+def image_scale_sigmas(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+) -> np.ndarray:
+    """
+    Returns the scales of an image's scale-space cube, in the floating
+    point type the image is filtered in.
+    """
+
+    return scale_sigmas(
+        method=method,
+        dtype=float_image(image[:1, :1]).dtype,
+        min_sigma=min_sigma,
+        max_sigma=max_sigma,
+        num_sigma=num_sigma,
+        sigma_ratio=sigma_ratio,
+    )
+
+
+def scale_space(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+    n_workers: int = 1,
+    progress: ProgressCallback | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the scale-space cube of an image from the shared scale-space
+    cache, computing it only if the image and scales have not been seen
+    before.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Read-only cube and the scale of each level.
+    """
+
+    sigmas = image_scale_sigmas(
+        image=image,
+        method=method,
+        min_sigma=min_sigma,
+        max_sigma=max_sigma,
+        num_sigma=num_sigma,
+        sigma_ratio=sigma_ratio,
+    )
+    key = scale_space_key(
+        image=image, method=method, sigmas=sigmas, sigma_ratio=sigma_ratio
+    )
+    cube = SCALE_SPACE_CACHE.get(key)
+
+    if cube is None:
+        cube = compute_scale_space(
+            image=image,
+            method=method,
+            sigmas=sigmas,
+            sigma_ratio=sigma_ratio,
+            n_workers=n_workers,
+            progress=progress,
+        )
+        cube = SCALE_SPACE_CACHE.put(key, cube)
+
+    return cube, sigmas
+
+
+def local_maxima(cube: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds every local maximum of a scale-space cube in a 3x3x3
+    neighbourhood, like skimage's peak_local_max without a threshold.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Row, column and level of each maximum, strongest first, and their
+        responses.
+    """
+
+    cube_max = ndi.maximum_filter(cube, size=3, mode="nearest")
+    is_max = cube == cube_max
+
+    # A constant cube has no peaks.
+    if is_max.all():
+        return np.empty((0, 3), dtype=np.intp), np.empty(0, dtype=cube.dtype)
+
+    coords = np.nonzero(is_max)
+    responses = cube[coords]
+    order = np.argsort(-responses, kind="stable")
+
+    return np.transpose(coords)[order], responses[order]
+
+
+def find_peaks(
+    cube: np.ndarray, sigmas: np.ndarray, threshold: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds local maxima of a scale-space cube above a threshold.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Blobs as rows of (row, column, sigma), strongest first, and the
+        response of each blob.
+    """
+
+    peaks, responses = local_maxima(cube=cube)
+    above = responses > threshold
+
+    return peaks_to_blobs(peaks[above], sigmas, cube.dtype), responses[above]
+
+
+def peaks_to_blobs(
+    peaks: np.ndarray, sigmas: np.ndarray, dtype: np.dtype
+) -> np.ndarray:
+    dtype = np.result_type(dtype, sigmas.dtype)
+
+    return np.column_stack((peaks[:, :-1].astype(dtype), sigmas[peaks[:, -1]]))
+
+
+def scale_space_peaks(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+    n_workers: int = 1,
+    progress: ProgressCallback | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns every local maximum of an image's scale space from the shared
+    scale-space cache. A threshold only removes maxima without changing
+    their order, so the cached maxima serve every threshold, and the cube
+    is only looked up or computed when they are not cached.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Blobs as rows of (row, column, sigma), strongest first, and the
+        response of each blob.
+    """
+
+    sigmas = image_scale_sigmas(
+        image=image,
+        method=method,
+        min_sigma=min_sigma,
+        max_sigma=max_sigma,
+        num_sigma=num_sigma,
+        sigma_ratio=sigma_ratio,
+    )
+    key = scale_space_key(
+        image=image, method=method, sigmas=sigmas, sigma_ratio=sigma_ratio
+    )
+    cached = SCALE_SPACE_CACHE.get(f"{key}-peaks")
+
+    if cached is None:
+        cube, _ = scale_space(
+            image=image,
+            method=method,
+            min_sigma=min_sigma,
+            max_sigma=max_sigma,
+            num_sigma=num_sigma,
+            sigma_ratio=sigma_ratio,
+            n_workers=n_workers,
+            progress=progress,
+        )
+        peaks, responses = local_maxima(cube=cube)
+        blobs = peaks_to_blobs(peaks, sigmas, cube.dtype)
+        cached = SCALE_SPACE_CACHE.put(
+            f"{key}-peaks", np.column_stack((blobs, responses))
+        )
+
+    return cached[:, :3], cached[:, 3]
+
+
+def scale_space_halo(method: str, sigmas: np.ndarray) -> int:
+    """
+    Width of the margin a tile needs so that the cube and its local maxima
+    inside the tile equal those of the whole image.
+    """
+
+    largest = float(np.max(sigmas))
+
+    if method == "DoH":
+        # Box filters of the Hessian approximation span about 3 * sigma.
+        reach = int(3 * largest) + 2
+    else:
+        # Radius of scipy's Gaussian kernels, truncated at 4 sigma.
+        reach = int(4.0 * largest + 0.5)
+
+    # One more pixel for the 3x3x3 peak neighbourhood.
+    return reach + 1
+
+
+def tile_peaks(
+    image: np.ndarray,
+    method: str,
+    sigmas: np.ndarray,
+    sigma_ratio: float,
+    threshold: float,
+    tile: tuple[TileSlices, TileSlices, TileSlices],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the local maxima above a threshold in the core of one tile from
+    iter_tiles. Only maxima in the core are kept, so neighbouring tiles
+    never report the same maximum.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Row, column and level of each maximum in image coordinates, and
+        their responses.
+    """
+
+    padded, core, core_in_padded = tile
+
+    cube = compute_scale_space(
+        image=image[padded],
+        method=method,
+        sigmas=sigmas,
+        sigma_ratio=sigma_ratio,
+    )
+    is_max = cube == ndi.maximum_filter(cube, size=3, mode="nearest")
+
+    cube = cube[core_in_padded]
+    peaks = np.nonzero(is_max[core_in_padded] & (cube > threshold))
+    responses = cube[peaks]
+
+    peaks = np.column_stack(peaks)
+    peaks[:, 0] += core[0].start
+    peaks[:, 1] += core[1].start
+
+    return peaks, responses
+
+
+def blob_tile_size(
+    method: str, sigmas: np.ndarray, memory_budget_mb: float, n_workers: int
+) -> int:
+    # float64 cube, its maximum filter and peak mask, plus the float image
+    # and the filter temporaries of one level.
+    n_levels = len(sigmas)
+    bytes_per_pixel = 17 * n_levels + 4 * 8
+
+    return tile_size_for_budget(
+        memory_budget_mb=memory_budget_mb,
+        bytes_per_pixel=bytes_per_pixel,
+        n_workers=n_workers,
+        halo=scale_space_halo(method=method, sigmas=sigmas),
+    )
+
+
+def tiled_peaks(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    threshold: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+    memory_budget_mb: float = 2048,
+    n_workers: int = 1,
+    progress: ProgressCallback | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the local maxima of an image's scale space above a threshold one
+    tile at a time, without holding the scale space of the whole image.
+    Tiles are processed concurrently and sized so that the tiles in flight
+    fit in the memory budget, whatever the size of the image.
+
+    Apart from an image whose scale space is constant, the maxima equal
+    those of scale_space_peaks above the threshold, in the same order.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Blobs as rows of (row, column, sigma), strongest first, and the
+        response of each blob.
+    """
+
+    dtype = float_image(image[:1, :1]).dtype
+    sigmas = scale_sigmas(
+        method=method,
+        dtype=dtype,
+        min_sigma=min_sigma,
+        max_sigma=max_sigma,
+        num_sigma=num_sigma,
+        sigma_ratio=sigma_ratio,
+    )
+    tile_size = blob_tile_size(
+        method=method,
+        sigmas=sigmas,
+        memory_budget_mb=memory_budget_mb,
+        n_workers=n_workers,
+    )
+    tiles = iter_tiles(
+        shape=image.shape,
+        tile_size=tile_size,
+        halo=scale_space_halo(method=method, sigmas=sigmas),
+    )
+
+    def find_tile_peaks(tile: tuple) -> tuple[np.ndarray, np.ndarray]:
+        return tile_peaks(
+            image=image,
+            method=method,
+            sigmas=sigmas,
+            sigma_ratio=sigma_ratio,
+            threshold=threshold,
+            tile=tile,
+        )
+
+    n_tiles = tile_count(shape=image.shape, tile_size=tile_size)
+    results = []
+
+    for tile_result in ordered_map(find_tile_peaks, tiles, n_workers):
+        results.append(tile_result)
+
+        if progress is not None:
+            progress(len(results) / n_tiles, "Detecting blobs in tiles")
+
+    peaks = np.concatenate([tile_result[0] for tile_result in results])
+    responses = np.concatenate([tile_result[1] for tile_result in results])
+
+    # Strongest first, ties in the raster order of the whole cube.
+    order = np.lexsort((peaks[:, 2], peaks[:, 1], peaks[:, 0], -responses))
+    cube_dtype = np.result_type(dtype, responses.dtype)
+
+    return peaks_to_blobs(peaks[order], sigmas, cube_dtype), responses[order]
+
+
+def blob_overlaps(blobs: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """
+    Fraction of the smaller blob's area covered by the other blob for
+    every pair of blobs, as defined by skimage.
+
+    Parameters
+    ----------
+    blobs: np.ndarray
+        Rows of (row, column, sigma).
+
+    pairs: np.ndarray
+        Indices of the two blobs of each pair, shape (n_pairs, 2).
+
+    Returns
+    -------
+    np.ndarray
+        Overlap fraction of each pair.
+    """
+
+    blobs1, blobs2 = blobs[pairs[:, 0]], blobs[pairs[:, 1]]
+    sigmas1, sigmas2 = blobs1[:, -1], blobs2[:, -1]
+
+    first_larger = sigmas1 > sigmas2
+    max_sigmas = np.where(first_larger, sigmas1, sigmas2)
+    r1 = np.where(first_larger, 1.0, sigmas1 / sigmas2)
+    r2 = np.where(first_larger, sigmas2 / sigmas1, 1.0)
+
+    # Rescale space so that the larger blob has radius 1.
+    scale = (max_sigmas * math.sqrt(2))[:, None]
+    d = np.sqrt(
+        np.sum((blobs2[:, :2] / scale - blobs1[:, :2] / scale) ** 2, 1)
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio1 = np.clip((d**2 + r1**2 - r2**2) / (2 * d * r1), -1, 1)
+        ratio2 = np.clip((d**2 + r2**2 - r1**2) / (2 * d * r2), -1, 1)
+        a = -d + r2 + r1
+        b = d - r2 + r1
+        c = d + r2 - r1
+        e = d + r2 + r1
+        area = (
+            r1**2 * np.arccos(ratio1)
+            + r2**2 * np.arccos(ratio2)
+            - 0.5 * np.sqrt(np.abs(a * b * c * e))
+        )
+        overlaps = area / (math.pi * np.minimum(r1, r2) ** 2)
+
+    overlaps[d <= np.abs(r1 - r2)] = 1.0
+    overlaps[d > r1 + r2] = 0.0
+
+    return overlaps
+
+
+def prune_blobs(blobs: np.ndarray, overlap: float) -> np.ndarray:
+    """
+    Removes the smaller blob of every pair whose overlap exceeds a
+    fraction, visiting pairs in the same order as skimage.
+
+    A removed blob can no longer remove others, so overlaps are computed
+    for all pairs at once from the original sizes, and only the pairs
+    above the limit are resolved in order.
+
+    Parameters
+    ----------
+    blobs: np.ndarray
+        Rows of (row, column, sigma).
+
+    overlap: float
+        Fraction between 0 and 1.
+
+    Returns
+    -------
+    np.ndarray
+        Remaining blobs.
+    """
+
+    if len(blobs) == 0:
+        return blobs
+
+    distance = 2 * blobs[:, -1].max() * math.sqrt(2)
+    tree = spatial.cKDTree(blobs[:, :-1])
+    pairs = np.array(list(tree.query_pairs(distance)), dtype=np.intp)
+
+    if len(pairs) == 0:
+        return blobs
+
+    overlapping = pairs[blob_overlaps(blobs=blobs, pairs=pairs) > overlap]
+    sigmas = blobs[:, -1].tolist()
+    keep = [True] * len(blobs)
+
+    for i, j in overlapping.tolist():
+        if keep[i] and keep[j]:
+            if sigmas[i] > sigmas[j]:
+                keep[j] = False
+            else:
+                keep[i] = False
+
+    return blobs[np.array(keep)]
+
+
+def detect_blobs(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    threshold: float,
+    overlap: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+    n_workers: int = 1,
+    memory_budget_mb: float | None = None,
+    progress: ProgressCallback | None = None,
+) -> np.ndarray:
+    """
+    Detects blobs like skimage's blob_log, blob_dog and blob_doh, but
+    reuses the scale-space cube when only threshold or overlap change.
+    With a memory budget, the image is processed in tiles that fit in it
+    instead, and nothing is cached.
+
+    Parameters
+    ----------
+    image: np.ndarray
+        Array of a user-specified image.
+
+    method: str
+        "LoG", "DoG" or "DoH".
+
+    min_sigma, max_sigma, num_sigma, sigma_ratio: float
+        Scales of the scale space, as in skimage.
+
+    n_workers: int
+        Number of scales, or of tiles, filtered concurrently.
+
+    threshold: float
+        Minimum response of a blob.
+
+    overlap: float
+        Maximum overlap fraction before the smaller blob is removed.
+
+    memory_budget_mb: float | None
+        Memory the tiles processed at once may use, in megabytes. None
+        processes the whole image at once.
+
+    progress: ProgressCallback | None
+        Called after each scale, or each tile, is processed. It may raise
+        to stop detection, e.g. TaskCancelled.
+
+    Returns
+    -------
+    np.ndarray
+        Rows of (row, column, sigma).
+    """
+
+    if memory_budget_mb is not None:
+        blobs, _ = tiled_peaks(
+            image=image,
+            method=method,
+            min_sigma=min_sigma,
+            max_sigma=max_sigma,
+            threshold=threshold,
+            num_sigma=num_sigma,
+            sigma_ratio=sigma_ratio,
+            memory_budget_mb=memory_budget_mb,
+            n_workers=n_workers,
+            progress=progress,
+        )
+
+        return prune_blobs(blobs=blobs, overlap=overlap)
+
+    blobs, responses = scale_space_peaks(
+        image=image,
+        method=method,
+        min_sigma=min_sigma,
+        max_sigma=max_sigma,
+        num_sigma=num_sigma,
+        sigma_ratio=sigma_ratio,
+        n_workers=n_workers,
+        progress=progress,
+    )
+
+    return prune_blobs(blobs=blobs[responses > threshold], overlap=overlap)
+
+
+def sweep_blobs(
+    image: np.ndarray,
+    method: str,
+    min_sigma: float,
+    max_sigma: float,
+    thresholds: Sequence[float],
+    overlap: float,
+    num_sigma: int = 10,
+    sigma_ratio: float = 1.6,
+    n_workers: int = 1,
+    memory_budget_mb: float | None = None,
+    progress: ProgressCallback | None = None,
+) -> dict[float, np.ndarray]:
+    """
+    Detects blobs at several thresholds from one scale-space cube and one
+    peak search. The other parameters are as in detect_blobs.
+
+    Parameters
+    ----------
+    thresholds: Sequence[float]
+        Minimum responses of a blob, one per sweep step.
+
+    progress: ProgressCallback | None
+        Called after each scale, or each tile, is processed and before
+        each threshold is pruned. It may raise to stop the sweep, e.g.
+        TaskCancelled.
+
+    Returns
+    -------
+    dict[float, np.ndarray]
+        Blobs found at each threshold, identical to calling detect_blobs
+        with that threshold.
+    """
+
+    peak_progress = sub_progress(progress=progress, start=0, stop=0.8)
+
+    if memory_budget_mb is not None:
+        blobs, responses = tiled_peaks(
+            image=image,
+            method=method,
+            min_sigma=min_sigma,
+            max_sigma=max_sigma,
+            threshold=min(thresholds),
+            num_sigma=num_sigma,
+            sigma_ratio=sigma_ratio,
+            memory_budget_mb=memory_budget_mb,
+            n_workers=n_workers,
+            progress=peak_progress,
+        )
+    else:
+        blobs, responses = scale_space_peaks(
+            image=image,
+            method=method,
+            min_sigma=min_sigma,
+            max_sigma=max_sigma,
+            num_sigma=num_sigma,
+            sigma_ratio=sigma_ratio,
+            n_workers=n_workers,
+            progress=peak_progress,
+        )
+
+    blobs_per_threshold = {}
+
+    for i, threshold in enumerate(thresholds):
+        if progress is not None:
+            progress(0.8 + 0.2 * i / len(thresholds), "Pruning blobs")
+
+        blobs_per_threshold[threshold] = prune_blobs(
+            blobs=blobs[responses > threshold], overlap=overlap
+        )
+
+    return blobs_per_threshold
+
+
+def blob_table(
+    blobs: np.ndarray, labels: np.ndarray, masks: np.ndarray | None
+) -> dict[str, np.ndarray]:
+    """
+    Describes every blob of a labels array drawn with instance IDs, so that
+    puncta can be counted without relabelling the array.
+
+    Parameters
+    ----------
+    blobs: np.ndarray
+        Rows of (row, column, sigma) in the order of their IDs.
+
+    labels: np.ndarray
+        Labels array in which blob i has the ID i + 1.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None marks every blob with mask -1.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        ID, center row and column, sigma, area after clipping and overlaps,
+        and mask ID at the center of each blob.
+    """
+
+    rows = blobs[:, 0].astype(np.intp)
+    cols = blobs[:, 1].astype(np.intp)
+    areas, _ = instance_disk_stats(
+        labels=labels, centers=blobs[:, :-1], radii=blobs[:, -1]
+    )
+
+    if masks is None:
+        mask_ids = np.full(len(blobs), -1, dtype=np.int64)
+    else:
+        mask_ids = masks[rows, cols].astype(np.int64)
+
+    return {
+        "id": np.arange(1, len(blobs) + 1),
+        "row": rows,
+        "col": cols,
+        "sigma": blobs[:, -1].copy(),
+        "area": areas,
+        "mask": mask_ids,
+    }
@@ -0,0 +1,214 @@
+import copy
+import time
+from collections.abc import Callable
+
+import numpy as np
+from sklearn.base import ClassifierMixin
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    HistGradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+ClassifierFactory = Callable[[int, int | None, int], ClassifierMixin]
+
+CLASSIFIER_REGISTRY: dict[str, ClassifierFactory] = {}
+
+
+def register_classifier(name: str, factory: ClassifierFactory) -> None:
+    CLASSIFIER_REGISTRY[name] = factory
+
+
+def random_forest(
+    n_estimators: int, max_depth: int | None, n_jobs: int
+) -> ClassifierMixin:
+    return RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs
+    )
+
+
+def extra_trees(
+    n_estimators: int, max_depth: int | None, n_jobs: int
+) -> ClassifierMixin:
+    return ExtraTreesClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs
+    )
+
+
+def hist_gradient_boosting(
+    n_estimators: int, max_depth: int | None, n_jobs: int
+) -> ClassifierMixin:
+    # Threads are set through OpenMP rather than n_jobs.
+    return HistGradientBoostingClassifier(
+        max_iter=n_estimators, max_depth=max_depth
+    )
+
+
+def logistic_regression(
+    n_estimators: int, max_depth: int | None, n_jobs: int
+) -> ClassifierMixin:
+    return LogisticRegression(max_iter=1000)
+
+
+def register_default_classifiers() -> None:
+    register_classifier("Random Forest", random_forest)
+    register_classifier("Extra Trees", extra_trees)
+    register_classifier("Histogram Gradient Boosting", hist_gradient_boosting)
+    register_classifier("Logistic Regression", logistic_regression)
+
+
+def make_classifier_pipeline(
+    name: str,
+    n_estimators: int = 100,
+    max_depth: int | None = None,
+    n_jobs: int = 1,
+) -> Pipeline:
+    """
+    Builds an unfitted pixel classifier from the registry.
+
+    Parameters
+    ----------
+    name: str
+        Name the classifier was registered under.
+
+    n_estimators: int
+        Number of trees, or boosting iterations. Ignored by linear models.
+
+    max_depth: int | None
+        Maximum tree depth. None grows trees until their leaves are pure.
+
+    n_jobs: int
+        Number of cores used to fit and apply the classifier.
+
+    Returns
+    -------
+    Pipeline
+        Feature standardization followed by the classifier.
+    """
+
+    if name not in CLASSIFIER_REGISTRY:
+        raise ValueError(f"Unknown classifier: {name}.")
+
+    classifier = CLASSIFIER_REGISTRY[name](n_estimators, max_depth, n_jobs)
+
+    return make_pipeline(StandardScaler(), classifier)
+
+
+def supports_warm_start(model: Pipeline) -> bool:
+    return isinstance(
+        model[-1], (RandomForestClassifier, ExtraTreesClassifier)
+    )
+
+
+def single_threaded(model: Pipeline) -> Pipeline:
+    """
+    Returns a fitted pipeline whose classifier predicts on a single core,
+    for classifying tiles in parallel without running n_jobs threads per
+    tile. The fitted steps are shared with the original pipeline.
+
+    Parameters
+    ----------
+    model: Pipeline
+        Fitted pipeline.
+
+    Returns
+    -------
+    Pipeline
+        The pipeline itself if its classifier already uses one core,
+        otherwise a copy with n_jobs set to 1.
+    """
+
+    name, classifier = model.steps[-1]
+
+    if classifier.get_params().get("n_jobs", 1) in (None, 1):
+        return model
+
+    classifier = copy.copy(classifier)
+    classifier.set_params(n_jobs=1)
+
+    return Pipeline([*model.steps[:-1], (name, classifier)])
+
+
+def compare_classifiers(
+    features: np.ndarray,
+    labels: np.ndarray,
+    names: list[str] | None = None,
+    n_estimators: int = 100,
+    max_depth: int | None = None,
+    n_jobs: int = 1,
+    seed: int = 0,
+) -> dict[str, dict[str, float]]:
+    """
+    Fits every classifier on three quarters of the training samples and
+    scores it on the rest.
+
+    Parameters
+    ----------
+    features: np.ndarray
+        Feature matrix of shape (n_samples, n_features).
+
+    labels: np.ndarray
+        Annotation label of each sample.
+
+    names: list[str] | None
+        Classifiers to compare. None compares every registered classifier.
+
+    n_estimators: int
+        Number of trees, or boosting iterations.
+
+    max_depth: int | None
+        Maximum tree depth.
+
+    n_jobs: int
+        Number of cores used to fit and apply the classifiers.
+
+    seed: int
+        Seed of the held-out split.
+
+    Returns
+    -------
+    dict[str, dict[str, float]]
+        Fit time in seconds, prediction time in seconds per megapixel
+        (excluding feature computation) and held-out accuracy of each
+        classifier.
+    """
+
+    train_features, test_features, train_labels, test_labels = (
+        train_test_split(
+            features,
+            labels,
+            test_size=0.25,
+            stratify=labels,
+            random_state=seed,
+        )
+    )
+
+    results = {}
+
+    for name in names or list(CLASSIFIER_REGISTRY):
+        model = make_classifier_pipeline(
+            name=name,
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            n_jobs=n_jobs,
+        )
+
+        start = time.perf_counter()
+        model.fit(train_features, train_labels)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicted = model.predict(test_features)
+        predict_time = time.perf_counter() - start
+
+        results[name] = {
+            "fit_s": fit_time,
+            "predict_s_per_mp": predict_time * 1e6 / len(test_labels),
+            "accuracy": float(np.mean(predicted == test_labels)),
+        }
+
+    return results
@@ -1,23 +1,71 @@
 from typing import TYPE_CHECKING
 
 import numpy as np
+import pandas as pd
 from napari.utils.notifications import show_error
+from qtpy.QtCore import Qt
+from qtpy.QtGui import QDoubleValidator
 from qtpy.QtWidgets import (
+    QAbstractItemView,
     QComboBox,
     QFormLayout,
+    QFrame,
     QLabel,
+    QLineEdit,
+    QListWidget,
     QPushButton,
+    QScrollArea,
     QSizePolicy,
     QVBoxLayout,
     QWidget,
 )
 
 from quantpunc.combobox_manager import ComboBoxManager
+from quantpunc.quantification.colocalization_metrics import (
+    iou_per_mask,
+    pairwise_iou_per_mask,
+)
+from quantpunc.quantification.distance_colocalization import (
+    DISTANCE_COLOC_COLUMNS,
+    distance_colocalization,
+)
+from quantpunc.quantification.intensity_colocalization import (
+    THRESHOLD_METHODS,
+    intensity_colocalization,
+)
+from quantpunc.quantification.object_colocalization import (
+    MATCHING_METHODS,
+    OBJECT_COLOC_COLUMNS,
+    object_colocalization,
+)
+from quantpunc.quantification.progress import CancelToken, ProgressCallback
+from quantpunc.table.table_model_view import DictionaryModel, TableView
 from quantpunc.table.table_widget import TableWidget
+from quantpunc.task_runner import TaskRunner
 
 if TYPE_CHECKING:
     from napari import Viewer, layers
 
+COLOCALIZATION_METHODS = [
+    "IoU",
+    "Object overlap",
+    "Centroid distance",
+    "All pairs IoU",
+    "Intensity correlation",
+]
+
+
+def table_rows(table: pd.DataFrame, columns: list[str]) -> dict[int, tuple]:
+    """
+    Converts a table of puncta into rows of a table model keyed by their
+    ID.
+    """
+
+    return {
+        int(puncta_id): tuple(row)
+        for puncta_id, *row in table[columns].itertuples()
+    }
+
 
 class ColocalizationWidget(QWidget):
     def __init__(self, viewer: "Viewer", table_widget: TableWidget):
@@ -26,6 +74,24 @@ class ColocalizationWidget(QWidget):
         self.table_widget = table_widget
         self._init_widget()
 
+    def compute_colocalization(self) -> None:
+        """
+        Runs the colocalization method selected in the method dropdown menu.
+        """
+
+        method = self.method_combobox.currentText()
+
+        if method == "Object overlap":
+            self.get_object_colocalization()
+        elif method == "Centroid distance":
+            self.get_distance_colocalization()
+        elif method == "All pairs IoU":
+            self.get_pairwise_iou()
+        elif method == "Intensity correlation":
+            self.get_intensity_colocalization()
+        else:
+            self.get_iou()
+
     def get_iou(self) -> None:
         """
         Computes the intersection over union for two labels layers and stores it
@@ -46,105 +112,457 @@ class ColocalizationWidget(QWidget):
             show_error("The two layers must be 2D.")
             return
 
-        first_nonzero = first_puncta.data > 0
-        second_nonzero = second_puncta.data > 0
+        first_data = first_puncta.data.copy()
+        second_data = second_puncta.data.copy()
+        mask_data = None if mask_layer is None else mask_layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> dict:
+            return self.iou_scores(
+                first_data=first_data,
+                second_data=second_data,
+                mask_data=mask_data,
+                progress=progress,
+            )
 
-        iou_scores = {}
+        def store_iou(iou_scores: dict) -> None:
+            self.store_iou(
+                first_puncta=first_puncta,
+                second_puncta=second_puncta,
+                iou_scores=iou_scores,
+            )
 
-        if mask_layer is not None:
-            mask_data = mask_layer.data
-            labels = np.unique(mask_data)
-            labels = labels[labels != 0]
+        self.task_runner.run(
+            task=task, on_returned=store_iou, button=self.compute_button
+        )
 
-            for label in labels:
-                region = mask_data == label
+    def get_object_colocalization(self) -> None:
+        """
+        Matches the puncta of two labels layers object by object and stores
+        the matches and the fraction of colocalized puncta of each mask in
+        table models.
+        """
 
-                intersection = (
-                    np.logical_and(first_nonzero, second_nonzero) & region
-                ).sum()
-                union = (
-                    np.logical_or(first_nonzero, second_nonzero) & region
-                ).sum()
+        first_puncta = self.first_combobox.currentData()
+        second_puncta = self.second_combobox.currentData()
+        mask_layer = self.mask_combobox.currentData()
 
-                if union == 0:
-                    iou_scores[label] = 0
-                else:
-                    iou_scores[label] = round(intersection / union, 4)
+        if first_puncta is None or second_puncta is None:
+            show_error(
+                "Please ensure a layer is selected in both dropdown menus."
+            )
+            return
 
-        else:
-            intersection = np.logical_and(first_nonzero, second_nonzero).sum()
-            union = np.logical_or(first_nonzero, second_nonzero).sum()
+        if first_puncta.data.ndim > 2 or second_puncta.data.ndim > 2:
+            show_error("The two layers must be 2D.")
+            return
+
+        if first_puncta.data.shape != second_puncta.data.shape:
+            show_error("The two layers must have the same shape.")
+            return
 
-            if union == 0:
-                iou_scores[-1] = 0
-            else:
-                iou_scores[-1] = round(intersection / union, 4)
+        if (
+            mask_layer is not None
+            and mask_layer.data.shape != first_puncta.data.shape
+        ):
+            show_error("The mask must have the same shape as the two layers.")
+            return
+
+        try:
+            min_iou = float(self.min_iou_line_edit.text())
+        except ValueError:
+            show_error("Please enter a number for the minimum IoU.")
+            return
+        method = self.matching_combobox.currentText()
+        first_data = first_puncta.data.copy()
+        second_data = second_puncta.data.copy()
+        mask_data = None if mask_layer is None else mask_layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> tuple:
+            return object_colocalization(
+                first=first_data,
+                second=second_data,
+                masks=mask_data,
+                method=method,
+                min_iou=min_iou,
+                progress=progress,
+            )
 
-        iou_view = self.table_widget.iou_table_view
-        iou_model = iou_view.dict_model
+        def store_object_coloc(result: tuple) -> None:
+            table, summary = result
+            self.store_tables(
+                puncta_layers=[first_puncta, second_puncta],
+                tables={
+                    self.table_widget.object_summary_table_view: summary,
+                    self.table_widget.object_table_view: table_rows(
+                        table=table, columns=OBJECT_COLOC_COLUMNS
+                    ),
+                },
+            )
 
-        paired_uuids = tuple(
-            sorted((first_puncta.unique_id, second_puncta.unique_id))
+        self.task_runner.run(
+            task=task,
+            on_returned=store_object_coloc,
+            button=self.compute_button,
         )
-        first_name = first_puncta.name.removesuffix("_puncta")
-        second_name = second_puncta.name.removesuffix("_puncta")
-        paired_names = tuple(sorted((first_name, second_name)))
 
-        names_to_delete = []
-        uuid_pairs_to_delete = set()
+    def get_distance_colocalization(self) -> None:
+        """
+        Measures the distance from every punctum of two labels layers to
+        the nearest punctum of the other layer and stores the fraction of
+        puncta within each radius of each mask in table models.
+        """
 
-        for name, old_uuids in iou_model.names_to_uuids.items():
-            if any(uuid in old_uuids for uuid in paired_uuids):
-                names_to_delete.append(name)
-                uuid_pairs_to_delete.add(old_uuids)
+        first_puncta = self.first_combobox.currentData()
+        second_puncta = self.second_combobox.currentData()
+        mask_layer = self.mask_combobox.currentData()
 
-        for name in names_to_delete:
-            del iou_model.names_to_uuids[name]
+        if first_puncta is None or second_puncta is None:
+            show_error(
+                "Please ensure a layer is selected in both dropdown menus."
+            )
+            return
 
-        for uuid_pair in uuid_pairs_to_delete:
-            iou_model.data_dict.pop(uuid_pair, None)
+        if first_puncta.data.ndim > 2 or second_puncta.data.ndim > 2:
+            show_error("The two layers must be 2D.")
+            return
 
-        iou_model.names_to_uuids[first_name] = paired_uuids
-        iou_model.names_to_uuids[second_name] = paired_uuids
-        iou_model.data_dict[paired_uuids] = {
-            "name": paired_names,
-            "data": iou_scores,
-        }
+        if mask_layer is not None and not (
+            mask_layer.data.shape
+            == first_puncta.data.shape
+            == second_puncta.data.shape
+        ):
+            show_error("The mask must have the same shape as the two layers.")
+            return
 
-        if not self.table_widget.save_initialized:
-            self.table_widget.initialize_table_settings()
+        try:
+            radii = [
+                float(radius)
+                for radius in self.radii_line_edit.text().split(",")
+                if radius.strip()
+            ]
+        except ValueError:
+            show_error("Radii must be comma-separated numbers.")
+            return
 
-        first_selection_index = self.table_widget.table_selection_box.findText(
-            first_name
+        if not radii or min(radii) < 0:
+            show_error("Please provide at least one radius of 0 or more.")
+            return
+
+        first_data = first_puncta.data.copy()
+        second_data = second_puncta.data.copy()
+        mask_data = None if mask_layer is None else mask_layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> tuple:
+            return distance_colocalization(
+                first=first_data,
+                second=second_data,
+                masks=mask_data,
+                radii=radii,
+                progress=progress,
+            )
+
+        def store_distance_coloc(result: tuple) -> None:
+            table, curve = result
+            self.store_tables(
+                puncta_layers=[first_puncta, second_puncta],
+                tables={
+                    self.table_widget.distance_curve_table_view: curve,
+                    self.table_widget.distance_table_view: table_rows(
+                        table=table, columns=DISTANCE_COLOC_COLUMNS
+                    ),
+                },
+            )
+
+        self.task_runner.run(
+            task=task,
+            on_returned=store_distance_coloc,
+            button=self.compute_button,
         )
 
-        second_selection_index = (
-            self.table_widget.table_selection_box.findText(second_name)
+    def get_pairwise_iou(self) -> None:
+        """
+        Computes the intersection over union of every pair of the labels
+        layers selected in the layer list and stores it in a table model.
+        """
+
+        puncta_layers = [
+            item.data(Qt.ItemDataRole.UserRole)
+            for item in self.layers_list.selectedItems()
+        ]
+        mask_layer = self.mask_combobox.currentData()
+
+        if len(puncta_layers) < 2:
+            show_error("Please select at least two layers in the layer list.")
+            return
+
+        if any(puncta.data.ndim > 2 for puncta in puncta_layers):
+            show_error("The selected layers must be 2D.")
+            return
+
+        shapes = {puncta.data.shape for puncta in puncta_layers}
+
+        if mask_layer is not None:
+            shapes.add(mask_layer.data.shape)
+
+        if len(shapes) > 1:
+            show_error(
+                "The selected layers and mask must have the same shape."
+            )
+            return
+
+        puncta_layers = sorted(puncta_layers, key=lambda puncta: puncta.name)
+
+        # The layers are packed chunk by chunk in the task instead of
+        # copied, so that many layers need little more memory than one.
+        layer_data = {
+            puncta.name.removesuffix("_puncta"): puncta.data
+            for puncta in puncta_layers
+        }
+        mask_data = None if mask_layer is None else mask_layer.data
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> dict:
+            return pairwise_iou_per_mask(
+                layers=layer_data, masks=mask_data, progress=progress
+            )
+
+        def store_pairwise_iou(scores: dict) -> None:
+            self.store_tables(
+                puncta_layers=puncta_layers,
+                tables={self.table_widget.pairwise_iou_table_view: scores},
+            )
+
+        self.task_runner.run(
+            task=task,
+            on_returned=store_pairwise_iou,
+            button=self.compute_button,
         )
 
-        if first_selection_index == -1:
-            (
-                self.table_widget.table_selection_box.addItem(
-                    first_name, userData=first_puncta.unique_id
-                )
+    def get_intensity_colocalization(self) -> None:
+        """
+        Measures Pearson's r and Manders' coefficients of two image layers
+        in each mask and stores them in a table model.
+        """
+
+        first_image = self.first_image_combobox.currentData()
+        second_image = self.second_image_combobox.currentData()
+        mask_layer = self.mask_combobox.currentData()
+
+        if first_image is None or second_image is None:
+            show_error(
+                "Please ensure an image is selected in both dropdown menus."
             )
+            return
+
+        if first_image.data.ndim > 2 or second_image.data.ndim > 2:
+            show_error("The two images must be 2D.")
+            return
+
+        if first_image.data.shape != second_image.data.shape:
+            show_error("The two images must have the same shape.")
+            return
+
+        if (
+            mask_layer is not None
+            and mask_layer.data.shape != first_image.data.shape
+        ):
+            show_error("The mask must have the same shape as the two images.")
+            return
 
-            first_selection_index = (
-                self.table_widget.table_selection_box.findText(first_name)
+        thresholds = None
+
+        if self.threshold_combobox.currentText() == "manual":
+            threshold_texts = [
+                self.first_threshold_line_edit.text(),
+                self.second_threshold_line_edit.text(),
+            ]
+
+            if not all(threshold_texts):
+                show_error("Please enter a threshold for both images.")
+                return
+
+            try:
+                thresholds = tuple(float(text) for text in threshold_texts)
+            except ValueError:
+                show_error("Please enter a number for both thresholds.")
+                return
+
+        # Images are read tile by tile in the task instead of copied, so
+        # that they may be larger than memory.
+        first_data = first_image.data
+        second_data = second_image.data
+        mask_data = None if mask_layer is None else mask_layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> dict:
+            return intensity_colocalization(
+                first=first_data,
+                second=second_data,
+                masks=mask_data,
+                thresholds=thresholds,
+                progress=progress,
             )
 
-        if second_selection_index == -1:
-            (
-                self.table_widget.table_selection_box.addItem(
-                    second_name, userData=second_puncta.unique_id
-                )
+        def store_intensity_coloc(coefficients: dict) -> None:
+            self.store_tables(
+                puncta_layers=[first_image, second_image],
+                tables={self.table_widget.intensity_table_view: coefficients},
             )
 
-        self.table_widget.table_selection_box.setCurrentIndex(0)
-        self.table_widget.table_selection_box.setCurrentIndex(
-            first_selection_index
+        self.task_runner.run(
+            task=task,
+            on_returned=store_intensity_coloc,
+            button=self.compute_button,
+        )
+
+    def iou_scores(
+        self,
+        first_data: np.ndarray,
+        second_data: np.ndarray,
+        mask_data: np.ndarray | None,
+        progress: ProgressCallback | None = None,
+    ) -> dict:
+        """
+        Computes the intersection over union of the puncta of two labels
+        layers, in each mask or over the whole image.
+
+        Parameters
+        ----------
+        first_data: np.ndarray
+            Array of the first puncta labels layer.
+
+        second_data: np.ndarray
+            Array of the second puncta labels layer.
+
+        mask_data: np.ndarray | None
+            Array of a masks label layer. None computes a single score
+            under -1.
+
+        progress: ProgressCallback | None
+            Called before computing.
+
+        Returns
+        -------
+        dict
+            IoU of each mask, rounded to 4 decimals.
+        """
+
+        if progress is not None:
+            progress(0, "Computing IoU")
+
+        return iou_per_mask(
+            first=first_data, second=second_data, masks=mask_data
         )
-        self.viewer.layers.selection.active = first_puncta
+
+    def store_iou(
+        self,
+        first_puncta: "layers.Labels",
+        second_puncta: "layers.Labels",
+        iou_scores: dict,
+    ) -> None:
+        """
+        Stores the IoU scores of two labels layers in the IoU table and
+        shows them.
+        """
+
+        self.store_group_data(
+            dict_model=self.table_widget.iou_table_view.dict_model,
+            puncta_layers=[first_puncta, second_puncta],
+            data=iou_scores,
+        )
+        self.show_layers(puncta_layers=[first_puncta, second_puncta])
+
+    def store_tables(
+        self,
+        puncta_layers: list["layers.Labels"],
+        tables: dict[TableView, dict],
+    ) -> None:
+        """
+        Stores tables of a group of labels layers in their table views and
+        shows them.
+        """
+
+        for table_view, data in tables.items():
+            self.store_group_data(
+                dict_model=table_view.dict_model,
+                puncta_layers=puncta_layers,
+                data=data,
+            )
+
+        self.show_layers(puncta_layers=puncta_layers)
+
+    def store_group_data(
+        self,
+        dict_model: DictionaryModel,
+        puncta_layers: list["layers.Labels"],
+        data: dict,
+    ) -> None:
+        """
+        Stores data of a group of labels layers, e.g. a pair, in a table
+        model, replacing the data of earlier groups with any of the layers.
+        """
+
+        group_uuids = tuple(
+            sorted(puncta.unique_id for puncta in puncta_layers)
+        )
+        layer_names = [
+            puncta.name.removesuffix("_puncta") for puncta in puncta_layers
+        ]
+
+        names_to_delete = []
+        uuid_groups_to_delete = set()
+
+        for name, old_uuids in dict_model.names_to_uuids.items():
+            if any(uuid in old_uuids for uuid in group_uuids):
+                names_to_delete.append(name)
+                uuid_groups_to_delete.add(old_uuids)
+
+        for name in names_to_delete:
+            del dict_model.names_to_uuids[name]
+
+        for uuid_group in uuid_groups_to_delete:
+            dict_model.data_dict.pop(uuid_group, None)
+
+        for name in layer_names:
+            dict_model.names_to_uuids[name] = group_uuids
+
+        dict_model.data_dict[group_uuids] = {
+            "name": tuple(sorted(layer_names)),
+            "data": data,
+        }
+
+    def show_layers(self, puncta_layers: list["layers.Labels"]) -> None:
+        """
+        Adds labels layers to the table selection and shows the tables of
+        the first one.
+        """
+
+        selection_box = self.table_widget.table_selection_box
+
+        if not self.table_widget.save_initialized:
+            self.table_widget.initialize_table_settings()
+
+        for puncta in puncta_layers:
+            name = puncta.name.removesuffix("_puncta")
+
+            if selection_box.findText(name) == -1:
+                selection_box.addItem(name, userData=puncta.unique_id)
+
+        first_selection_index = selection_box.findText(
+            puncta_layers[0].name.removesuffix("_puncta")
+        )
+
+        selection_box.setCurrentIndex(0)
+        selection_box.setCurrentIndex(first_selection_index)
+        self.viewer.layers.selection.active = puncta_layers[0]
 
     def _init_widget(self) -> None:
         main_layout = QVBoxLayout()
@@ -171,22 +589,197 @@ class ColocalizationWidget(QWidget):
             combobox=self.mask_combobox, filter_fn=None
         )
 
+        method_label = QLabel("Method")
+        self.method_combobox = QComboBox()
+        self.method_combobox.addItems(COLOCALIZATION_METHODS)
+        self.method_combobox.currentIndexChanged.connect(
+            self._update_parameters
+        )
+
         self.form_layout = QFormLayout()
 
-        iou_button = QPushButton("Compute IoU")
-        iou_button.setObjectName("iou_button")
-        iou_button.clicked.connect(self.get_iou)
-
-        main_layout.addWidget(first_label)
-        main_layout.addWidget(self.first_combobox)
-        main_layout.addWidget(second_label)
-        main_layout.addWidget(self.second_combobox)
-        main_layout.addWidget(mask_label)
-        main_layout.addWidget(self.mask_combobox)
-        main_layout.addWidget(iou_button)
+        matching_label = QLabel("matching")
+        self.matching_combobox = QComboBox()
+        self.matching_combobox.addItems(MATCHING_METHODS)
+
+        min_iou_label = QLabel("min_iou")
+        self.min_iou_line_edit = QLineEdit()
+        self.min_iou_line_edit.setValidator(QDoubleValidator(0.0, 1.0, 4))
+        self.min_iou_line_edit.setText("0.0")
+
+        self.form_layout.addRow(matching_label, self.matching_combobox)
+        self.form_layout.addRow(min_iou_label, self.min_iou_line_edit)
+
+        # Parameters of the object overlap method, shown when it is selected.
+        self.object_parameters = QWidget()
+        self.object_parameters.setLayout(self.form_layout)
+        self.object_parameters.setContentsMargins(0, 0, 0, 0)
+        self.form_layout.setContentsMargins(0, 0, 0, 0)
+
+        distance_form_layout = QFormLayout()
+        radii_label = QLabel("radii")
+        self.radii_line_edit = QLineEdit()
+        self.radii_line_edit.setText("1, 2, 3, 5, 8")
+        self.radii_line_edit.setToolTip(
+            "Comma-separated distances in pixels at which puncta count as "
+            "colocalized."
+        )
+        distance_form_layout.addRow(radii_label, self.radii_line_edit)
+        distance_form_layout.setContentsMargins(0, 0, 0, 0)
+
+        # Parameters of the centroid distance method.
+        self.distance_parameters = QWidget()
+        self.distance_parameters.setLayout(distance_form_layout)
+        self.distance_parameters.setContentsMargins(0, 0, 0, 0)
+
+        layers_label = QLabel("Select annotated layers")
+        self.layers_list = QListWidget()
+        self.layers_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.layers_list.setMaximumHeight(100)
+        self.colocalization_cbox_manager.register_list_widget(
+            list_widget=self.layers_list, filter_fn=label_only_filter
+        )
+
+        # The all pairs method takes its layers from the list instead of the
+        # first and second dropdown menus.
+        pairwise_layout = QVBoxLayout()
+        pairwise_layout.addWidget(layers_label)
+        pairwise_layout.addWidget(self.layers_list)
+        pairwise_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.pairwise_parameters = QWidget()
+        self.pairwise_parameters.setLayout(pairwise_layout)
+        self.pairwise_parameters.setContentsMargins(0, 0, 0, 0)
+        self.pair_selectors = [
+            first_label,
+            self.first_combobox,
+            second_label,
+            self.second_combobox,
+        ]
+
+        first_image_label = QLabel("Select first image layer")
+        second_image_label = QLabel("Select second image layer")
+        self.first_image_combobox = QComboBox()
+        self.second_image_combobox = QComboBox()
+
+        def image_only_filter(layer: "layers.Layer") -> bool:
+            return type(layer).__name__ == "Image"
+
+        self.colocalization_cbox_manager.register_combobox(
+            combobox=self.first_image_combobox, filter_fn=image_only_filter
+        )
+        self.colocalization_cbox_manager.register_combobox(
+            combobox=self.second_image_combobox, filter_fn=image_only_filter
+        )
+
+        intensity_form_layout = QFormLayout()
+        threshold_label = QLabel("thresholds")
+        self.threshold_combobox = QComboBox()
+        self.threshold_combobox.addItems(THRESHOLD_METHODS)
+        self.threshold_combobox.setToolTip(
+            "costes picks the thresholds of each mask automatically."
+        )
+        self.threshold_combobox.currentIndexChanged.connect(
+            self._update_parameters
+        )
+
+        first_threshold_label = QLabel("first_threshold")
+        self.first_threshold_line_edit = QLineEdit()
+        self.first_threshold_line_edit.setValidator(QDoubleValidator())
+        self.first_threshold_line_edit.setText("0")
+
+        second_threshold_label = QLabel("second_threshold")
+        self.second_threshold_line_edit = QLineEdit()
+        self.second_threshold_line_edit.setValidator(QDoubleValidator())
+        self.second_threshold_line_edit.setText("0")
+
+        intensity_form_layout.addRow(threshold_label, self.threshold_combobox)
+        intensity_form_layout.addRow(
+            first_threshold_label, self.first_threshold_line_edit
+        )
+        intensity_form_layout.addRow(
+            second_threshold_label, self.second_threshold_line_edit
+        )
+        intensity_form_layout.setContentsMargins(0, 0, 0, 0)
+
+        # The intensity correlation method compares image layers instead of
+        # labels layers.
+        intensity_layout = QVBoxLayout()
+        intensity_layout.addWidget(first_image_label)
+        intensity_layout.addWidget(self.first_image_combobox)
+        intensity_layout.addWidget(second_image_label)
+        intensity_layout.addWidget(self.second_image_combobox)
+        intensity_layout.addLayout(intensity_form_layout)
+        intensity_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.intensity_parameters = QWidget()
+        self.intensity_parameters.setLayout(intensity_layout)
+        self.intensity_parameters.setContentsMargins(0, 0, 0, 0)
+
+        self.compute_button = QPushButton("Compute colocalization")
+        # The object name predates the other colocalization methods.
+        self.compute_button.setObjectName("iou_button")
+        self.compute_button.clicked.connect(self.compute_colocalization)
+
+        self.task_runner = TaskRunner()
+
+        options_layout = QVBoxLayout()
+        options_layout.addWidget(first_label)
+        options_layout.addWidget(self.first_combobox)
+        options_layout.addWidget(second_label)
+        options_layout.addWidget(self.second_combobox)
+        options_layout.addWidget(mask_label)
+        options_layout.addWidget(self.mask_combobox)
+        options_layout.addWidget(method_label)
+        options_layout.addWidget(self.method_combobox)
+        options_layout.addWidget(self.object_parameters)
+        options_layout.addWidget(self.distance_parameters)
+        options_layout.addWidget(self.pairwise_parameters)
+        options_layout.addWidget(self.intensity_parameters)
+        options_layout.addStretch()
+        options_layout.setSpacing(7)
+        options_layout.setContentsMargins(0, 0, 0, 0)
+
+        options_widget = QWidget()
+        options_widget.setLayout(options_layout)
+
+        # The options of some methods are taller than the tab, so they
+        # scroll while the compute button stays in view.
+        self.options_scroll_area = QScrollArea()
+        self.options_scroll_area.setWidget(options_widget)
+        self.options_scroll_area.setWidgetResizable(True)
+        self.options_scroll_area.setFrameShape(QFrame.Shape.NoFrame)
+        self.options_scroll_area.setHorizontalScrollBarPolicy(
+            Qt.ScrollBarPolicy.ScrollBarAlwaysOff
+        )
+
+        main_layout.addWidget(self.options_scroll_area, stretch=1)
+        main_layout.addWidget(self.compute_button)
+        main_layout.addWidget(self.task_runner)
         main_layout.setSpacing(7)
         main_layout.setContentsMargins(7, 5, 7, 5)
         self.setLayout(main_layout)
 
-        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        self.setMaximumHeight(200)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        self._update_parameters()
+
+    def _update_parameters(self) -> None:
+        """
+        Shows the parameters of the selected colocalization method.
+        """
+
+        method = self.method_combobox.currentText()
+        self.object_parameters.setVisible(method == "Object overlap")
+        self.distance_parameters.setVisible(method == "Centroid distance")
+        self.pairwise_parameters.setVisible(method == "All pairs IoU")
+        self.intensity_parameters.setVisible(method == "Intensity correlation")
+
+        for selector in self.pair_selectors:
+            selector.setVisible(
+                method not in ("All pairs IoU", "Intensity correlation")
+            )
+
+        manual = self.threshold_combobox.currentText() == "manual"
+        self.first_threshold_line_edit.setEnabled(manual)
+        self.second_threshold_line_edit.setEnabled(manual)
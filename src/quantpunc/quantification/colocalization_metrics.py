@@ -0,0 +1,357 @@
+import numpy as np
+
+from quantpunc.quantification.progress import ProgressCallback
+
+
+def mask_index(masks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maps every pixel to an index of its mask, so that per-mask sums are a
+    single bincount. Non-negative integer masks are used as indices
+    directly, and other masks are mapped through their unique values.
+
+    Parameters
+    ----------
+    masks: np.ndarray
+        Array of a masks label layer.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Flat index of each pixel's mask, and the mask value of each index.
+    """
+
+    flat_masks = masks.reshape(-1)
+
+    if (
+        np.issubdtype(flat_masks.dtype, np.integer)
+        and flat_masks.size
+        and flat_masks.min() >= 0
+        and flat_masks.max() <= 4 * flat_masks.size + 1024
+    ):
+        return flat_masks.astype(np.intp, copy=False), np.arange(
+            int(flat_masks.max()) + 1
+        )
+
+    mask_values, index = np.unique(flat_masks, return_inverse=True)
+
+    return index.reshape(-1), mask_values
+
+
+def iou_per_mask(
+    first: np.ndarray, second: np.ndarray, masks: np.ndarray | None
+) -> dict:
+    """
+    Computes the intersection over union of the foreground of two labels
+    arrays in every mask at once. Intersection and union are computed once
+    over the image and summed per mask with one bincount each, so the cost
+    does not grow with the number of masks.
+
+    Parameters
+    ----------
+    first: np.ndarray
+        Array of the first puncta labels layer.
+
+    second: np.ndarray
+        Array of the second puncta labels layer.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None computes a single score under
+        -1.
+
+    Returns
+    -------
+    dict
+        IoU of each nonzero mask rounded to 4 decimals, 0 where the union
+        is empty.
+    """
+
+    first_nonzero = first > 0
+    second_nonzero = second > 0
+    intersection = first_nonzero & second_nonzero
+    union = first_nonzero | second_nonzero
+
+    if masks is None:
+        intersection_sums = np.array([intersection.sum()])
+        union_sums = np.array([union.sum()])
+        mask_values = np.array([-1])
+    else:
+        index, mask_values = mask_index(masks)
+        n_masks = len(mask_values)
+        intersection_sums = np.bincount(
+            index[intersection.reshape(-1)], minlength=n_masks
+        )
+        union_sums = np.bincount(index[union.reshape(-1)], minlength=n_masks)
+
+        present = np.zeros(n_masks, dtype=bool)
+        present[index] = True
+        present &= mask_values != 0
+
+        mask_values = mask_values[present]
+        intersection_sums = intersection_sums[present]
+        union_sums = union_sums[present]
+
+    return {
+        mask_val: 0 if union == 0 else round(intersection / union, 4)
+        for mask_val, intersection, union in zip(
+            mask_values.tolist(),
+            intersection_sums.tolist(),
+            union_sums.tolist(),
+            strict=True,
+        )
+    }
+
+
+# Number of set bits of every byte, for numpy versions without
+# np.bitwise_count.
+_BYTE_POPCOUNTS = np.unpackbits(
+    np.arange(256, dtype=np.uint8)[:, None], axis=1
+).sum(axis=1)
+
+# Pixels gathered and packed at a time. A multiple of 64, so that every
+# chunk fills whole words.
+_CHUNK_SIZE = 2**14
+
+
+def word_popcounts(words: np.ndarray) -> np.ndarray:
+    """
+    Counts the set bits of each 64-bit word of a bitset.
+    """
+
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+
+    byte_counts = _BYTE_POPCOUNTS[words.view(np.uint8)]
+
+    return byte_counts.reshape(-1, 8).sum(axis=1)
+
+
+def prefix_popcounts(words: np.ndarray, bits: np.ndarray) -> np.ndarray:
+    """
+    Counts the set bits of a bitset before each of several bit positions.
+    Bit i of the bitset is bit i % 64 of word i // 64.
+
+    Parameters
+    ----------
+    words: np.ndarray
+        Bitset as an array of little-endian 64-bit words.
+
+    bits: np.ndarray
+        Bit positions, at most 64 times the number of words.
+
+    Returns
+    -------
+    np.ndarray
+        Number of set bits before each position.
+    """
+
+    if len(words) == 0:
+        return np.zeros(len(bits), dtype=np.int64)
+
+    cumulative = np.r_[0, np.cumsum(word_popcounts(words), dtype=np.int64)]
+    word_index = bits // 64
+    # Bits of the word a position falls in that come before it. A position
+    # past the last word has none, so it may read any word.
+    low_bits = np.left_shift(
+        np.uint64(1), (bits % 64).astype(np.uint64)
+    ) - np.uint64(1)
+    partial_words = words[np.minimum(word_index, len(words) - 1)] & low_bits
+
+    return cumulative[word_index] + word_popcounts(partial_words)
+
+
+class PackedForegrounds:
+    """
+    Foregrounds of several labels arrays packed into bitsets with one bit
+    per pixel. Pixels are ordered by mask, so the pixels of a mask in two
+    layers are one segment of their bitsets, which are intersected a word
+    at a time and counted per segment.
+
+    Only the order of the pixels is stored, as a single array of 32-bit
+    indices for images below 2**31 pixels, and labels arrays and masks are
+    read in chunks, so that packing needs far less memory than the
+    foregrounds themselves.
+    """
+
+    def __init__(self, masks: np.ndarray | None, shape: tuple[int, ...]):
+        """
+        Parameters
+        ----------
+        masks: np.ndarray | None
+            Array of a masks label layer. None packs the whole image as a
+            single mask, -1.
+
+        shape: tuple[int, ...]
+            Shape of the labels arrays.
+        """
+
+        n_pixels = int(np.prod(shape))
+
+        if masks is None:
+            self.mask_values = np.array([-1])
+            self.segment_bits = np.array([0, n_pixels])
+            self.order = None
+            return
+
+        flat_masks = masks.reshape(-1)
+        chunk_starts = range(0, n_pixels, _CHUNK_SIZE)
+
+        def mask_chunk(start: int) -> np.ndarray:
+            return flat_masks[start : start + _CHUNK_SIZE]
+
+        mask_values = np.unique(
+            np.concatenate(
+                [np.unique(mask_chunk(start)) for start in chunk_starts]
+                or [flat_masks[:0]]
+            )
+        )
+        pixel_counts = np.zeros(len(mask_values), dtype=np.int64)
+
+        for start in chunk_starts:
+            pixel_counts += np.bincount(
+                np.searchsorted(mask_values, mask_chunk(start)),
+                minlength=len(mask_values),
+            )
+
+        kept = mask_values != 0
+        self.mask_values = mask_values[kept]
+        self.segment_bits = np.r_[0, np.cumsum(pixel_counts[kept])]
+
+        # Segment of every mask value, -1 for pixels outside every mask.
+        segments = np.full(len(mask_values), -1, dtype=np.intp)
+        segments[kept] = np.arange(len(self.mask_values))
+        cursors = self.segment_bits[:-1].copy()
+
+        dtype = np.int32 if n_pixels < 2**31 else np.int64
+        self.order = np.empty(int(self.segment_bits[-1]), dtype=dtype)
+
+        # A counting sort of the pixels by segment, a chunk at a time.
+        for start in chunk_starts:
+            pixel_segments = segments[
+                np.searchsorted(mask_values, mask_chunk(start))
+            ]
+            pixels = np.flatnonzero(pixel_segments >= 0)
+
+            if len(pixels) == 0:
+                continue
+
+            pixel_segments = pixel_segments[pixels]
+            chunk_order = np.argsort(pixel_segments, kind="stable")
+            sorted_segments = pixel_segments[chunk_order]
+            run_starts = np.flatnonzero(
+                np.r_[True, sorted_segments[1:] != sorted_segments[:-1]]
+            )
+            run_lengths = np.diff(np.r_[run_starts, len(sorted_segments)])
+            ranks = np.arange(len(sorted_segments)) - np.repeat(
+                run_starts, run_lengths
+            )
+
+            self.order[cursors[sorted_segments] + ranks] = (
+                start + pixels[chunk_order]
+            )
+            cursors[sorted_segments[run_starts]] += run_lengths
+
+    def pack(self, labels: np.ndarray) -> np.ndarray:
+        """
+        Packs the foreground of a labels array into a bitset of
+        little-endian 64-bit words.
+        """
+
+        flat_labels = labels.reshape(-1)
+        n_bits = int(self.segment_bits[-1])
+        words = np.zeros(-(-n_bits // 64), dtype="<u8")
+        word_bytes = words.view(np.uint8)
+
+        for start in range(0, n_bits, _CHUNK_SIZE):
+            if self.order is None:
+                chunk = flat_labels[start : start + _CHUNK_SIZE]
+            else:
+                chunk = flat_labels[self.order[start : start + _CHUNK_SIZE]]
+
+            packed = np.packbits(chunk > 0, bitorder="little")
+            word_bytes[start // 8 : start // 8 + len(packed)] = packed
+
+        return words
+
+    def popcounts(self, words: np.ndarray) -> np.ndarray:
+        """
+        Counts the foreground pixels of each mask in a bitset.
+        """
+
+        return np.diff(prefix_popcounts(words=words, bits=self.segment_bits))
+
+
+def pairwise_iou_per_mask(
+    layers: dict[str, np.ndarray],
+    masks: np.ndarray | None,
+    progress: ProgressCallback | None = None,
+) -> dict[tuple, tuple]:
+    """
+    Computes the intersection over union of the foregrounds of every pair
+    of several labels arrays in every mask. Each foreground is packed into
+    a bitset once, and a pair then only needs a bitwise and and a popcount
+    per mask, since the union follows from the intersection and the
+    foreground of each layer. The arrays are read but never copied.
+
+    Parameters
+    ----------
+    layers: dict[str, np.ndarray]
+        Arrays of the puncta labels layers, keyed by their names.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None computes one score per pair
+        under -1.
+
+    progress: ProgressCallback | None
+        Called before each layer is packed and each pair is compared.
+
+    Returns
+    -------
+    dict[tuple, tuple]
+        Intersection, union and IoU, rounded to 4 decimals and 0 where the
+        union is empty, keyed by mask and the names of the two layers.
+        Layers are paired in the order they are given.
+    """
+
+    names = list(layers)
+    n_steps = len(names) + len(names) * (len(names) - 1) // 2
+    step = 0
+    packer = PackedForegrounds(
+        masks=masks, shape=next(iter(layers.values())).shape
+    )
+
+    packed = {}
+    foreground_counts = {}
+
+    for name in names:
+        if progress is not None:
+            progress(step / n_steps, "Packing layers")
+
+        packed[name] = packer.pack(layers[name])
+        foreground_counts[name] = packer.popcounts(packed[name])
+        step += 1
+
+    scores = {}
+
+    for i, first in enumerate(names):
+        for second in names[i + 1 :]:
+            if progress is not None:
+                progress(step / n_steps, "Comparing layers")
+
+            intersections = packer.popcounts(packed[first] & packed[second])
+            unions = (
+                foreground_counts[first]
+                + foreground_counts[second]
+                - intersections
+            )
+            step += 1
+
+            for mask_val, intersection, union in zip(
+                packer.mask_values.tolist(),
+                intersections.tolist(),
+                unions.tolist(),
+                strict=True,
+            ):
+                iou = 0 if union == 0 else round(intersection / union, 4)
+                scores[(mask_val, first, second)] = (intersection, union, iou)
+
+    return scores
@@ -1,70 +1,124 @@
+import os
+import uuid
 from collections import defaultdict
+from pathlib import Path
 from typing import TYPE_CHECKING, Callable
 
 import numpy as np
-import pandas as pd
 from napari.utils.notifications import show_error, show_info
 from qtpy.QtGui import QDoubleValidator, QIntValidator
 from qtpy.QtWidgets import (
+    QCheckBox,
     QComboBox,
+    QFileDialog,
     QFormLayout,
     QGridLayout,
+    QHBoxLayout,
     QLabel,
     QLayout,
     QLineEdit,
     QPushButton,
     QWidget,
 )
-from skimage import (
-    exposure,
-    filters,
-)
-from skimage.draw import disk
+from skimage import exposure
 from skimage.exposure import equalize_adapthist
-from skimage.feature import (
-    blob_dog,
-    blob_doh,
-    blob_log,
-    hessian_matrix,
-    hessian_matrix_eigvals,
-)
 from skimage.restoration import denoise_wavelet
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.pipeline import Pipeline, make_pipeline
-from sklearn.preprocessing import StandardScaler
+from sklearn.base import clone
+from sklearn.inspection import permutation_importance
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 
 from quantpunc.combobox_manager import ComboBoxManager
 from quantpunc.quantification.abstract_puncta_labeler import (
     AbstractPunctaLabeler,
 )
+from quantpunc.quantification.blob_detection import (
+    blob_table,
+    detect_blobs,
+    ordered_map,
+    sweep_blobs,
+)
+from quantpunc.quantification.classifiers import (
+    CLASSIFIER_REGISTRY,
+    compare_classifiers,
+    make_classifier_pipeline,
+    register_default_classifiers,
+    single_threaded,
+    supports_warm_start,
+)
+from quantpunc.quantification.feature_bank import (
+    FEATURE_FAMILIES,
+    FeatureBank,
+)
+from quantpunc.quantification.feature_cache import (
+    FEATURE_CACHE,
+    PROBABILITY_CACHE,
+    feature_key,
+)
+from quantpunc.quantification.model_io import load_pipeline, save_pipeline
+from quantpunc.quantification.probability_map import (
+    probability_dtype_for_budget,
+    probability_for_display,
+    quantize_probability,
+    threshold_probability,
+)
+from quantpunc.quantification.progress import (
+    CancelToken,
+    ProgressCallback,
+    stage_progress,
+    sub_progress,
+)
+from quantpunc.quantification.rasterize import rasterize_disks
+from quantpunc.quantification.sampling import SAMPLING_MODES, balanced_sample
+from quantpunc.quantification.tiling import (
+    iter_tiles,
+    tile_count,
+    tile_size_for_budget,
+)
 
 if TYPE_CHECKING:
     from napari import Viewer, layers
 
     from quantpunc.quantification.puncta_analyzer import PunctaAnalyzer
 
+register_default_classifiers()
+
 
 class SkimageBlobLabeler(AbstractPunctaLabeler):
     def __init__(
         self,
         viewer: "Viewer",
         puncta_analyzer: "PunctaAnalyzer",
-        labeling_method: Callable,
+        method: str,
         parameters: dict[str, int | float],
     ):
         self.viewer = viewer
         self.puncta_analyzer = puncta_analyzer
-        self.labeling_method = labeling_method
+        self.method = method
         self.parameters = parameters
         self.param_widgets: dict[str, QWidget] = defaultdict(QWidget)
+        self.blob_table: dict[str, np.ndarray] | None = None
 
     def label_puncta(
-        self, image: np.ndarray, masks: np.ndarray | None, label_intensity: int
+        self,
+        image: np.ndarray,
+        masks: np.ndarray | None,
+        label_intensity: int,
+        progress: ProgressCallback | None = None,
+        cancel_token: CancelToken | None = None,
+        parameters: dict[str, int | float] | None = None,
+        instance_ids: bool = False,
+        memory_budget_mb: int | None = None,
     ) -> np.ndarray:
         """
         Produces the array for a puncta labels layer using one of
         skimage's blob detection algorithms and adds it to the viewer's layer
-        list.
+        list. The scale space of the image is cached, so changing only
+        threshold or overlap does not recompute it. In tiled mode, the
+        image is processed in tiles that fit in the memory budget instead.
+
+        With instance IDs, each punctum gets its own label and a table of
+        the blobs is kept for the labels layer's metadata.
 
         Parameters
         ----------
@@ -78,41 +132,76 @@ class SkimageBlobLabeler(AbstractPunctaLabeler):
         label_intensity: int
             The color of the puncta labels.
 
+        progress: ProgressCallback | None
+            Called after each scale, or each tile in tiled mode.
+
+        cancel_token: CancelToken | None
+            Stops labeling with TaskCancelled at the next scale or tile once
+            cancelled.
+
+        parameters: dict[str, int | float] | None
+            Parameters of the blob detection algorithm. None uses the
+            defaults of the labeler.
+
+        instance_ids: bool
+            Gives every punctum its own label.
+
+        memory_budget_mb: int | None
+            Memory budget of tiled mode. None processes the whole image at
+            once.
+
         Returns
         -------
         np.ndarray
             Array of a puncta labels layer.
         """
 
-        blob_method_parameters = {
-            param_name: self.cast_to_numericals(line_edit.text())
-            for param_name, line_edit in self.param_widgets.items()
-        }
-
-        blob_coords = self.labeling_method(
-            image=image, **blob_method_parameters
-        )
-
-        if masks is not None:
-            spatial_coords = blob_coords[:, :-1].astype(np.uint16)
-            sizes = blob_coords[:, -1]
+        report = stage_progress(progress=progress, cancel_token=cancel_token)
 
-            mask_labels = masks[tuple(spatial_coords.T)]
-            matching_results = np.column_stack(
-                (spatial_coords, sizes, mask_labels)
-            )
-            matching_results = matching_results[matching_results[:, -1] != 0]
+        if parameters is None:
+            parameters = self.parameters
 
-            blob_coords = matching_results[:, :-1]
+        blob_coords = detect_blobs(
+            image=image,
+            method=self.method,
+            memory_budget_mb=memory_budget_mb,
+            progress=sub_progress(progress=report, start=0, stop=0.9),
+            **parameters,
+        )
+        report(0.9, "Drawing labels")
+        blob_coords = self.filter_by_masks(
+            blob_coords=blob_coords, masks=masks
+        )
 
         blob_labels = self.create_labels_from_coords(
             img_shape=image.shape,
             points=blob_coords,
             label_intensity=label_intensity,
+            instance_ids=instance_ids,
         )
 
+        self.blob_table = None
+
+        if instance_ids and blob_labels.size != 0:
+            self.blob_table = blob_table(
+                blobs=blob_coords, labels=blob_labels, masks=masks
+            )
+
         return blob_labels
 
+    def labeling_parameters(self) -> dict:
+        return {
+            "parameters": self.blob_parameters(),
+            "instance_ids": self.instance_ids_checkbox.isChecked(),
+            "memory_budget_mb": self.tiled_memory_budget(),
+        }
+
+    def layer_metadata(self) -> dict:
+        if self.blob_table is None:
+            return {}
+
+        return {"blob_table": self.blob_table}
+
     def initialize_widgets(self) -> QLayout:
         form_layout = QFormLayout()
 
@@ -137,16 +226,182 @@ class SkimageBlobLabeler(AbstractPunctaLabeler):
             form_layout.addRow(label, line_edit)
             self.param_widgets[param] = line_edit
 
+        self.instance_ids_checkbox = QCheckBox("Label each punctum separately")
+        self.instance_ids_checkbox.setToolTip(
+            "Give every punctum its own label so that touching puncta are "
+            "counted separately and counting skips relabelling."
+        )
+        form_layout.addRow(self.instance_ids_checkbox)
+
+        self.tiled_checkbox = QCheckBox("Process in tiles")
+        self.tiled_checkbox.setToolTip(
+            "Detect puncta tile by tile so that large images fit in memory."
+        )
+        form_layout.addRow(self.tiled_checkbox)
+
+        memory_budget_label = QLabel("memory_budget_mb")
+        self.memory_budget_line_edit = QLineEdit()
+        self.memory_budget_line_edit.setValidator(QIntValidator(1, 2**20))
+        self.memory_budget_line_edit.setText("2048")
+        form_layout.addRow(memory_budget_label, self.memory_budget_line_edit)
+
+        sweep_label = QLabel("sweep_thresholds")
+        self.sweep_line_edit = QLineEdit()
+        self.sweep_line_edit.setText("0.005, 0.01, 0.02, 0.05")
+        self.sweep_line_edit.setToolTip(
+            "Comma-separated thresholds at which puncta are counted."
+        )
+        form_layout.addRow(sweep_label, self.sweep_line_edit)
+
+        self.sweep_button = QPushButton("Sweep thresholds")
+        self.sweep_button.setObjectName("sweep_button")
+        self.sweep_button.clicked.connect(self.sweep_thresholds)
+        form_layout.addRow(self.sweep_button)
+
         form_layout.setSpacing(5)
 
         return form_layout
 
+    def tiled_memory_budget(self) -> int | None:
+        if not self.tiled_checkbox.isChecked():
+            return None
+
+        try:
+            return int(self.memory_budget_line_edit.text())
+        except ValueError:
+            raise ValueError(
+                "Please enter a whole number for memory_budget_mb."
+            ) from None
+
+    def blob_parameters(self) -> dict[str, int | float]:
+        return {
+            param_name: self.cast_to_numericals(line_edit.text())
+            for param_name, line_edit in self.param_widgets.items()
+        }
+
+    def filter_by_masks(
+        self, blob_coords: np.ndarray, masks: np.ndarray | None
+    ) -> np.ndarray:
+        """
+        Keeps the blobs whose center lies inside a mask.
+
+        Parameters
+        ----------
+        blob_coords: np.ndarray
+            Coordinates and sizes of the blobs.
+
+        masks: np.ndarray | None
+            Array of a masks label layer. None keeps every blob.
+
+        Returns
+        -------
+        np.ndarray
+            Coordinates and sizes of the kept blobs.
+        """
+
+        if masks is None:
+            return blob_coords
+
+        spatial_coords = blob_coords[:, :-1].astype(np.uint16)
+        sizes = blob_coords[:, -1]
+
+        mask_labels = masks[tuple(spatial_coords.T)]
+        matching_results = np.column_stack(
+            (spatial_coords, sizes, mask_labels)
+        )
+        matching_results = matching_results[matching_results[:, -1] != 0]
+
+        return matching_results[:, :-1]
+
+    def sweep_thresholds(self) -> None:
+        """
+        Counts the puncta found at each threshold in sweep_thresholds from
+        a single scale space and reports the counts.
+        """
+
+        layer = self.puncta_analyzer.img_combobox.currentData()
+
+        if layer is None or layer.data.ndim > 2:
+            show_error("Please select a 2D image layer.")
+            return
+
+        mask_layer = self.puncta_analyzer.mask_combobox.currentData()
+        masks = None
+
+        if mask_layer is not None and mask_layer.data.ndim == 2:
+            masks = mask_layer.data.astype(np.uint16)
+
+        try:
+            thresholds = [
+                float(threshold)
+                for threshold in self.sweep_line_edit.text().split(",")
+                if threshold.strip()
+            ]
+        except ValueError:
+            show_error("Thresholds must be comma-separated numbers.")
+            return
+
+        if not thresholds:
+            show_error("Please provide at least one threshold.")
+            return
+
+        try:
+            parameters = self.blob_parameters()
+            memory_budget_mb = self.tiled_memory_budget()
+        except ValueError as err:
+            show_error(str(err))
+            return
+
+        parameters.pop("threshold", None)
+        image = layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> dict[float, int]:
+            report = stage_progress(
+                progress=progress, cancel_token=cancel_token
+            )
+            blobs_per_threshold = sweep_blobs(
+                image=image,
+                method=self.method,
+                thresholds=thresholds,
+                memory_budget_mb=memory_budget_mb,
+                progress=sub_progress(progress=report, start=0, stop=0.9),
+                **parameters,
+            )
+            report(0.9, "Counting puncta")
+
+            return {
+                threshold: len(
+                    self.filter_by_masks(blob_coords=blobs, masks=masks)
+                )
+                for threshold, blobs in blobs_per_threshold.items()
+            }
+
+        def report_counts(counts: dict[float, int]) -> None:
+            show_info(
+                "Puncta per threshold:\n"
+                + "\n".join(
+                    f"{threshold:g}: {count}"
+                    for threshold, count in counts.items()
+                )
+            )
+
+        self.puncta_analyzer.task_runner.run(
+            task=task, on_returned=report_counts, button=self.sweep_button
+        )
+
     def create_labels_from_coords(
-        self, img_shape: tuple, points: np.ndarray, label_intensity: int
+        self,
+        img_shape: tuple,
+        points: np.ndarray,
+        label_intensity: int,
+        instance_ids: bool = False,
     ) -> np.ndarray:
         """
         Creates an array for the puncta labels layer from the coordinates of
-        skimage's blob detection algorithm.
+        skimage's blob detection algorithm. All disks are rasterized in one
+        batch, pixel for pixel like skimage.draw.disk.
 
         Parameters
         ----------
@@ -160,30 +415,26 @@ class SkimageBlobLabeler(AbstractPunctaLabeler):
         label_intensity: int
             User-specified color of the puncta labels.
 
+        instance_ids: bool
+            Labels each punctum with its row in points plus one instead of
+            label_intensity.
+
         Returns
         -------
         np.ndarray
             Array of a puncta labels layer.
         """
 
-        y_coords = []
-        x_coords = []
-
-        for point in points:
-            y, x = disk(center=point[:-1], radius=point[-1], shape=img_shape)
-            y_coords.append(y)
-            x_coords.append(x)
-
-        if len(x_coords) == 0:
+        if len(points) == 0:
             return np.array([])
 
-        y_coords = np.concatenate(y_coords, axis=0)
-        x_coords = np.concatenate(x_coords, axis=0)
-
-        labels = np.zeros(shape=img_shape, dtype=np.uint16)
-        labels[y_coords, x_coords] = label_intensity
-
-        return labels
+        return rasterize_disks(
+            shape=img_shape,
+            centers=points[:, :-1],
+            radii=points[:, -1],
+            label_value=label_intensity,
+            instance_ids=instance_ids,
+        )
 
     def cast_to_numericals(self, parameter: str) -> int | float:
         parameter = parameter.strip()
@@ -201,13 +452,14 @@ class BlobDoGLabeler(SkimageBlobLabeler):
         super().__init__(
             viewer=viewer,
             puncta_analyzer=puncta_analyzer,
-            labeling_method=blob_dog,
+            method="DoG",
             parameters={
                 "min_sigma": 5,
                 "max_sigma": 7,
                 "sigma_ratio": 1.6,
                 "threshold": 0.01,
                 "overlap": 0.5,
+                "n_workers": os.cpu_count() or 1,
             },
         )
 
@@ -217,13 +469,14 @@ class BlobDoHLabeler(SkimageBlobLabeler):
         super().__init__(
             viewer=viewer,
             puncta_analyzer=puncta_analyzer,
-            labeling_method=blob_doh,
+            method="DoH",
             parameters={
                 "min_sigma": 5,
                 "max_sigma": 7,
                 "num_sigma": 10,
                 "threshold": 0.01,
                 "overlap": 0.5,
+                "n_workers": os.cpu_count() or 1,
             },
         )
 
@@ -233,13 +486,14 @@ class BlobLoGLabeler(SkimageBlobLabeler):
         super().__init__(
             viewer=viewer,
             puncta_analyzer=puncta_analyzer,
-            labeling_method=blob_log,
+            method="LoG",
             parameters={
                 "min_sigma": 5,
                 "max_sigma": 7,
                 "num_sigma": 10,
                 "threshold": 0.01,
                 "overlap": 0.5,
+                "n_workers": os.cpu_count() or 1,
             },
         )
 
@@ -249,9 +503,38 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
         self.viewer = viewer
         self.puncta_analyzer = puncta_analyzer
         self.model: Pipeline | None = None
+        self.model_classifier: str | None = None
+        self._model_token: str | None = None
+        self.feature_bank = FeatureBank()
+        self.classifier = "Random Forest"
+        self.n_estimators = 100
+        self.max_depth: int | None = None
+        self.n_jobs = os.cpu_count() or 1
+        self.warm_start_trees = 25
+        self.max_samples_per_class = 50_000
+        self.probability: np.ndarray | None = None
+        self.applied_threshold: float | None = None
+        self.sampling_mode = "spatial"
+        self.sampling_seed = 0
+
+        self._training_key: str | None = None
+        self._annotation_snapshot: np.ndarray | None = None
+        self._train_indices = np.empty(0, dtype=np.intp)
+        self._train_feature_names: list[str] = []
+        self._train_features: np.ndarray | None = None
+        self._train_labels: np.ndarray | None = None
 
     def label_puncta(
-        self, image: np.ndarray, masks: np.ndarray | None, label_intensity: int
+        self,
+        image: np.ndarray,
+        masks: np.ndarray | None,
+        label_intensity: int,
+        progress: ProgressCallback | None = None,
+        cancel_token: CancelToken | None = None,
+        puncta_label: int = 1,
+        threshold: float = 0.5,
+        memory_budget_mb: int = 2048,
+        n_workers: int = 1,
     ) -> np.ndarray:
         """
         Produces the array for a puncta labels layer using a random forest
@@ -269,28 +552,80 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
         label_intensity: int
             The color of the puncta labels.
 
+        progress: ProgressCallback | None
+            Called after each tile is classified.
+
+        cancel_token: CancelToken | None
+            Stops labeling with TaskCancelled at the next tile once
+            cancelled.
+
+        puncta_label: int
+            Annotation label whose probability is thresholded.
+
+        threshold: float
+            Probability above which a pixel is labeled as a punctum.
+
+        memory_budget_mb: int
+            Memory budget of tiled prediction.
+
+        n_workers: int
+            Number of tiles classified in parallel.
+
         Returns
         -------
         np.ndarray
             Array of a puncta labels layer.
         """
 
-        if self.model is None:
-            show_error("Please train the RFC before labeling.")
-            return np.array([])
+        self.probability = None
+        report = stage_progress(progress=progress, cancel_token=cancel_token)
 
-        puncta_label_int = int(self.puncta_line_edit.text())
+        if self.model is None:
+            raise ValueError("Please train the RFC before labeling.")
+
+        probability = self.cached_probability(
+            img=image,
+            puncta_label=puncta_label,
+            memory_budget_mb=memory_budget_mb,
+            n_workers=n_workers,
+            progress=sub_progress(progress=report, start=0, stop=0.95),
+        )
+        self.probability = probability
+        report(0.95, "Thresholding")
 
-        blob_labels = self.predict(img=image)
         blob_labels = np.where(
-            blob_labels == puncta_label_int, label_intensity, 0
+            threshold_probability(probability, threshold), label_intensity, 0
         )
+        self.applied_threshold = threshold
 
         if masks is not None:
             blob_labels = np.where(masks > 0, blob_labels, 0)
 
         return blob_labels
 
+    def labeling_parameters(self) -> dict:
+        if self.model is None:
+            raise ValueError("Please train the RFC before labeling.")
+
+        self.set_feature_cache_dir()
+
+        try:
+            return {
+                "puncta_label": int(self.puncta_line_edit.text()),
+                "threshold": float(self.threshold_line_edit.text()),
+                "memory_budget_mb": int(self.memory_budget_line_edit.text()),
+                "n_workers": int(self.n_workers_line_edit.text()),
+            }
+        except ValueError:
+            raise ValueError(
+                "Please enter puncta_label, threshold, memory_budget_mb and "
+                "n_workers as numbers."
+            ) from None
+
+    def update_viewer(self) -> None:
+        if self.probability is not None:
+            self.show_probability_layer(probability=self.probability)
+
     def initialize_widgets(self) -> QLayout:
         grid_layout = QGridLayout()
 
@@ -317,9 +652,150 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
         self.background_line_edit = QLineEdit()
         self.background_line_edit.setValidator(QIntValidator())
 
-        train_button = QPushButton("Train")
-        train_button.setObjectName("train_button")
-        train_button.clicked.connect(self.train_rfc)
+        sigmas_label = QLabel("sigmas")
+        self.sigmas_line_edit = QLineEdit()
+        self.sigmas_line_edit.setToolTip(
+            "Comma-separated Gaussian scales at which features are computed."
+        )
+
+        families_layout = QGridLayout()
+        self.family_checkboxes: dict[str, QCheckBox] = {}
+
+        for i, family in enumerate(FEATURE_FAMILIES):
+            checkbox = QCheckBox(family)
+            families_layout.addWidget(checkbox, i // 3, i % 3)
+            self.family_checkboxes[family] = checkbox
+
+        self.set_feature_widgets(feature_bank=self.feature_bank)
+
+        memory_budget_label = QLabel("memory_budget_mb")
+        self.memory_budget_line_edit = QLineEdit()
+        self.memory_budget_line_edit.setValidator(QIntValidator(1, 2**20))
+        self.memory_budget_line_edit.setText("2048")
+
+        feature_cache_dir_label = QLabel("feature_cache_dir")
+        self.feature_cache_dir_line_edit = QLineEdit()
+        self.feature_cache_dir_line_edit.setToolTip(
+            "Directory that feature stacks exceeding memory_budget_mb are "
+            "written to, so they are reused instead of recomputed. Leave "
+            "empty to not cache them."
+        )
+
+        n_workers_label = QLabel("n_workers")
+        self.n_workers_line_edit = QLineEdit()
+        self.n_workers_line_edit.setValidator(QIntValidator(1, 1024))
+        self.n_workers_line_edit.setText(str(os.cpu_count() or 1))
+
+        max_samples_label = QLabel("max_samples_per_class")
+        self.max_samples_line_edit = QLineEdit()
+        self.max_samples_line_edit.setValidator(QIntValidator(0, 2**31 - 1))
+        self.max_samples_line_edit.setText(str(self.max_samples_per_class))
+        self.max_samples_line_edit.setToolTip(
+            "Cap on the annotated pixels of each class used for training. "
+            "0 uses every annotated pixel."
+        )
+
+        sampling_label = QLabel("sampling")
+        self.sampling_combobox = QComboBox()
+        self.sampling_combobox.addItems(SAMPLING_MODES)
+        self.sampling_combobox.setCurrentText(self.sampling_mode)
+        self.sampling_combobox.setToolTip(
+            "spatial spreads the samples evenly over the annotated area; "
+            "stratified draws them at random within each class."
+        )
+
+        classifier_label = QLabel("classifier")
+        self.classifier_combobox = QComboBox()
+        self.classifier_combobox.addItems(list(CLASSIFIER_REGISTRY.keys()))
+        self.classifier_combobox.setCurrentText(self.classifier)
+
+        n_estimators_label = QLabel("n_estimators")
+        self.n_estimators_line_edit = QLineEdit()
+        self.n_estimators_line_edit.setValidator(QIntValidator(1, 100_000))
+        self.n_estimators_line_edit.setText(str(self.n_estimators))
+        self.n_estimators_line_edit.setToolTip(
+            "Number of trees, or boosting iterations. Ignored by the linear "
+            "model."
+        )
+
+        max_depth_label = QLabel("max_depth")
+        self.max_depth_line_edit = QLineEdit()
+        self.max_depth_line_edit.setValidator(QIntValidator(1, 1000))
+        self.max_depth_line_edit.setToolTip(
+            "Maximum tree depth. Leave empty to grow trees until their "
+            "leaves are pure."
+        )
+
+        n_jobs_label = QLabel("n_jobs")
+        self.n_jobs_line_edit = QLineEdit()
+        self.n_jobs_line_edit.setValidator(QIntValidator(1, 1024))
+        self.n_jobs_line_edit.setText(str(self.n_jobs))
+        self.n_jobs_line_edit.setToolTip(
+            "Number of cores used to fit the classifier."
+        )
+
+        threshold_label = QLabel("probability_threshold")
+        self.threshold_line_edit = QLineEdit()
+        threshold_validator = QDoubleValidator(0.0, 1.0, 3)
+        threshold_validator.setNotation(
+            QDoubleValidator.Notation.StandardNotation
+        )
+        self.threshold_line_edit.setValidator(threshold_validator)
+        self.threshold_line_edit.setText("0.5")
+        self.threshold_line_edit.setToolTip(
+            "Pixels whose puncta probability exceeds this value are "
+            "labelled as puncta. Changing it relabels the image from the "
+            "cached probability map."
+        )
+        self.threshold_line_edit.editingFinished.connect(self.rethreshold)
+
+        self.warm_start_checkbox = QCheckBox("Add trees on retrain")
+        self.warm_start_checkbox.setToolTip(
+            "Grow the existing forest with trees fitted on the new "
+            "annotations instead of refitting it. Erasing or relabelling "
+            "annotations always triggers a full refit."
+        )
+
+        self.train_button = QPushButton("Train")
+        self.train_button.setObjectName("train_button")
+        self.train_button.clicked.connect(self.train_rfc)
+
+        self.compare_button = QPushButton("Compare classifiers")
+        self.compare_button.setObjectName("compare_button")
+        self.compare_button.clicked.connect(
+            self.compare_classifiers_from_widgets
+        )
+
+        min_importance_label = QLabel("min_importance")
+        self.min_importance_line_edit = QLineEdit()
+        double_validator = QDoubleValidator(0.0, 1.0, 4)
+        double_validator.setNotation(
+            QDoubleValidator.Notation.StandardNotation
+        )
+        self.min_importance_line_edit.setValidator(double_validator)
+        self.min_importance_line_edit.setText("0.01")
+        self.min_importance_line_edit.setToolTip(
+            "Features whose share of the total importance is below this "
+            "value are dropped when compacting the model."
+        )
+
+        importance_method_label = QLabel("importance_method")
+        self.importance_method_combobox = QComboBox()
+        self.importance_method_combobox.addItems(["impurity", "permutation"])
+
+        self.compact_button = QPushButton("Compact model")
+        self.compact_button.setObjectName("compact_button")
+        self.compact_button.clicked.connect(self.compact_model_from_widgets)
+
+        model_buttons_layout = QHBoxLayout()
+        save_model_button = QPushButton("Save model")
+        save_model_button.setObjectName("save_model_button")
+        save_model_button.clicked.connect(self.save_model_dialog)
+        load_model_button = QPushButton("Load model")
+        load_model_button.setObjectName("load_model_button")
+        load_model_button.clicked.connect(self.load_model_dialog)
+        model_buttons_layout.addWidget(save_model_button)
+        model_buttons_layout.addWidget(load_model_button)
 
         grid_layout.addWidget(annotation_selection_label, 0, 0, 1, 2)
         grid_layout.addWidget(self.annotation_combobox, 1, 0, 1, 2)
@@ -327,7 +803,38 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
         grid_layout.addWidget(self.puncta_line_edit, 2, 1)
         grid_layout.addWidget(background_label, 3, 0)
         grid_layout.addWidget(self.background_line_edit, 3, 1)
-        grid_layout.addWidget(train_button, 4, 0, 1, 2)
+        grid_layout.addWidget(sigmas_label, 4, 0)
+        grid_layout.addWidget(self.sigmas_line_edit, 4, 1)
+        grid_layout.addLayout(families_layout, 5, 0, 1, 2)
+        grid_layout.addWidget(memory_budget_label, 6, 0)
+        grid_layout.addWidget(self.memory_budget_line_edit, 6, 1)
+        grid_layout.addWidget(n_workers_label, 7, 0)
+        grid_layout.addWidget(self.n_workers_line_edit, 7, 1)
+        grid_layout.addWidget(feature_cache_dir_label, 8, 0)
+        grid_layout.addWidget(self.feature_cache_dir_line_edit, 8, 1)
+        grid_layout.addWidget(threshold_label, 9, 0)
+        grid_layout.addWidget(self.threshold_line_edit, 9, 1)
+        grid_layout.addWidget(max_samples_label, 10, 0)
+        grid_layout.addWidget(self.max_samples_line_edit, 10, 1)
+        grid_layout.addWidget(sampling_label, 11, 0)
+        grid_layout.addWidget(self.sampling_combobox, 11, 1)
+        grid_layout.addWidget(classifier_label, 12, 0)
+        grid_layout.addWidget(self.classifier_combobox, 12, 1)
+        grid_layout.addWidget(n_estimators_label, 13, 0)
+        grid_layout.addWidget(self.n_estimators_line_edit, 13, 1)
+        grid_layout.addWidget(max_depth_label, 14, 0)
+        grid_layout.addWidget(self.max_depth_line_edit, 14, 1)
+        grid_layout.addWidget(n_jobs_label, 15, 0)
+        grid_layout.addWidget(self.n_jobs_line_edit, 15, 1)
+        grid_layout.addWidget(self.warm_start_checkbox, 16, 0, 1, 2)
+        grid_layout.addWidget(self.train_button, 17, 0, 1, 2)
+        grid_layout.addWidget(self.compare_button, 18, 0, 1, 2)
+        grid_layout.addWidget(min_importance_label, 19, 0)
+        grid_layout.addWidget(self.min_importance_line_edit, 19, 1)
+        grid_layout.addWidget(importance_method_label, 20, 0)
+        grid_layout.addWidget(self.importance_method_combobox, 20, 1)
+        grid_layout.addWidget(self.compact_button, 21, 0, 1, 2)
+        grid_layout.addLayout(model_buttons_layout, 22, 0, 1, 2)
 
         grid_layout.setSpacing(5)
 
@@ -372,22 +879,557 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
             )
             return
 
+        try:
+            self.feature_bank = self.feature_bank_from_widgets()
+        except ValueError as err:
+            show_error(str(err))
+            return
+
+        self.max_samples_per_class = int(
+            self.max_samples_line_edit.text() or 0
+        )
+        self.set_feature_cache_dir()
+        self.sampling_mode = self.sampling_combobox.currentText()
+        self.set_classifier_from_widgets()
+
         img = layer.data.copy()
-        img_feats_df = self.extract_ilastish_features(
-            img=img, annotation_layer=annotation_layer.data
+        annotations = annotation_layer.data.copy()
+        warm_start = self.warm_start_checkbox.isChecked()
+
+        if (
+            warm_start
+            and self.model is not None
+            and self.model_classifier == self.classifier
+            and supports_warm_start(self.model)
+            and self.annotations_unchanged(img=img, annotations=annotations)
+        ):
+            show_info(
+                "The annotations have not changed since the last training, "
+                "so no trees were added."
+            )
+            return
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> None:
+            progress(0, "Computing features")
+            features, labels, only_added = self.update_training_set(
+                img=img, annotations=annotations
+            )
+
+            rows = self.training_rows()
+            features, labels = features[rows], labels[rows]
+
+            progress(0.5, "Training")
+
+            if (
+                only_added
+                and self.model is not None
+                and self.model_classifier == self.classifier
+                and supports_warm_start(self.model)
+                and self.model.n_features_in_ == features.shape[1]
+                and warm_start
+            ):
+                self.grow_seg_model(features=features, labels=labels)
+            else:
+                self.train_seg_model(features=features, labels=labels)
+
+        def report_trained(_: None) -> None:
+            show_info("Training complete.")
+
+        self.puncta_analyzer.task_runner.run(
+            task=task, on_returned=report_trained, button=self.train_button
         )
 
-        self.train_seg_model(annotation_df=img_feats_df)
+    def set_feature_cache_dir(self) -> None:
+        cache_dir = self.feature_cache_dir_line_edit.text().strip()
+        FEATURE_CACHE.spill_dir = Path(cache_dir) if cache_dir else None
+
+    def set_classifier_from_widgets(self) -> None:
+        self.classifier = self.classifier_combobox.currentText()
+        self.n_estimators = int(self.n_estimators_line_edit.text() or 100)
+        max_depth = self.max_depth_line_edit.text().strip()
+        self.max_depth = int(max_depth) if max_depth else None
+        self.n_jobs = int(self.n_jobs_line_edit.text() or 1)
+
+    def compare_classifiers_from_widgets(self) -> None:
+        if self._train_features is None or self._train_labels is None:
+            show_error("Please train the RFC before comparing classifiers.")
+            return
+
+        self.set_classifier_from_widgets()
+
+        rows = self.training_rows()
+        features = self._train_features[rows]
+        labels = self._train_labels[rows]
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> dict[str, dict[str, float]]:
+            progress(0, "Comparing classifiers")
+
+            return compare_classifiers(
+                features=features,
+                labels=labels,
+                n_estimators=self.n_estimators,
+                max_depth=self.max_depth,
+                n_jobs=self.n_jobs,
+                seed=self.sampling_seed,
+            )
+
+        def report_results(results: dict[str, dict[str, float]]) -> None:
+            show_info(
+                "\n".join(
+                    f"{name}: fit {result['fit_s']:.2f} s, "
+                    f"predict {result['predict_s_per_mp']:.2f} s/MP, "
+                    f"accuracy {result['accuracy']:.3f}"
+                    for name, result in results.items()
+                )
+            )
+
+        self.puncta_analyzer.task_runner.run(
+            task=task, on_returned=report_results, button=self.compare_button
+        )
+
+    def feature_bank_from_widgets(self) -> FeatureBank:
+        families = [
+            family
+            for family, checkbox in self.family_checkboxes.items()
+            if checkbox.isChecked()
+        ]
+        sigmas = [
+            float(sigma)
+            for sigma in self.sigmas_line_edit.text().split(",")
+            if sigma.strip()
+        ]
+
+        return FeatureBank(families=families, sigmas=sigmas)
+
+    def set_feature_widgets(self, feature_bank: FeatureBank) -> None:
+        for family, checkbox in self.family_checkboxes.items():
+            checkbox.setChecked(family in feature_bank.families)
+
+        self.sigmas_line_edit.setText(
+            ", ".join(f"{s:g}" for s in feature_bank.sigmas)
+        )
+
+    def annotations_unchanged(
+        self, img: np.ndarray, annotations: np.ndarray
+    ) -> bool:
+        """
+        Checks whether the stored training samples already match the
+        annotations, i.e. whether update_training_set would change nothing.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        annotations: np.ndarray
+            User-provided annotations.
+
+        Returns
+        -------
+        bool
+            True if the image, feature configuration and annotations are
+            those of the previous training.
+        """
 
-        show_info("Training complete.")
+        snapshot = self._annotation_snapshot
+
+        return (
+            snapshot is not None
+            and self._train_features is not None
+            and np.array_equal(snapshot, annotations)
+            and self._training_key
+            == feature_key(img=img, config=self.feature_config())
+        )
+
+    def update_training_set(
+        self, img: np.ndarray, annotations: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, bool]:
+        """
+        Brings the stored training samples in line with the annotation layer.
+        When the image and feature configuration match the previous
+        training, only pixels whose annotation changed are featurized;
+        erased or relabelled pixels are dropped from the stored samples.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        annotations: np.ndarray
+            User-provided annotations.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, bool]
+            All training features and labels, and whether the update only
+            added samples to the previous training set.
+        """
+
+        key = feature_key(img=img, config=self.feature_config())
+        snapshot = self._annotation_snapshot
+
+        if (
+            key != self._training_key
+            or snapshot is None
+            or snapshot.shape != annotations.shape
+            or self._train_features is None
+            or self._train_labels is None
+        ):
+            features, labels = self.extract_ilastish_features(
+                img=img, annotation_layer=annotations
+            )
+
+            self._training_key = key
+            self._annotation_snapshot = annotations.copy()
+            self._train_indices = np.flatnonzero(annotations)
+            self._train_feature_names = self.feature_names()
+            self._train_features = features
+            self._train_labels = labels
+
+            return features, labels, False
+
+        flat_annotations = annotations.ravel()
+        changed = np.flatnonzero(flat_annotations != snapshot.ravel())
+
+        if changed.size > 0:
+            stale = np.isin(self._train_indices, changed)
+            only_added = not stale.any()
+
+            added = changed[flat_annotations[changed] != 0]
+            feature_data = self.cached_features(img=img)
+            added_features = feature_data.reshape(-1, feature_data.shape[-1])[
+                added
+            ]
+
+            self._train_indices = np.concatenate(
+                (self._train_indices[~stale], added)
+            )
+            self._train_features = np.concatenate(
+                (self._train_features[~stale], added_features)
+            )
+            self._train_labels = np.concatenate(
+                (self._train_labels[~stale], flat_annotations[added])
+            )
+            self._annotation_snapshot = annotations.copy()
+        else:
+            only_added = True
+
+        return self._train_features, self._train_labels, only_added
+
+    def compact_model_from_widgets(self) -> None:
+        if self.model is None or self._train_features is None:
+            show_error("Please train the RFC before compacting it.")
+            return
+
+        try:
+            min_importance = float(self.min_importance_line_edit.text())
+        except ValueError:
+            show_error("Please enter a number for min_importance.")
+            return
+
+        method = self.importance_method_combobox.currentText()
+        n_features = len(self.feature_names())
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> list[str]:
+            progress(0, "Compacting model")
+
+            return self.compact_model(
+                min_importance=min_importance, method=method
+            )
+
+        def report_kept(kept: list[str]) -> None:
+            show_info(f"Kept {len(kept)} of {n_features} features.")
+
+        self.puncta_analyzer.task_runner.run(
+            task=task, on_returned=report_kept, button=self.compact_button
+        )
+
+    def compact_model(
+        self, min_importance: float = 0.01, method: str = "impurity"
+    ) -> list[str]:
+        """
+        Drops features that contribute little to the trained model and
+        refits it on the rest. The feature bank is restricted to the kept
+        features, so prediction only computes what the compact model needs.
+        Training again restores the full feature set.
+
+        Parameters
+        ----------
+        min_importance: float
+            Share of the total importance below which a feature is dropped.
+            The most important feature is always kept.
+
+        method: str
+            "impurity" ranks features by the classifier's own importances,
+            falling back to permutation importance for classifiers that do
+            not provide them. "permutation" ranks them by the drop in
+            accuracy on held-out samples when a feature is shuffled.
+
+        Returns
+        -------
+        list[str]
+            Names of the kept features.
+        """
+
+        if method not in ("impurity", "permutation"):
+            raise ValueError(f"Unknown importance method: {method}.")
+
+        if (
+            self.model is None
+            or self._train_features is None
+            or self._train_labels is None
+        ):
+            raise ValueError(
+                "Compacting needs the training samples of the current model. "
+                "Please train the RFC first."
+            )
+
+        names = self.feature_names()
+        columns = [self._train_feature_names.index(name) for name in names]
+        rows = self.training_rows()
+        features = self._train_features[np.ix_(rows, columns)]
+        labels = self._train_labels[rows]
+
+        importances = getattr(self.model[-1], "feature_importances_", None)
+
+        if method == "permutation" or importances is None:
+            importances = self.permutation_importances(
+                features=features, labels=labels
+            )
+
+        importances = np.clip(np.asarray(importances, dtype=float), 0, None)
+        total = importances.sum()
+        shares = importances / total if total > 0 else importances
+
+        keep = shares >= min_importance
+        keep[np.argmax(shares)] = True
+        kept = [names[i] for i in np.flatnonzero(keep)]
+
+        self.train_seg_model(features=features[:, keep], labels=labels)
+        self.feature_bank = FeatureBank(
+            families=self.feature_bank.families,
+            sigmas=self.feature_bank.sigmas,
+            selected=kept,
+        )
+
+        return kept
+
+    def permutation_importances(
+        self, features: np.ndarray, labels: np.ndarray
+    ) -> np.ndarray:
+        """
+        Scores features by how much shuffling each one lowers the accuracy
+        of a copy of the model on a held-out quarter of the samples.
+
+        Parameters
+        ----------
+        features: np.ndarray
+            Feature matrix of shape (n_samples, n_features).
+
+        labels: np.ndarray
+            Annotation label of each sample.
+
+        Returns
+        -------
+        np.ndarray
+            Mean accuracy drop of each feature.
+        """
+
+        train_features, test_features, train_labels, test_labels = (
+            train_test_split(
+                features,
+                labels,
+                test_size=0.25,
+                stratify=labels,
+                random_state=0,
+            )
+        )
+
+        model = clone(self.model).fit(train_features, train_labels)
+        result = permutation_importance(
+            model,
+            test_features,
+            test_labels,
+            n_repeats=5,
+            random_state=0,
+            max_samples=min(len(test_labels), 10_000),
+        )
+
+        return result.importances_mean
+
+    def training_rows(self) -> np.ndarray:
+        """
+        Selects the stored training samples that are passed to the
+        classifier, capped per class by max_samples_per_class.
+
+        Returns
+        -------
+        np.ndarray
+            Indices into the stored training features and labels.
+        """
+
+        return balanced_sample(
+            labels=self._train_labels,
+            max_per_class=self.max_samples_per_class,
+            pixel_indices=self._train_indices,
+            shape=self._annotation_snapshot.shape,
+            mode=self.sampling_mode,
+            seed=self.sampling_seed,
+        )
+
+    def save_model_dialog(self) -> None:
+        if self.model is None:
+            show_error("Please train the RFC before saving it.")
+            return
+
+        path, _ = QFileDialog.getSaveFileName(
+            self.puncta_analyzer,
+            "Save trained RFC",
+            "rfc_model.joblib",
+            "QuantPunc model (*.joblib)",
+        )
+
+        if path:
+            self.save_model(path=path)
+            show_info(f"Model saved to {path}.")
+
+    def load_model_dialog(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(
+            self.puncta_analyzer,
+            "Load trained RFC",
+            "",
+            "QuantPunc model (*.joblib)",
+        )
+
+        if not path:
+            return
+
+        try:
+            mismatched = self.load_model(path=path)
+        except (OSError, ValueError) as err:
+            show_error(str(err))
+            return
+
+        if mismatched:
+            show_info(
+                "Model loaded, but it was saved with different versions of: "
+                + ", ".join(mismatched)
+                + "."
+            )
+        else:
+            show_info("Model loaded.")
+
+    def save_model(self, path: str | Path) -> None:
+        """
+        Saves the trained RFC with its feature configuration and labels so
+        that it can be applied to other images and sessions without
+        retraining.
+
+        Parameters
+        ----------
+        path: str | Path
+            Destination file.
+        """
+
+        if self.model is None:
+            raise ValueError("The RFC has not been trained.")
+
+        save_pipeline(
+            path=path,
+            model=self.model,
+            metadata={
+                "families": list(self.feature_bank.families),
+                "sigmas": list(self.feature_bank.sigmas),
+                "selected": (
+                    list(self.feature_bank.selected)
+                    if self.feature_bank.selected is not None
+                    else None
+                ),
+                "feature_names": self.feature_names(),
+                "puncta_label": int(self.puncta_line_edit.text()),
+                "background_label": int(self.background_line_edit.text()),
+                "classes": self.model.classes_.tolist(),
+                "classifier": self.model_classifier,
+            },
+        )
+
+    def load_model(self, path: str | Path) -> list[str]:
+        """
+        Loads an RFC saved with save_model and restores its feature
+        configuration and labels.
+
+        Parameters
+        ----------
+        path: str | Path
+            File written by save_model.
+
+        Returns
+        -------
+        list[str]
+            Libraries whose installed version differs from the one the
+            model was saved with.
+        """
+
+        model, metadata, mismatched = load_pipeline(path=path)
+
+        missing = [
+            setting
+            for setting in (
+                "families",
+                "sigmas",
+                "feature_names",
+                "puncta_label",
+                "background_label",
+            )
+            if setting not in metadata
+        ]
+
+        if missing:
+            raise ValueError(
+                f"{path} is missing the model settings: {', '.join(missing)}."
+            )
+
+        feature_bank = FeatureBank(
+            families=metadata["families"],
+            sigmas=metadata["sigmas"],
+            selected=metadata.get("selected"),
+        )
+
+        if feature_bank.feature_names() != metadata["feature_names"]:
+            raise ValueError(
+                "The saved model uses features this version cannot compute."
+            )
+
+        self.feature_bank = feature_bank
+        self.set_feature_widgets(feature_bank=feature_bank)
+
+        self.model = model
+        self.model_classifier = metadata.get("classifier", "Random Forest")
+        self._model_token = uuid.uuid4().hex
+        self._training_key = None
+
+        if self.model_classifier in CLASSIFIER_REGISTRY:
+            self.classifier = self.model_classifier
+            self.classifier_combobox.setCurrentText(self.classifier)
+        self.puncta_line_edit.setText(str(metadata["puncta_label"]))
+        self.background_line_edit.setText(str(metadata["background_label"]))
+
+        return mismatched
 
     def extract_ilastish_features(
         self,
         img: np.ndarray,
         annotation_layer: np.ndarray,
-    ) -> pd.DataFrame:
+    ) -> tuple[np.ndarray, np.ndarray]:
         """
-        Creates a dataframe of ilastik-like features as inputs for an RFC.
+        Gathers ilastik-like features of the annotated pixels as inputs for
+        an RFC.
 
         Parameters
         ----------
@@ -399,23 +1441,41 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
 
         Returns
         -------
-        pd.DataFrame
-            ilastik-like features.
+        tuple[np.ndarray, np.ndarray]
+            Feature matrix of shape (n_annotated, n_features) and the
+            annotation label of each row.
         """
 
-        feature_labels, feature_data = self.preprocess_image(img=img)
-        nonzero_indices = np.nonzero(annotation_layer)
-        labels = annotation_layer[nonzero_indices]
-        labelled_features = feature_data[nonzero_indices]
+        feature_data = self.cached_features(img=img)
+        annotated = annotation_layer != 0
 
-        rows = []
+        return feature_data[annotated], annotation_layer[annotated]
 
-        for label, features in zip(labels, labelled_features, strict=False):
-            row = {f: features[i] for i, f in enumerate(feature_labels)}
-            row["label"] = label
-            rows.append(row)
+    def cached_features(self, img: np.ndarray) -> np.ndarray:
+        """
+        Returns the feature stack of an image from the shared feature cache,
+        computing it only if the image and feature configuration have not
+        been seen before.
 
-        return pd.DataFrame.from_records(rows)
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        Returns
+        -------
+        np.ndarray
+            Read-only feature stack of shape (H, W, n_features).
+        """
+
+        key = feature_key(img=img, config=self.feature_config())
+        feature_data = FEATURE_CACHE.get(key)
+
+        if feature_data is None:
+            _, feature_data = self.preprocess_image(img=img)
+            feature_data = FEATURE_CACHE.put(key, feature_data)
+
+        return feature_data
 
     def preprocess_image(self, img: np.ndarray) -> tuple[list, np.ndarray]:
         """
@@ -430,83 +1490,462 @@ class RFCPunctaLabeler(AbstractPunctaLabeler):
         Returns
         -------
         tuple[list, np.ndarray]
-            Feature names and values.
+            Feature names and a C-contiguous float32 array of shape
+            (H, W, n_features), so that it can be flattened to
+            (H * W, n_features) without a copy.
 
         """
 
-        sigmas = [0.7, 1, 3.5]
+        denoised = self.enhance_image(img=img)
+
+        return self.compute_features(denoised=denoised)
+
+    def enhance_image(self, img: np.ndarray) -> np.ndarray:
+        """
+        Applies adaptive histogram equalization and wavelet denoising. Both
+        steps depend on whole-image statistics, so they are always run on
+        the full image, even when features are computed tile by tile.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        Returns
+        -------
+        np.ndarray
+            Denoised image.
+        """
 
         rescaled_float = exposure.rescale_intensity(img, out_range=float)
         eqd = equalize_adapthist(rescaled_float, clip_limit=0.05)
-        denoised = denoise_wavelet(eqd)
 
-        gaussian_stack = [
-            (f"gaussian-{s}", filters.gaussian(denoised, sigma=s))
-            for s in sigmas
-        ]
-        log_stack = [
-            (f"LoG-{s}", filters.laplace(g[1]))
-            for s, g in zip(sigmas[1:], gaussian_stack[1:], strict=False)
-        ]
-        gg_mag_stack = [
-            (f"sobel-{s}", filters.sobel(g[1]))
-            for s, g in zip(sigmas[1:], gaussian_stack[1:], strict=False)
-        ]
-        hessian_stack = [
-            hessian_matrix(
-                img, sigma=s, mode="nearest", use_gaussian_derivatives=False
-            )
-            for s in sigmas[1:]
-        ]
-        hessian_eig_stack = [
-            (f"hess_eig-{s}", hessian_matrix_eigvals(hess)[0])
-            for s, hess in zip(sigmas, hessian_stack, strict=False)
-        ]
+        return denoise_wavelet(eqd)
 
-        feature_stack = (
-            gaussian_stack + log_stack + gg_mag_stack + hessian_eig_stack
-        )
+    def feature_names(self) -> list[str]:
+        return self.feature_bank.feature_names()
 
-        feature_labels = [f[0] for f in feature_stack]
-        feature_data = np.stack([f[1] for f in feature_stack], axis=-1)
+    def feature_config(self) -> tuple:
+        return self.feature_bank.config()
 
-        return feature_labels, feature_data
+    def feature_halo(self) -> int:
+        return self.feature_bank.halo()
 
-    def train_seg_model(self, annotation_df: pd.DataFrame) -> None:
+    def compute_features(
+        self, denoised: np.ndarray
+    ) -> tuple[list, np.ndarray]:
         """
-        Fits an RFC using image features and user-provided annotations.
+        Creates a stack of features from an enhanced image.
 
         Parameters
         ----------
-        annotation_df: pd.DataFrame
-            Contains columns of features and labels.
+        denoised: np.ndarray
+            Output of enhance_image.
 
+        Returns
+        -------
+        tuple[list, np.ndarray]
+            Feature names and a C-contiguous float32 feature stack.
         """
 
-        y = annotation_df["label"]
-        X = annotation_df.drop(columns=["label"])
+        return self.feature_names(), self.feature_bank.compute(img=denoised)
 
-        model = make_pipeline(StandardScaler(), RandomForestClassifier())
-        model.fit(X, y)
+    def train_seg_model(
+        self, features: np.ndarray, labels: np.ndarray
+    ) -> None:
+        """
+        Fits the selected classifier using image features and
+        user-provided annotations.
+
+        Parameters
+        ----------
+        features: np.ndarray
+            Feature matrix of shape (n_samples, n_features).
+
+        labels: np.ndarray
+            Annotation label of each sample.
+
+        """
+
+        model = make_classifier_pipeline(
+            name=self.classifier,
+            n_estimators=self.n_estimators,
+            max_depth=self.max_depth,
+            n_jobs=self.n_jobs,
+        )
+        model.fit(features, labels)
 
         self.model = model
+        self.model_classifier = self.classifier
+        self._model_token = uuid.uuid4().hex
+
+    def grow_seg_model(self, features: np.ndarray, labels: np.ndarray) -> None:
+        """
+        Adds trees fitted on the current training samples to the existing
+        RFC instead of refitting it from scratch. The scaler keeps its
+        original fit so that the existing trees see the same inputs.
+
+        Parameters
+        ----------
+        features: np.ndarray
+            Feature matrix of shape (n_samples, n_features).
+
+        labels: np.ndarray
+            Annotation label of each sample.
 
-    def predict(self, img: np.ndarray) -> np.ndarray | None:
+        """
+
+        if self.model is None or not supports_warm_start(self.model):
+            self.train_seg_model(features=features, labels=labels)
+            return
+
+        scaler, forest = self.model[0], self.model[-1]
+        forest.set_params(
+            warm_start=True,
+            n_estimators=forest.n_estimators + self.warm_start_trees,
+        )
+        forest.fit(scaler.transform(features), labels)
+        self._model_token = uuid.uuid4().hex
+
+    def rethreshold(self) -> None:
+        """
+        Relabels the selected image with the current threshold when its
+        probability map is cached, without running the classifier again.
+        Nothing is done if the threshold was not changed since the last
+        labeling.
+        """
+
+        layer = self.puncta_analyzer.img_combobox.currentData()
+
+        if layer is None or self.model is None:
+            return
+
+        try:
+            threshold = float(self.threshold_line_edit.text())
+            puncta_label = int(self.puncta_line_edit.text())
+        except ValueError:
+            return
+
+        if threshold == self.applied_threshold:
+            return
+
+        key = self.probability_key(img=layer.data, puncta_label=puncta_label)
+
+        if PROBABILITY_CACHE.get(key) is not None:
+            self.puncta_analyzer.get_puncta_labels()
+
+    def probability_key(self, img: np.ndarray, puncta_label: int) -> str:
+        return feature_key(
+            img=img,
+            config=(self.feature_config(), self._model_token, puncta_label),
+        )
+
+    def cached_probability(
+        self,
+        img: np.ndarray,
+        puncta_label: int,
+        memory_budget_mb: int | None = None,
+        n_workers: int = 1,
+        progress: ProgressCallback | None = None,
+    ) -> np.ndarray:
+        """
+        Returns the puncta probability map of an image from the shared
+        probability cache, computing it only if the image has not been
+        classified by the current model before.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        puncta_label: int
+            Annotation label of the puncta class.
+
+        memory_budget_mb: int | None
+            Approximate memory shared by the tiles being processed at once.
+
+        n_workers: int
+            Number of tiles processed concurrently.
+
+        progress: ProgressCallback | None
+            Called after each tile is classified.
+
+        Returns
+        -------
+        np.ndarray
+            Read-only probability map, quantized to uint8 when a float16
+            map would not fit comfortably in the memory budget.
+        """
+
+        key = self.probability_key(img=img, puncta_label=puncta_label)
+        probability = PROBABILITY_CACHE.get(key)
+
+        if probability is None:
+            probability = self.predict_probability(
+                img=img,
+                puncta_label=puncta_label,
+                memory_budget_mb=memory_budget_mb,
+                n_workers=n_workers,
+                progress=progress,
+            )
+            probability = PROBABILITY_CACHE.put(key, probability)
+
+        return probability
+
+    def show_probability_layer(self, probability: np.ndarray) -> None:
+        layer = self.puncta_analyzer.img_combobox.currentData()
+
+        if layer is None:
+            return
+
+        probability_layer_name = f"{layer.name}_probability"
+        display_data = probability_for_display(probability)
+
+        if probability_layer_name in self.viewer.layers:
+            self.viewer.layers[probability_layer_name].data = display_data
+            return
+
+        self.viewer.add_image(
+            data=display_data,
+            name=probability_layer_name,
+            colormap="magma",
+            contrast_limits=(0, 1),
+            visible=False,
+        )
+
+    def predict(
+        self,
+        img: np.ndarray,
+        memory_budget_mb: int | None = None,
+        n_workers: int = 1,
+    ) -> np.ndarray | None:
         """
         Produces puncta labels for the entire image using a trained RFC.
 
+        Features are computed and classified in overlapping tiles so that
+        peak memory is bounded by the tile size rather than the image size.
+        Each tile is padded by the feature halo, which makes the stitched
+        result identical to classifying the whole image at once. Features
+        already in the shared feature cache are reused. Freshly computed tiles
+        are written into it when the whole stack fits in the memory budget,
+        or spilled to the cache directory when one is set.
+
         Parameters
         ----------
         img: np.ndarray
             Array of a user-specified image.
+
+        memory_budget_mb: int | None
+            Approximate memory shared by the tiles being processed at once.
+            None classifies the whole image as a single tile.
+
+        n_workers: int
+            Number of tiles processed concurrently in a thread pool.
+        """
+
+        if self.model is None:
+            return None
+
+        predicted_labels = np.empty(img.shape, dtype=self.model.classes_.dtype)
+        model = self.tile_model(
+            memory_budget_mb=memory_budget_mb, n_workers=n_workers
+        )
+
+        return self.classify_tiles(
+            img=img,
+            classify=model.predict,
+            out=predicted_labels,
+            memory_budget_mb=memory_budget_mb,
+            n_workers=n_workers,
+        )
+
+    def predict_probability(
+        self,
+        img: np.ndarray,
+        puncta_label: int,
+        memory_budget_mb: int | None = None,
+        n_workers: int = 1,
+        dtype: np.dtype | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> np.ndarray | None:
         """
+        Produces a map of the probability of each pixel belonging to the
+        puncta class, tiled like predict.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        puncta_label: int
+            Annotation label of the puncta class.
+
+        memory_budget_mb: int | None
+            Approximate memory shared by the tiles being processed at once.
+            None classifies the whole image as a single tile.
+
+        n_workers: int
+            Number of tiles processed concurrently in a thread pool.
 
-        img_feats_df = self.extract_ilastish_features(img, np.ones(img.shape))
-        img_feats_df = img_feats_df.drop(columns=["label"])
+        dtype: np.dtype | None
+            float16, float32 or uint8 (probabilities scaled to [0, 255]).
+            None picks one based on the memory budget.
+
+        progress: ProgressCallback | None
+            Called after each tile is classified.
+        """
 
         if self.model is None:
             return None
 
-        predicted_labels = self.model.predict(img_feats_df).reshape(img.shape)
+        if puncta_label not in self.model.classes_:
+            raise ValueError(
+                f"The model was not trained on label {puncta_label}."
+            )
+
+        if dtype is None:
+            dtype = probability_dtype_for_budget(
+                shape=img.shape, memory_budget_mb=memory_budget_mb
+            )
+
+        column = int(np.flatnonzero(self.model.classes_ == puncta_label)[0])
+        model = self.tile_model(
+            memory_budget_mb=memory_budget_mb, n_workers=n_workers
+        )
+
+        def classify(features: np.ndarray) -> np.ndarray:
+            probability = model.predict_proba(features)[:, column]
+            return quantize_probability(probability, dtype=dtype)
+
+        return self.classify_tiles(
+            img=img,
+            classify=classify,
+            out=np.empty(img.shape, dtype=dtype),
+            memory_budget_mb=memory_budget_mb,
+            n_workers=n_workers,
+            progress=progress,
+        )
+
+    def tile_model(
+        self, memory_budget_mb: int | None, n_workers: int
+    ) -> Pipeline:
+        # Tiles classified in parallel each predict on one core, so that
+        # n_workers tiles do not start n_jobs threads apiece.
+        if memory_budget_mb is None or n_workers <= 1:
+            return self.model
+
+        return single_threaded(self.model)
+
+    def classify_tiles(
+        self,
+        img: np.ndarray,
+        classify: Callable[[np.ndarray], np.ndarray],
+        out: np.ndarray,
+        memory_budget_mb: int | None = None,
+        n_workers: int = 1,
+        progress: ProgressCallback | None = None,
+    ) -> np.ndarray:
+        """
+        Applies a per-pixel classification to the feature stack of an image,
+        computing features tile by tile when they are not cached.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of a user-specified image.
+
+        classify: Callable[[np.ndarray], np.ndarray]
+            Maps a (n_pixels, n_features) matrix to one value per pixel.
+
+        out: np.ndarray
+            Array with the shape of the image that receives the results.
+
+        memory_budget_mb: int | None
+            Approximate memory shared by the tiles being processed at once.
+            None classifies the whole image as a single tile.
+
+        n_workers: int
+            Number of tiles processed concurrently in a thread pool.
+
+        progress: ProgressCallback | None
+            Called after each tile is classified. It may raise to stop
+            classification, e.g. TaskCancelled, which waits only for the
+            tiles in flight.
+
+        Returns
+        -------
+        np.ndarray
+            The filled out array.
+        """
+
+        n_features = len(self.feature_names())
+        halo = self.feature_halo()
+
+        key = feature_key(img=img, config=self.feature_config())
+        cached_data = FEATURE_CACHE.get(key)
+        feature_data = cached_data
+
+        if cached_data is None:
+            denoised = self.enhance_image(img=img)
+            # In tiled mode the stack is only kept in memory if it fits the
+            # budget; otherwise it is spilled to the cache directory or not
+            # cached at all.
+            feature_data = FEATURE_CACHE.allocate(
+                key,
+                shape=img.shape + (n_features,),
+                dtype=np.float32,
+                max_memory_mb=memory_budget_mb,
+            )
+
+        if memory_budget_mb is None:
+            tile_size = max(img.shape)
+        else:
+            # float32 features, their core copy and the scaled copy, plus
+            # float64 Gaussians, Hessian terms and class probabilities.
+            bytes_per_pixel = 3 * 4 * n_features + 16 * 8
+            tile_size = tile_size_for_budget(
+                memory_budget_mb=memory_budget_mb,
+                bytes_per_pixel=bytes_per_pixel,
+                n_workers=n_workers,
+                halo=halo,
+            )
+
+        def classify_tile(tile: tuple) -> None:
+            padded, core, core_in_padded = tile
+
+            if cached_data is not None:
+                tile_features = cached_data[core]
+            else:
+                _, tile_features = self.compute_features(
+                    denoised=denoised[padded]
+                )
+                tile_features = tile_features[core_in_padded]
+
+                if feature_data is not None:
+                    feature_data[core] = tile_features
+
+            core_shape = tile_features.shape[:-1]
+
+            out[core] = classify(
+                tile_features.reshape(-1, n_features)
+            ).reshape(core_shape)
+
+        tiles = iter_tiles(shape=img.shape, tile_size=tile_size, halo=halo)
+        n_tiles = tile_count(shape=img.shape, tile_size=tile_size)
+
+        try:
+            for i, _ in enumerate(
+                ordered_map(classify_tile, tiles, n_workers)
+            ):
+                if progress is not None:
+                    progress((i + 1) / n_tiles, "Classifying tiles")
+        except Exception:
+            if cached_data is None:
+                FEATURE_CACHE.discard(feature_data)
+
+            raise
+
+        if cached_data is None and feature_data is not None:
+            FEATURE_CACHE.put(key, feature_data)
 
-        return predicted_labels
+        return out
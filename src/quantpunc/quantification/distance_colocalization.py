@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from quantpunc.quantification.object_colocalization import (
+    label_centroids,
+    mask_labels_of,
+    puncta_ids,
+    puncta_masks,
+)
+from quantpunc.quantification.progress import ProgressCallback
+
+DISTANCE_COLOC_COLUMNS = [
+    "centroid_row",
+    "centroid_col",
+    "area",
+    "nearest_partner",
+    "nearest_distance",
+    "mask_label",
+]
+
+# Columns of the curve, one row per mask and radius.
+DISTANCE_CURVE_COLUMNS = [
+    "first_puncta",
+    "first_within",
+    "first_fraction",
+    "second_puncta",
+    "second_within",
+    "second_fraction",
+]
+
+
+def nearest_neighbours(
+    points: np.ndarray, partners: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the nearest partner of every point with a KD-tree of the
+    partners.
+
+    Parameters
+    ----------
+    points: np.ndarray
+        Coordinates of the points, one point per row.
+
+    partners: np.ndarray
+        Coordinates of the partners.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Distance to the nearest partner of each point, inf without
+        partners, and the partner's row, -1 without partners.
+    """
+
+    if len(partners) == 0 or len(points) == 0:
+        return np.full(len(points), np.inf), np.full(len(points), -1)
+
+    distances, nearest = cKDTree(partners).query(points, k=1, workers=-1)
+
+    return distances, nearest
+
+
+def within_radii_per_mask(
+    distances: np.ndarray,
+    puncta_masks: np.ndarray,
+    mask_labels: np.ndarray,
+    radii: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the puncta of each mask with a partner within each radius in a
+    single pass. Every punctum is binned by the smallest radius its nearest
+    distance fits in, and a cumulative sum over the bins gives the counts
+    at every radius at once.
+
+    Parameters
+    ----------
+    distances: np.ndarray
+        Nearest distance of each punctum.
+
+    puncta_masks: np.ndarray
+        Mask of each punctum.
+
+    mask_labels: np.ndarray
+        Sorted masks to report, including those without puncta.
+
+    radii: np.ndarray
+        Sorted radii.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Number of puncta of each mask, and the number of them within each
+        radius with one row per mask and one column per radius.
+    """
+
+    n_masks, n_radii = len(mask_labels), len(radii)
+
+    if n_masks == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, n_radii), np.int64)
+
+    index = np.minimum(np.searchsorted(mask_labels, puncta_masks), n_masks - 1)
+    in_mask = mask_labels[index] == puncta_masks
+    index = index[in_mask]
+
+    # Bin n_radii holds the puncta beyond the largest radius.
+    radius_bins = np.searchsorted(radii, distances[in_mask], side="left")
+    counts = np.bincount(
+        index * (n_radii + 1) + radius_bins,
+        minlength=n_masks * (n_radii + 1),
+    ).reshape(n_masks, n_radii + 1)
+
+    return counts.sum(axis=1), np.cumsum(counts[:, :n_radii], axis=1)
+
+
+def distance_colocalization(
+    first: np.ndarray,
+    second: np.ndarray,
+    masks: np.ndarray | None,
+    radii: list[float],
+    progress: ProgressCallback | None = None,
+) -> tuple[pd.DataFrame, dict[tuple, tuple]]:
+    """
+    Colocalizes the puncta of two labels layers by the distance between
+    their centroids. Each layer is split into puncta with puncta_ids, and a
+    KD-tree query finds the nearest punctum of the other layer for every
+    punctum of both layers. A punctum is colocalized at a radius if its
+    nearest partner is at most that far, so one query per layer gives the
+    whole curve over all radii.
+
+    Parameters
+    ----------
+    first: np.ndarray
+        Array of the first puncta labels layer.
+
+    second: np.ndarray
+        Array of the second puncta labels layer.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None summarizes the whole image under
+        -1.
+
+    radii: list[float]
+        Distances in pixels at which puncta count as colocalized.
+
+    progress: ProgressCallback | None
+        Called before each stage.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, dict[tuple, tuple]]
+        Table of the first layer's puncta, indexed by their ID, with the
+        columns of DISTANCE_COLOC_COLUMNS, and the values of
+        DISTANCE_CURVE_COLUMNS for each mask and radius. Partner IDs are
+        puncta of the second layer, 0 where there is none. IDs are those of
+        puncta_ids.
+    """
+
+    radii = np.unique(np.asarray(radii, dtype=np.float64))
+
+    if progress is not None:
+        progress(0, "Labelling puncta")
+
+    first_ids, n_first, first_values = puncta_ids(first)
+    second_ids, n_second, second_values = puncta_ids(second)
+    # Layer ID of each second punctum, and 0 for none.
+    second_lookup = np.r_[0, second_values]
+
+    if progress is not None:
+        progress(0.3, "Measuring centroids")
+
+    first_centroids, first_areas = label_centroids(
+        ids=first_ids, n_ids=n_first
+    )
+    second_centroids, _ = label_centroids(ids=second_ids, n_ids=n_second)
+
+    if progress is not None:
+        progress(0.5, "Finding nearest puncta")
+
+    first_distances, first_nearest = nearest_neighbours(
+        points=first_centroids, partners=second_centroids
+    )
+    second_distances, _ = nearest_neighbours(
+        points=second_centroids, partners=first_centroids
+    )
+
+    if progress is not None:
+        progress(0.8, "Summarizing masks")
+
+    mask_labels = mask_labels_of(masks)
+    first_masks = puncta_masks(ids=first_ids, n_ids=n_first, masks=masks)
+    second_masks = puncta_masks(ids=second_ids, n_ids=n_second, masks=masks)
+
+    table = pd.DataFrame(
+        {
+            "centroid_row": first_centroids[:, 0],
+            "centroid_col": first_centroids[:, 1],
+            "area": first_areas,
+            "nearest_partner": second_lookup[first_nearest + 1],
+            "nearest_distance": first_distances.round(4),
+            "mask_label": first_masks,
+        },
+        index=pd.Index(first_values, name="puncta_id"),
+    )
+
+    first_totals, first_within = within_radii_per_mask(
+        distances=first_distances,
+        puncta_masks=first_masks,
+        mask_labels=mask_labels,
+        radii=radii,
+    )
+    second_totals, second_within = within_radii_per_mask(
+        distances=second_distances,
+        puncta_masks=second_masks,
+        mask_labels=mask_labels,
+        radii=radii,
+    )
+
+    curve = {}
+
+    for i, mask_val in enumerate(mask_labels.tolist()):
+        for j, radius in enumerate(radii.tolist()):
+            row = []
+
+            for totals, within in (
+                (first_totals, first_within),
+                (second_totals, second_within),
+            ):
+                total, num = int(totals[i]), int(within[i, j])
+                fraction = 0 if total == 0 else round(num / total, 4)
+                row.extend((total, num, fraction))
+
+            curve[(mask_val, radius)] = tuple(row)
+
+    return table, curve
@@ -0,0 +1,207 @@
+from collections.abc import Sequence
+
+import numpy as np
+from scipy import ndimage as ndi
+
+FEATURE_FAMILIES = (
+    "gaussian",
+    "LoG",
+    "gradient",
+    "hessian_eig",
+    "structure_tensor",
+)
+
+DEFAULT_FAMILIES = ("gaussian", "LoG", "gradient", "hessian_eig")
+DEFAULT_SIGMAS = (0.7, 1.0, 3.5)
+
+FAMILY_FEATURES = {
+    "gaussian": ("gaussian",),
+    "LoG": ("LoG",),
+    "gradient": ("gradient",),
+    "hessian_eig": ("hess_eig_max", "hess_eig_min"),
+    "structure_tensor": ("struct_eig_max", "struct_eig_min"),
+}
+
+TRUNCATE = 4.0
+
+
+def gaussian_radius(sigma: float) -> int:
+    return int(TRUNCATE * sigma + 0.5)
+
+
+def symmetric_eigvals(
+    a: np.ndarray, b: np.ndarray, c: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the eigenvalues of the symmetric 2x2 matrices [[a, b], [b, c]]
+    in closed form.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Largest and smallest eigenvalue of each matrix.
+    """
+
+    mean = (a + c) / 2
+    radius = np.sqrt(((a - c) / 2) ** 2 + b**2)
+
+    return mean + radius, mean - radius
+
+
+class FeatureBank:
+    def __init__(
+        self,
+        families: Sequence[str] = DEFAULT_FAMILIES,
+        sigmas: Sequence[float] = DEFAULT_SIGMAS,
+        selected: Sequence[str] | None = None,
+    ):
+        """
+        Pixel features for the RFC, computed at every sigma for every
+        selected family. Each Gaussian is computed once per sigma in
+        float32, and all other features are derived from it. Passing
+        selected restricts the bank to a subset of its feature names, and
+        only the intermediates those features need are computed.
+        """
+        unknown = set(families) - set(FEATURE_FAMILIES)
+
+        if unknown:
+            raise ValueError(f"Unknown feature families: {sorted(unknown)}.")
+
+        if not families or not sigmas:
+            raise ValueError("Select at least one feature family and sigma.")
+
+        if min(sigmas) <= 0:
+            raise ValueError("Sigmas must be positive.")
+
+        self.families = tuple(f for f in FEATURE_FAMILIES if f in families)
+        self.sigmas = tuple(sorted({float(s) for s in sigmas}))
+        self.selected: tuple[str, ...] | None = None
+
+        if selected is not None:
+            all_names = self.all_feature_names()
+            unknown = set(selected) - set(all_names)
+
+            if unknown:
+                raise ValueError(f"Unknown features: {sorted(unknown)}.")
+
+            if not selected:
+                raise ValueError("Select at least one feature.")
+
+            self.selected = tuple(n for n in all_names if n in selected)
+
+    def all_feature_names(self) -> list[str]:
+        return [
+            f"{feature}-{s}"
+            for family in self.families
+            for feature in FAMILY_FEATURES[family]
+            for s in self.sigmas
+        ]
+
+    def feature_names(self) -> list[str]:
+        if self.selected is not None:
+            return list(self.selected)
+
+        return self.all_feature_names()
+
+    def config(self) -> tuple:
+        return ("feature_bank", self.families, self.sigmas, self.selected)
+
+    def halo(self) -> int:
+        """
+        Returns the number of pixels a feature at one pixel depends on in
+        each direction.
+        """
+
+        sigmas = {
+            float(name.rsplit("-", 1)[1]) for name in self.feature_names()
+        }
+        radius = gaussian_radius(max(sigmas))
+
+        if any(n.startswith("struct_eig") for n in self.feature_names()):
+            # The gradient products are smoothed again at the same sigma.
+            return 2 * radius + 1
+
+        # Second differences reach two pixels beyond the Gaussian.
+        return radius + 2
+
+    def compute(self, img: np.ndarray) -> np.ndarray:
+        """
+        Creates a stack of features from an image.
+
+        Parameters
+        ----------
+        img: np.ndarray
+            Array of an enhanced image.
+
+        Returns
+        -------
+        np.ndarray
+            C-contiguous float32 array of shape (H, W, n_features) ordered
+            like feature_names.
+        """
+
+        img = np.asarray(img, dtype=np.float32)
+        names = self.feature_names()
+        index = {name: i for i, name in enumerate(names)}
+        feature_data = np.empty(img.shape + (len(names),), dtype=np.float32)
+
+        for s in self.sigmas:
+            wanted = {
+                name.rsplit("-", 1)[0]
+                for name in names
+                if name.endswith(f"-{s}")
+            }
+
+            if not wanted:
+                continue
+
+            smoothed = ndi.gaussian_filter(
+                img, sigma=s, mode="nearest", truncate=TRUNCATE
+            )
+            features = self._derive(smoothed=smoothed, sigma=s, wanted=wanted)
+
+            for name, values in features.items():
+                feature_data[..., index[f"{name}-{s}"]] = values
+
+        return feature_data
+
+    def _derive(
+        self, smoothed: np.ndarray, sigma: float, wanted: set[str]
+    ) -> dict[str, np.ndarray]:
+        hessian = {"hess_eig_max", "hess_eig_min"}
+        structure = {"struct_eig_max", "struct_eig_min"}
+        features: dict[str, np.ndarray] = {}
+
+        if "gaussian" in wanted:
+            features["gaussian"] = smoothed
+
+        if "LoG" in wanted:
+            features["LoG"] = ndi.laplace(smoothed, mode="nearest")
+
+        if not ({"gradient"} | hessian | structure) & wanted:
+            return features
+
+        grad_r, grad_c = np.gradient(smoothed)
+
+        if "gradient" in wanted:
+            features["gradient"] = np.hypot(grad_r, grad_c)
+
+        if hessian & wanted:
+            h_rr, h_rc = np.gradient(grad_r)
+            h_cc = np.gradient(grad_c, axis=1)
+            eig_max, eig_min = symmetric_eigvals(h_rr, h_rc, h_cc)
+            features["hess_eig_max"] = eig_max
+            features["hess_eig_min"] = eig_min
+
+        if structure & wanted:
+            j_rr, j_rc, j_cc = (
+                ndi.gaussian_filter(
+                    product, sigma=sigma, mode="nearest", truncate=TRUNCATE
+                )
+                for product in (grad_r * grad_r, grad_r * grad_c, grad_c**2)
+            )
+            eig_max, eig_min = symmetric_eigvals(j_rr, j_rc, j_cc)
+            features["struct_eig_max"] = eig_max
+            features["struct_eig_min"] = eig_min
+
+        return {name: features[name] for name in wanted}
@@ -0,0 +1,269 @@
+import contextlib
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+def feature_key(img: np.ndarray, config: tuple) -> str:
+    """
+    Creates a cache key from the content of an image and the configuration
+    of the features computed from it.
+
+    Parameters
+    ----------
+    img: np.ndarray
+        Array of a user-specified image.
+
+    config: tuple
+        Hashable description of the features, e.g. their names and sigmas.
+
+    Returns
+    -------
+    str
+        Hex digest identifying the feature stack.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((img.shape, img.dtype.str, config)).encode())
+    digest.update(memoryview(np.ascontiguousarray(img)).cast("B"))
+
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    def __init__(
+        self, max_memory_mb: float = 2048, spill_dir: str | Path | None = None
+    ):
+        """
+        Least-recently-used cache of feature stacks. Stacks that do not fit
+        in memory are spilled to .npy files in spill_dir and read back as
+        memory maps. Without a spill_dir they are dropped.
+        """
+        self.max_memory_mb = max_memory_mb
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(
+            stack.nbytes
+            for stack in self._entries.values()
+            if not isinstance(stack, np.memmap)
+        )
+
+    def get(self, key: str) -> np.ndarray | None:
+        """
+        Returns a cached feature stack, or None if it has not been computed.
+
+        Parameters
+        ----------
+        key: str
+            Key created by feature_key.
+
+        Returns
+        -------
+        np.ndarray | None
+            Read-only feature stack.
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            spill_path = self._spill_path(key)
+
+            if spill_path is not None and spill_path.exists():
+                stack = np.load(spill_path, mmap_mode="r")
+                self._entries[key] = stack
+                return stack
+
+        return None
+
+    def allocate(
+        self,
+        key: str,
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+        max_memory_mb: float | None = None,
+    ) -> np.ndarray | None:
+        """
+        Allocates an array that a feature stack can be written into
+        piecewise before being passed to put, or to discard if writing it
+        fails. Stacks larger than the memory cap are backed by a temporary
+        .npy file when spilling is enabled, which put renames to its final
+        path so that incomplete stacks are never read back.
+
+        Parameters
+        ----------
+        key: str
+            Key created by feature_key.
+
+        shape: tuple[int, ...]
+            Shape of the feature stack.
+
+        dtype: np.dtype
+            Data type of the feature stack.
+
+        max_memory_mb: float | None
+            Memory the caller can spare for the stack, e.g. its tiling
+            budget. Stacks above it or the cache's cap are spilled.
+
+        Returns
+        -------
+        np.ndarray | None
+            Writable array, or None if the stack cannot be cached.
+        """
+
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        limit_mb = self.max_memory_mb
+
+        if max_memory_mb is not None:
+            limit_mb = min(limit_mb, max_memory_mb)
+
+        if nbytes <= limit_mb * 1024**2:
+            return np.empty(shape, dtype=dtype)
+
+        spill_path = self._spill_path(key)
+
+        if spill_path is None:
+            return None
+
+        spill_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = spill_path.with_name(f"{key}.{uuid.uuid4().hex}.tmp.npy")
+
+        return np.lib.format.open_memmap(
+            temp_path, mode="w+", dtype=dtype, shape=shape
+        )
+
+    def put(self, key: str, stack: np.ndarray) -> np.ndarray:
+        """
+        Stores a feature stack and evicts the least recently used stacks
+        until the in-memory total is below the cap.
+
+        Parameters
+        ----------
+        key: str
+            Key created by feature_key.
+
+        stack: np.ndarray
+            Feature stack. It is marked read-only once cached.
+
+        Returns
+        -------
+        np.ndarray
+            The cached stack, which is a memory map if it was spilled.
+        """
+
+        max_bytes = self.max_memory_mb * 1024**2
+
+        if isinstance(stack, np.memmap):
+            stack = self._commit(key, stack)
+        elif stack.nbytes > max_bytes:
+            spilled = self._spill(key, stack)
+
+            if spilled is None:
+                return stack
+
+            stack = spilled
+
+        stack.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = stack
+            self._entries.move_to_end(key)
+
+            for old_key in list(self._entries):
+                if self.memory_bytes <= max_bytes:
+                    break
+
+                old_stack = self._entries.pop(old_key)
+
+                if isinstance(old_stack, np.memmap):
+                    self._entries[old_key] = old_stack
+                    continue
+
+                spilled = self._spill(old_key, old_stack)
+
+                if spilled is not None:
+                    self._entries[old_key] = spilled
+
+        return stack
+
+    def discard(self, stack: np.ndarray | None) -> None:
+        """
+        Deletes the temporary file behind a stack returned by allocate that
+        will not be passed to put, e.g. because computing it failed.
+
+        Parameters
+        ----------
+        stack: np.ndarray | None
+            Array returned by allocate.
+        """
+
+        temp_path = self._temp_path(stack)
+
+        if temp_path is None:
+            return
+
+        with contextlib.suppress(OSError):
+            temp_path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _spill_path(self, key: str) -> Path | None:
+        if self.spill_dir is None:
+            return None
+
+        return self.spill_dir / f"{key}.npy"
+
+    def _temp_path(self, stack: np.ndarray | None) -> Path | None:
+        if not isinstance(stack, np.memmap) or stack.filename is None:
+            return None
+
+        path = Path(stack.filename)
+
+        return path if path.name.endswith(".tmp.npy") else None
+
+    def _commit(self, key: str, stack: np.memmap) -> np.ndarray:
+        stack.flush()
+        temp_path = self._temp_path(stack)
+        spill_path = self._spill_path(key)
+
+        if temp_path is None or spill_path is None:
+            return stack
+
+        try:
+            os.replace(temp_path, spill_path)
+        except OSError:
+            # The temporary file may still be mapped, which blocks renaming
+            # it on Windows.
+            np.save(spill_path, stack)
+            self.discard(stack)
+
+        return np.load(spill_path, mmap_mode="r")
+
+    def _spill(self, key: str, stack: np.ndarray) -> np.ndarray | None:
+        spill_path = self._spill_path(key)
+
+        if spill_path is None:
+            return None
+
+        if not spill_path.exists():
+            spill_path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(spill_path, stack)
+
+        return np.load(spill_path, mmap_mode="r")
+
+
+FEATURE_CACHE = FeatureCache()
+PROBABILITY_CACHE = FeatureCache(max_memory_mb=512)
+SCALE_SPACE_CACHE = FeatureCache(max_memory_mb=1024)
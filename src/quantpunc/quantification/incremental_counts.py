@@ -0,0 +1,289 @@
+import numpy as np
+import pandas as pd
+from scipy import ndimage as ndi
+
+from quantpunc.quantification.feature_cache import feature_key
+from quantpunc.quantification.puncta_counting import (
+    contingency_table,
+    dominant_masks,
+    puncta_per_mask,
+    split_puncta,
+)
+from quantpunc.quantification.region_stats import (
+    mask_boundary_distance,
+    region_stats,
+)
+from quantpunc.quantification.tiling import TileSlices
+
+BBOX_COLUMNS = ["bbox_min_row", "bbox_min_col", "bbox_max_row", "bbox_max_col"]
+
+
+def source_key(image: np.ndarray, masks: np.ndarray | None) -> str:
+    """
+    Identifies the image and masks a count was made from, so that a count
+    is rebuilt when either of them changes.
+    """
+
+    mask_key = None if masks is None else feature_key(img=masks, config=())
+
+    return feature_key(img=image, config=("puncta_counts", mask_key))
+
+
+def bounding_box(changed: np.ndarray) -> TileSlices | None:
+    """
+    Returns the smallest window containing every True pixel, or None if
+    there are none.
+    """
+
+    rows = np.flatnonzero(changed.any(axis=1))
+
+    if len(rows) == 0:
+        return None
+
+    cols = np.flatnonzero(changed.any(axis=0))
+
+    return (
+        slice(int(rows[0]), int(rows[-1]) + 1),
+        slice(int(cols[0]), int(cols[-1]) + 1),
+    )
+
+
+def paint_bounding_box(atom) -> TileSlices | None:
+    """
+    Returns the window edited by one history atom of a napari labels paint
+    event. Atoms are either masked edits with a bounding box or tuples of
+    the changed indices and their old and new values.
+    """
+
+    slice_key = getattr(atom, "slice_key", None)
+
+    if slice_key is not None:
+        return (slice_key[-2], slice_key[-1])
+
+    indices = atom[0]
+    rows, cols = np.asarray(indices[-2]), np.asarray(indices[-1])
+
+    if rows.size == 0:
+        return None
+
+    return (
+        slice(int(rows.min()), int(rows.max()) + 1),
+        slice(int(cols.min()), int(cols.max()) + 1),
+    )
+
+
+def intensity_sums(labels: np.ndarray, image: np.ndarray) -> pd.Series:
+    """
+    Summed image intensity of each labeled region, indexed by its ID.
+    """
+
+    ids = np.unique(labels)
+    ids = ids[ids != 0]
+
+    return pd.Series(
+        ndi.sum_labels(image, labels=labels, index=ids),
+        index=ids,
+        dtype=np.float64,
+    )
+
+
+class PunctaCountState:
+    """
+    Counts and statistics of the connected puncta of a labels layer that
+    can be brought up to date after edits by relabelling only the puncta
+    that touch the edited window.
+    """
+
+    def __init__(
+        self,
+        puncta_data: np.ndarray,
+        image: np.ndarray,
+        masks: np.ndarray | None,
+        key: str,
+    ):
+        self.image = image
+        self.masks = masks
+        self.key = key
+
+        self.puncta_ids, num_puncta = ndi.label(puncta_data != 0)
+        self.next_id = num_puncta + 1
+
+        # Windows edited since the last update, e.g. by paint events that
+        # arrive before the layer's data is written.
+        self.dirty: list[TileSlices] = []
+
+        self.mask_labels = None
+        self.distance_map = None
+        self.table = None
+
+        if masks is not None:
+            mask_labels = np.unique(masks)
+            self.mask_labels = mask_labels[mask_labels != 0]
+            self.distance_map = mask_boundary_distance(masks)
+            self.table = contingency_table(
+                puncta_ids=self.puncta_ids, masks=masks
+            )
+
+        self.stats = region_stats(
+            labels=self.puncta_ids,
+            image=image,
+            distance_map=self.distance_map,
+        )
+        self.intensity_sums = intensity_sums(
+            labels=self.puncta_ids, image=image
+        )
+
+    def changed_window(self, puncta_data: np.ndarray) -> TileSlices | None:
+        """
+        Finds the window in which the puncta of a labels layer differ from
+        the counted ones, including edits made without a paint event such
+        as undo.
+        """
+
+        return bounding_box((puncta_data != 0) != (self.puncta_ids != 0))
+
+    def affected_window(self, edited: TileSlices) -> TileSlices:
+        """
+        Grows an edited window until it contains every punctum it touches,
+        plus a ring of background, so that the puncta inside can be
+        relabelled on their own.
+        """
+
+        height, width = self.puncta_ids.shape
+        top, bottom = edited[0].start, edited[0].stop
+        left, right = edited[1].start, edited[1].stop
+
+        while True:
+            window = (
+                slice(max(top - 1, 0), min(bottom + 1, height)),
+                slice(max(left - 1, 0), min(right + 1, width)),
+            )
+            touched = np.unique(self.puncta_ids[window])
+            touched = touched[touched != 0]
+            boxes = self.stats.loc[touched, BBOX_COLUMNS].to_numpy()
+
+            if len(boxes) == 0:
+                return window
+
+            grown = (
+                min(top, int(boxes[:, 0].min())),
+                max(bottom, int(boxes[:, 2].max())),
+                min(left, int(boxes[:, 1].min())),
+                max(right, int(boxes[:, 3].max())),
+            )
+
+            if grown == (top, bottom, left, right):
+                return window
+
+            top, bottom, left, right = grown
+
+    def update(self, puncta_data: np.ndarray, edited: TileSlices) -> None:
+        """
+        Relabels the puncta touching an edited window and replaces their
+        statistics. Untouched puncta keep their IDs, and new puncta get IDs
+        that have not been used before.
+
+        Parameters
+        ----------
+        puncta_data: np.ndarray
+            Array of the edited puncta labels layer.
+
+        edited: TileSlices
+            Window containing every edited pixel.
+        """
+
+        window = self.affected_window(edited=edited)
+        old_ids = np.unique(self.puncta_ids[window])
+        old_ids = old_ids[old_ids != 0]
+
+        new_ids, num_new = ndi.label(puncta_data[window] != 0)
+        new_ids = new_ids.astype(self.puncta_ids.dtype)
+        new_ids[new_ids != 0] += self.next_id - 1
+        self.next_id += num_new
+        self.puncta_ids[window] = new_ids
+
+        origin = (window[0].start, window[1].start)
+        new_stats = region_stats(
+            labels=new_ids,
+            image=self.image[window],
+            origin=origin,
+            distance_map=self.distance_map,
+        )
+        kept_stats = self.stats.drop(index=old_ids)
+        self.intensity_sums = pd.concat(
+            (
+                self.intensity_sums.drop(index=old_ids),
+                intensity_sums(labels=new_ids, image=self.image[window]),
+            )
+        ).sort_index()
+
+        # Empty frames are left out so that integer columns stay integers.
+        self.stats = pd.concat(
+            [stats for stats in (kept_stats, new_stats) if len(stats)]
+            or [new_stats]
+        ).sort_index()
+
+        if self.table is not None:
+            kept = ~np.isin(self.table[0], old_ids)
+            new_table = contingency_table(
+                puncta_ids=new_ids, masks=self.masks[window]
+            )
+            self.table = tuple(
+                np.concatenate((column[kept], new_column))
+                for column, new_column in zip(
+                    self.table, new_table, strict=True
+                )
+            )
+
+    def update_dirty(self, puncta_data: np.ndarray) -> None:
+        """
+        Updates every window marked dirty since the last update.
+        """
+
+        while self.dirty:
+            self.update(puncta_data=puncta_data, edited=self.dirty.pop(0))
+
+    def counts(self) -> dict[int, int]:
+        """
+        Number of puncta in each mask, or in the whole image under -1.
+        """
+
+        if self.table is None:
+            return {-1: len(self.stats)}
+
+        return puncta_per_mask(table=self.table, mask_labels=self.mask_labels)
+
+    def puncta_stats(self) -> dict[int, tuple]:
+        """
+        Area, summed intensity and mask of each punctum. Each punctum is
+        assigned to the mask it overlaps most, or -1 without masks.
+        """
+
+        ids = self.stats.index.to_numpy()
+        areas = self.stats["area"].to_numpy()
+        intensities = self.intensity_sums.loc[ids].to_numpy()
+
+        if self.table is None:
+            mask_labels = np.full(len(ids), -1)
+        else:
+            dominant = dominant_masks(
+                table=self.table, n_puncta=self.next_id - 1
+            )
+            mask_labels = dominant[ids - 1]
+
+        return {
+            int(p): (int(a), int(i), int(m))
+            for p, a, i, m in zip(
+                ids, areas, intensities, mask_labels, strict=True
+            )
+        }
+
+    def num_split(self) -> int:
+        """
+        Number of puncta that overlap more than one mask.
+        """
+
+        if self.table is None:
+            return 0
+
+        return len(split_puncta(table=self.table))
@@ -0,0 +1,537 @@
+import numpy as np
+
+from quantpunc.quantification.colocalization_metrics import mask_index
+from quantpunc.quantification.progress import ProgressCallback
+from quantpunc.quantification.tiling import iter_tiles, tile_count
+
+INTENSITY_COLOC_COLUMNS = [
+    "pixels",
+    "pearson_r",
+    "first_threshold",
+    "second_threshold",
+    "manders_m1",
+    "manders_m2",
+]
+
+THRESHOLD_METHODS = ["costes", "manual"]
+
+# Number of candidate thresholds of each mask in the Costes search.
+COSTES_STEPS = 256
+
+
+def present_mask_index(
+    masks: np.ndarray | None, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maps every pixel of a tile to an index of the masks present in it,
+    including 0.
+
+    Parameters
+    ----------
+    masks: np.ndarray | None
+        Masks of the tile. None puts every pixel in a single mask, -1.
+
+    size: int
+        Number of pixels of the tile.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Flat index of each pixel's mask, and the mask value of each index.
+    """
+
+    if masks is None:
+        return np.zeros(size, dtype=np.intp), np.array([-1])
+
+    index, mask_values = mask_index(masks)
+    present = np.flatnonzero(np.bincount(index, minlength=len(mask_values)))
+
+    if len(present) < len(mask_values):
+        lookup = np.zeros(len(mask_values), dtype=np.intp)
+        lookup[present] = np.arange(len(present))
+        index = lookup[index]
+
+    return index, mask_values[present]
+
+
+def tile_moments(
+    first: np.ndarray, second: np.ndarray, index: np.ndarray, n_masks: int
+) -> np.ndarray:
+    """
+    Computes the pixel count, means, sums of squared deviations and sum of
+    cross deviations of two channels in every mask of a tile. The
+    deviations are taken from the means of the tile, which keeps the sums
+    accurate for bright images where raw sums of squares would not be.
+
+    Returns
+    -------
+    np.ndarray
+        One row per statistic, in the order pixels, first mean, second
+        mean, first squares, second squares and cross products, and one
+        column per mask.
+    """
+
+    pixels = np.bincount(index, minlength=n_masks).astype(np.float64)
+    safe_pixels = np.maximum(pixels, 1)
+    first_means = np.bincount(index, first, minlength=n_masks) / safe_pixels
+    second_means = np.bincount(index, second, minlength=n_masks) / safe_pixels
+
+    first_dev = first - first_means[index]
+    second_dev = second - second_means[index]
+
+    return np.stack(
+        [
+            pixels,
+            first_means,
+            second_means,
+            np.bincount(index, first_dev * first_dev, minlength=n_masks),
+            np.bincount(index, second_dev * second_dev, minlength=n_masks),
+            np.bincount(index, first_dev * second_dev, minlength=n_masks),
+        ]
+    )
+
+
+def merge_moments(
+    group: np.ndarray, n_groups: int, moments: np.ndarray
+) -> np.ndarray:
+    """
+    Merges the moments of several tiles of the same masks with the
+    parallel variance formula, so that tiles can be processed in any order
+    and the result does not depend on how the image was split.
+
+    Parameters
+    ----------
+    group: np.ndarray
+        Merged mask of each column of moments.
+
+    n_groups: int
+        Number of merged masks.
+
+    moments: np.ndarray
+        Moments as returned by tile_moments, one column per tile and mask.
+
+    Returns
+    -------
+    np.ndarray
+        Moments of each merged mask.
+    """
+
+    pixels, first_means, second_means, first_sq, second_sq, cross = moments
+    total = np.bincount(group, pixels, minlength=n_groups)
+    safe_total = np.maximum(total, 1)
+    first_mean = np.bincount(group, pixels * first_means, n_groups)
+    second_mean = np.bincount(group, pixels * second_means, n_groups)
+    first_mean /= safe_total
+    second_mean /= safe_total
+
+    first_shift = first_means - first_mean[group]
+    second_shift = second_means - second_mean[group]
+
+    return np.stack(
+        [
+            total,
+            first_mean,
+            second_mean,
+            np.bincount(group, first_sq + pixels * first_shift**2, n_groups),
+            np.bincount(group, second_sq + pixels * second_shift**2, n_groups),
+            np.bincount(
+                group, cross + pixels * first_shift * second_shift, n_groups
+            ),
+        ]
+    )
+
+
+def correlation(
+    first_sq: np.ndarray, second_sq: np.ndarray, cross: np.ndarray
+) -> np.ndarray:
+    """
+    Pearson's r from sums of squared and cross deviations, NaN where either
+    channel is constant.
+    """
+
+    denominator = np.sqrt(first_sq * second_sq)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, cross / denominator, np.nan)
+
+
+def candidates_below(
+    values: np.ndarray,
+    lowest: np.ndarray,
+    step: np.ndarray,
+    n_steps: int,
+    inclusive: bool,
+) -> np.ndarray:
+    """
+    Counts the candidate thresholds lowest + (j + 1) * step, for j from 0
+    to n_steps - 1, that are below each value, or at most the value if
+    inclusive. The count is estimated by division and corrected with the
+    same comparison as a threshold is later applied with, so it is exact
+    for values that lie on a candidate.
+    """
+
+    compare = np.less_equal if inclusive else np.less
+
+    with np.errstate(invalid="ignore"):
+        counts = np.floor((values - lowest) / step)
+
+    counts = np.clip(np.nan_to_num(counts), 0, n_steps).astype(np.intp)
+
+    up = (counts < n_steps) & compare(lowest + (counts + 1) * step, values)
+    counts += up
+    down = (counts > 0) & ~compare(lowest + counts * step, values)
+    counts -= down
+
+    return counts
+
+
+def intensity_colocalization(
+    first: np.ndarray,
+    second: np.ndarray,
+    masks: np.ndarray | None,
+    thresholds: tuple[float, float] | None = None,
+    tile_size: int = 2048,
+    progress: ProgressCallback | None = None,
+) -> dict:
+    """
+    Measures the intensity colocalization of two image channels in every
+    mask: Pearson's r and Manders' M1 and M2 above thresholds of both
+    channels. Every coefficient is a ratio of per-mask sums, so the image
+    is read tile by tile and each tile is reduced to sums with bincounts,
+    which also works for images larger than memory such as dask or zarr
+    arrays.
+
+    Pearson's r and Manders' coefficients at given thresholds need a
+    single pass. Costes thresholds depend on the regression line of each
+    mask, so they take a second pass, which bins the pixels of each mask
+    by the threshold they fall below along the line. Cumulative sums over
+    the bins then give the correlation below every candidate threshold at
+    once.
+
+    Parameters
+    ----------
+    first: np.ndarray
+        2D array of the first image layer.
+
+    second: np.ndarray
+        2D array of the second image layer.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None measures the whole image under
+        -1.
+
+    thresholds: tuple[float, float] | None
+        Thresholds of the first and second channel. None picks them per
+        mask with the Costes method, as the highest thresholds on the
+        regression line below which the channels are no longer positively
+        correlated.
+
+    tile_size: int
+        Side length of the tiles read at once.
+
+    progress: ProgressCallback | None
+        Called before each tile is read.
+
+    Returns
+    -------
+    dict
+        Values of INTENSITY_COLOC_COLUMNS of each nonzero mask, rounded to
+        4 decimals. M1 is the intensity of the first channel above both
+        thresholds over its intensity above its own threshold, and M2 the
+        same for the second channel. Coefficients that are undefined, e.g.
+        for constant channels or masks where Costes finds no positive
+        regression line, are NaN.
+    """
+
+    shape = first.shape
+    tiles = [core for _, core, _ in iter_tiles(shape, tile_size, halo=0)]
+    n_passes = 1 if thresholds is not None else 2
+    n_steps = n_passes * tile_count(shape, tile_size)
+
+    def read_tile(core: tuple[slice, slice]) -> tuple:
+        first_tile = np.asarray(first[core], dtype=np.float64).reshape(-1)
+        second_tile = np.asarray(second[core], dtype=np.float64).reshape(-1)
+        mask_tile = None if masks is None else np.asarray(masks[core])
+
+        return (
+            first_tile,
+            second_tile,
+            *present_mask_index(mask_tile, size=first_tile.size),
+        )
+
+    # First pass: moments, the range of the first channel, and Manders'
+    # sums if the thresholds are known.
+    tile_values = []
+    tile_moment_list = []
+    tile_extrema = []
+    tile_manders = []
+
+    for i, core in enumerate(tiles):
+        if progress is not None:
+            progress(i / n_steps, "Summing intensities")
+
+        first_tile, second_tile, index, values = read_tile(core)
+        n_masks = len(values)
+
+        lowest = np.full(n_masks, np.inf)
+        highest = np.full(n_masks, -np.inf)
+        np.minimum.at(lowest, index, first_tile)
+        np.maximum.at(highest, index, first_tile)
+
+        tile_values.append(values)
+        tile_moment_list.append(
+            tile_moments(first_tile, second_tile, index, n_masks)
+        )
+        tile_extrema.append(np.stack([lowest, highest]))
+
+        if thresholds is not None:
+            first_above = first_tile > thresholds[0]
+            second_above = second_tile > thresholds[1]
+            both_above = first_above & second_above
+            tile_manders.append(
+                np.stack(
+                    [
+                        np.bincount(index, first_tile * both_above, n_masks),
+                        np.bincount(index, first_tile * first_above, n_masks),
+                        np.bincount(index, second_tile * both_above, n_masks),
+                        np.bincount(
+                            index, second_tile * second_above, n_masks
+                        ),
+                    ]
+                )
+            )
+
+    mask_values, group = np.unique(
+        np.concatenate(tile_values), return_inverse=True
+    )
+    group = group.reshape(-1)
+    n_groups = len(mask_values)
+
+    moments = merge_moments(
+        group=group,
+        n_groups=n_groups,
+        moments=np.concatenate(tile_moment_list, axis=1),
+    )
+    pixels, first_mean, second_mean, first_sq, second_sq, cross = moments
+    pearson = correlation(first_sq, second_sq, cross)
+
+    extrema = np.concatenate(tile_extrema, axis=1)
+    lowest = np.full(n_groups, np.inf)
+    highest = np.full(n_groups, -np.inf)
+    np.minimum.at(lowest, group, extrema[0])
+    np.maximum.at(highest, group, extrema[1])
+
+    if thresholds is not None:
+        manders = np.stack(
+            [
+                np.bincount(group, row, n_groups)
+                for row in np.concatenate(tile_manders, axis=1)
+            ]
+        )
+        first_thresholds = np.full(n_groups, float(thresholds[0]))
+        second_thresholds = np.full(n_groups, float(thresholds[1]))
+    else:
+        first_thresholds, second_thresholds, manders = costes_pass(
+            tiles=tiles,
+            read_tile=read_tile,
+            mask_values=mask_values,
+            moments=moments,
+            lowest=lowest,
+            highest=highest,
+            progress=progress,
+            n_steps=n_steps,
+        )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        manders_m1 = np.where(manders[1] > 0, manders[0] / manders[1], 0)
+        manders_m2 = np.where(manders[3] > 0, manders[2] / manders[3], 0)
+
+    manders_m1[np.isnan(first_thresholds)] = np.nan
+    manders_m2[np.isnan(first_thresholds)] = np.nan
+
+    rows = np.stack(
+        [
+            pixels,
+            pearson,
+            first_thresholds,
+            second_thresholds,
+            manders_m1,
+            manders_m2,
+        ],
+        axis=1,
+    ).round(4)
+
+    return {
+        mask_val: (int(row[0]), *row[1:].tolist())
+        for mask_val, row in zip(mask_values.tolist(), rows, strict=True)
+        if mask_val != 0
+    }
+
+
+def regression_lines(
+    moments: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fits the orthogonal regression line second = slope * first + intercept
+    of every mask from its moments. The slope is NaN where the channels are
+    not positively correlated.
+    """
+
+    _, first_mean, second_mean, first_sq, second_sq, cross = moments
+    spread = second_sq - first_sq
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(
+            cross > 0,
+            (spread + np.sqrt(spread**2 + 4 * cross**2)) / (2 * cross),
+            np.nan,
+        )
+
+    return slope, second_mean - slope * first_mean
+
+
+def costes_pass(
+    tiles: list,
+    read_tile,
+    mask_values: np.ndarray,
+    moments: np.ndarray,
+    lowest: np.ndarray,
+    highest: np.ndarray,
+    progress: ProgressCallback | None,
+    n_steps: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Second pass of intensity_colocalization, which picks the Costes
+    thresholds of every mask and sums Manders' coefficients above them.
+
+    The candidate thresholds of a mask split the range of its first channel
+    into COSTES_STEPS steps, and the second threshold follows from the
+    regression line. A pixel is below a candidate if both channels are,
+    i.e. if the larger of its first intensity and its second intensity
+    projected onto the first axis is. Each pixel is binned by the number
+    of candidates at most that value, so the pixels below a candidate are
+    those of the bins up to it.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        Thresholds of the first and second channel, and the sums of
+        Manders' coefficients in the rows first above both, first above
+        its threshold, second above both and second above its threshold.
+    """
+
+    n_groups = len(mask_values)
+    n_bins = COSTES_STEPS + 1
+    slope, intercept = regression_lines(moments)
+    defined = np.isfinite(slope) & (highest > lowest)
+
+    # Parameters of pixels outside every nonzero mask go to an extra
+    # column, whose sums are dropped.
+    def padded(array: np.ndarray, fill: float) -> np.ndarray:
+        return np.r_[np.where(defined, array, fill), fill]
+
+    line_slope = padded(slope, 1.0)
+    line_intercept = padded(intercept, 0.0)
+    range_lowest = padded(lowest, 0.0)
+    range_step = padded((highest - lowest) / COSTES_STEPS, 1.0)
+    first_mean = padded(moments[1], 0.0)
+    second_mean = padded(moments[2], 0.0)
+
+    below_sums = np.zeros((6, (n_groups + 1) * n_bins))
+    above_sums = np.zeros((4, (n_groups + 1) * n_bins))
+    n_tiles = len(tiles)
+
+    for i, core in enumerate(tiles):
+        if progress is not None:
+            progress((n_tiles + i) / n_steps, "Searching Costes thresholds")
+
+        first_tile, second_tile, index, values = read_tile(core)
+        positions = np.minimum(
+            np.searchsorted(mask_values, values), n_groups - 1
+        )
+        positions[(mask_values[positions] != values) | (values == 0)] = (
+            n_groups
+        )
+        positions = positions[index]
+
+        offsets = positions * n_bins
+        candidates = {
+            "lowest": range_lowest[positions],
+            "step": range_step[positions],
+            "n_steps": COSTES_STEPS,
+        }
+        projected = (second_tile - line_intercept[positions]) / line_slope[
+            positions
+        ]
+
+        below_bins = offsets + candidates_below(
+            np.maximum(first_tile, projected), inclusive=True, **candidates
+        )
+        first_dev = first_tile - first_mean[positions]
+        second_dev = second_tile - second_mean[positions]
+
+        for row, weights in enumerate(
+            [
+                None,
+                first_dev,
+                second_dev,
+                first_dev * first_dev,
+                second_dev * second_dev,
+                first_dev * second_dev,
+            ]
+        ):
+            below_sums[row] += np.bincount(
+                below_bins, weights, below_sums.shape[1]
+            )
+
+        both_bins, first_bins, second_bins = (
+            offsets + candidates_below(keys, inclusive=False, **candidates)
+            for keys in (
+                np.minimum(first_tile, projected),
+                first_tile,
+                projected,
+            )
+        )
+        size = above_sums.shape[1]
+        above_sums[0] += np.bincount(both_bins, first_tile, size)
+        above_sums[1] += np.bincount(first_bins, first_tile, size)
+        above_sums[2] += np.bincount(both_bins, second_tile, size)
+        above_sums[3] += np.bincount(second_bins, second_tile, size)
+
+    below = below_sums.reshape(6, n_groups + 1, n_bins)[:, :n_groups]
+    below = np.cumsum(below, axis=2)[:, :, :COSTES_STEPS]
+    pixels, first_sum, second_sum, first_sq, second_sq, cross = below
+    safe_pixels = np.maximum(pixels, 1)
+
+    below_r = correlation(
+        first_sq - first_sum**2 / safe_pixels,
+        second_sq - second_sum**2 / safe_pixels,
+        cross - first_sum * second_sum / safe_pixels,
+    )
+
+    # Scanning down from the top, the threshold is the first candidate
+    # below which the channels are not positively correlated.
+    not_positive = ~(below_r > 0)
+    candidate = np.where(
+        not_positive.any(axis=1),
+        COSTES_STEPS - 1 - np.argmax(not_positive[:, ::-1], axis=1),
+        0,
+    )
+
+    first_thresholds = (
+        range_lowest[:n_groups] + (candidate + 1) * range_step[:n_groups]
+    )
+    second_thresholds = (
+        line_slope[:n_groups] * first_thresholds + line_intercept[:n_groups]
+    )
+    first_thresholds[~defined] = np.nan
+    second_thresholds[~defined] = np.nan
+
+    # Sums above a candidate are those of the bins past it.
+    above = above_sums.reshape(4, n_groups + 1, n_bins)[:, :n_groups]
+    above = np.cumsum(above[:, :, ::-1], axis=2)[:, :, ::-1]
+    manders = np.take_along_axis(
+        above, np.broadcast_to(candidate + 1, (4, n_groups))[..., None], 2
+    )[..., 0]
+
+    return first_thresholds, second_thresholds, manders
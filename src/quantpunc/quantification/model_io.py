@@ -0,0 +1,110 @@
+import pickle
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import skimage
+import sklearn
+from sklearn.pipeline import Pipeline
+
+from quantpunc import __version__
+
+MODEL_FORMAT_VERSION = 2
+
+
+def library_versions() -> dict[str, str]:
+    return {
+        "quantpunc": __version__,
+        "numpy": np.__version__,
+        "scikit-image": skimage.__version__,
+        "scikit-learn": sklearn.__version__,
+    }
+
+
+def save_pipeline(
+    path: str | Path, model: Pipeline, metadata: dict[str, Any]
+) -> None:
+    """
+    Saves a fitted pipeline together with the information needed to
+    reproduce its input features.
+
+    The file is written uncompressed so that it can be memory-mapped when
+    loaded.
+
+    Parameters
+    ----------
+    path: str | Path
+        Destination file, conventionally with a .joblib suffix.
+
+    model: Pipeline
+        Fitted pipeline.
+
+    metadata: dict[str, Any]
+        Feature configuration and label values of the pipeline.
+    """
+
+    joblib.dump(
+        {
+            "format_version": MODEL_FORMAT_VERSION,
+            "metadata": metadata,
+            "versions": library_versions(),
+            "model": model,
+        },
+        path,
+    )
+
+
+def load_pipeline(
+    path: str | Path,
+) -> tuple[Pipeline, dict[str, Any], list[str]]:
+    """
+    Loads a pipeline saved with save_pipeline. Numpy arrays in the file are
+    memory-mapped read-only, so they are only paged in when used. Files that
+    cannot be unpickled or were saved in another format version raise a
+    ValueError.
+
+    Parameters
+    ----------
+    path: str | Path
+        File written by save_pipeline.
+
+    Returns
+    -------
+    tuple[Pipeline, dict[str, Any], list[str]]
+        The pipeline, its metadata, and the libraries whose installed
+        version differs from the one the pipeline was saved with.
+    """
+
+    try:
+        saved = joblib.load(path, mmap_mode="r")
+    except (
+        EOFError,
+        KeyError,
+        IndexError,
+        AttributeError,
+        ImportError,
+        pickle.UnpicklingError,
+    ) as err:
+        # Unpickling a truncated or foreign file fails with any of these.
+        raise ValueError(
+            f"{path} is not a readable QuantPunc model: {err!r}"
+        ) from err
+
+    if not isinstance(saved, dict) or "format_version" not in saved:
+        raise ValueError(f"{path} is not a saved QuantPunc model.")
+
+    if saved["format_version"] != MODEL_FORMAT_VERSION:
+        raise ValueError(
+            f"{path} was saved by an incompatible version of QuantPunc. "
+            "Please train the model again."
+        )
+
+    installed_versions = library_versions()
+    mismatched = [
+        library
+        for library, version in saved["versions"].items()
+        if installed_versions.get(library) != version
+    ]
+
+    return saved["model"], saved["metadata"], mismatched
@@ -0,0 +1,523 @@
+import numpy as np
+import pandas as pd
+from scipy import ndimage as ndi
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import csgraph
+
+from quantpunc.quantification.progress import ProgressCallback
+from quantpunc.quantification.puncta_counting import (
+    contingency_table,
+    dominant_masks,
+)
+
+MATCHING_METHODS = ["hungarian", "greedy"]
+
+OBJECT_COLOC_COLUMNS = [
+    "centroid_row",
+    "centroid_col",
+    "area",
+    "best_partner",
+    "best_iou",
+    "match",
+    "match_iou",
+    "mask_label",
+]
+
+# Columns of the per-mask summary, for the first and then the second layer.
+OBJECT_SUMMARY_COLUMNS = [
+    "first_puncta",
+    "first_colocalized",
+    "first_fraction",
+    "second_puncta",
+    "second_colocalized",
+    "second_fraction",
+]
+
+
+def puncta_ids(labels: np.ndarray) -> tuple[np.ndarray, int, np.ndarray]:
+    """
+    Numbers the puncta of a labels array from 1. A layer that already holds
+    more than one nonzero label, e.g. blobs labelled with instance IDs,
+    keeps its puncta, so touching puncta stay apart. Only binary layers are
+    split into connected puncta.
+
+    Parameters
+    ----------
+    labels: np.ndarray
+        Array of a puncta labels layer.
+
+    Returns
+    -------
+    tuple[np.ndarray, int, np.ndarray]
+        Puncta numbered 1 to n_ids, 0 as background, n_ids, and the ID of
+        each punctum in the layer, or 1 to n_ids for a binary layer.
+    """
+
+    label_values = np.unique(labels)
+    label_values = label_values[label_values != 0]
+
+    if len(label_values) <= 1:
+        ids, n_ids = ndi.label(labels != 0)
+
+        return ids, n_ids, np.arange(1, n_ids + 1)
+
+    ids = np.searchsorted(label_values, labels) + 1
+    ids[labels == 0] = 0
+
+    return ids, len(label_values), label_values
+
+
+def label_centroids(
+    ids: np.ndarray, n_ids: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Measures the centroid and area of every labelled punctum with one
+    bincount per coordinate.
+
+    Parameters
+    ----------
+    ids: np.ndarray
+        Puncta labelled with one ID each, 0 as background.
+
+    n_ids: int
+        Largest ID of ids.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Row and column of the centroid of puncta 1 to n_ids, one punctum
+        per row, and their areas.
+    """
+
+    flat_ids = ids.reshape(-1)
+    pixels = np.flatnonzero(flat_ids)
+    labels = flat_ids[pixels]
+    rows, cols = np.divmod(pixels, ids.shape[1])
+
+    areas = np.bincount(labels, minlength=n_ids + 1)[1:]
+    safe_areas = np.maximum(areas, 1)
+    centroids = np.column_stack(
+        (
+            np.bincount(labels, rows, minlength=n_ids + 1)[1:] / safe_areas,
+            np.bincount(labels, cols, minlength=n_ids + 1)[1:] / safe_areas,
+        )
+    )
+
+    return centroids, areas
+
+
+def puncta_masks(
+    ids: np.ndarray, n_ids: int, masks: np.ndarray | None
+) -> np.ndarray:
+    """
+    Assigns every labelled punctum to the mask it overlaps most, 0 outside
+    every mask, or to -1 without masks.
+    """
+
+    if masks is None:
+        return np.full(n_ids, -1)
+
+    return dominant_masks(
+        table=contingency_table(puncta_ids=ids, masks=masks), n_puncta=n_ids
+    )
+
+
+def mask_labels_of(masks: np.ndarray | None) -> np.ndarray:
+    """
+    Returns the nonzero masks of a masks array, or -1 without masks.
+    """
+
+    if masks is None:
+        return np.array([-1])
+
+    mask_labels = np.unique(masks)
+
+    return mask_labels[mask_labels != 0]
+
+
+def overlap_matrix(
+    first_ids: np.ndarray,
+    second_ids: np.ndarray,
+    n_first: int,
+    n_second: int,
+) -> sparse.csr_matrix:
+    """
+    Counts the pixels shared by every pair of puncta of two labelled
+    images in one pass over the pixels where both are foreground. Only
+    overlapping pairs are stored, so memory grows with the overlap rather
+    than with the product of the puncta counts.
+
+    Parameters
+    ----------
+    first_ids: np.ndarray
+        Puncta of the first layer labelled with one ID each, 0 as
+        background.
+
+    second_ids: np.ndarray
+        Puncta of the second layer labelled the same way.
+
+    n_first: int
+        Largest ID of first_ids.
+
+    n_second: int
+        Largest ID of second_ids.
+
+    Returns
+    -------
+    sparse.csr_matrix
+        Shared pixels of first punctum i + 1 and second punctum j + 1 at
+        row i and column j.
+    """
+
+    flat_first = first_ids.reshape(-1)
+    flat_second = second_ids.reshape(-1)
+    both = np.flatnonzero((flat_first != 0) & (flat_second != 0))
+
+    rows = flat_first[both].astype(np.int64) - 1
+    cols = flat_second[both].astype(np.int64) - 1
+
+    # Converting sums the duplicate entries of each pair.
+    return sparse.coo_matrix(
+        (np.ones(len(both), dtype=np.int64), (rows, cols)),
+        shape=(n_first, n_second),
+    ).tocsr()
+
+
+def pair_ious(
+    overlaps: sparse.csr_matrix,
+    first_areas: np.ndarray,
+    second_areas: np.ndarray,
+) -> tuple[np.ndarray, ...]:
+    """
+    Computes the intersection over union of every overlapping pair of
+    puncta.
+
+    Returns
+    -------
+    tuple[np.ndarray, ...]
+        First punctum ID, second punctum ID and IoU of each pair.
+    """
+
+    overlaps = overlaps.tocoo()
+    first = overlaps.row.astype(np.int64)
+    second = overlaps.col.astype(np.int64)
+    intersection = overlaps.data
+    union = first_areas[first] + second_areas[second] - intersection
+
+    return first + 1, second + 1, intersection / union
+
+
+def best_partners(
+    ids: np.ndarray, partners: np.ndarray, ious: np.ndarray, n_ids: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the partner with the highest IoU of each punctum. Ties go to the
+    smaller partner ID.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Partner and IoU of puncta 1 to n_ids, 0 for puncta without one.
+    """
+
+    order = np.lexsort((partners, -ious, ids))
+    ids, partners, ious = ids[order], partners[order], ious[order]
+    first = np.ones(len(ids), dtype=bool)
+    first[1:] = ids[1:] != ids[:-1]
+
+    best_partner = np.zeros(n_ids + 1, dtype=np.int64)
+    best_iou = np.zeros(n_ids + 1)
+    best_partner[ids[first]] = partners[first]
+    best_iou[ids[first]] = ious[first]
+
+    return best_partner[1:], best_iou[1:]
+
+
+def greedy_matches(
+    first: np.ndarray, second: np.ndarray, ious: np.ndarray
+) -> np.ndarray:
+    """
+    Matches puncta one to one by taking pairs in order of decreasing IoU
+    and skipping those with an already matched punctum.
+
+    Returns
+    -------
+    np.ndarray
+        Indices of the matched pairs.
+    """
+
+    order = np.lexsort((second, first, -ious))
+    used_first, used_second = set(), set()
+    matched = []
+
+    for pair, a, b in zip(
+        order.tolist(),
+        first[order].tolist(),
+        second[order].tolist(),
+        strict=True,
+    ):
+        if a not in used_first and b not in used_second:
+            used_first.add(a)
+            used_second.add(b)
+            matched.append(pair)
+
+    return np.array(matched, dtype=np.int64)
+
+
+def hungarian_matches(
+    first: np.ndarray,
+    second: np.ndarray,
+    ious: np.ndarray,
+    n_first: int,
+    n_second: int,
+) -> np.ndarray:
+    """
+    Matches puncta one to one so that the summed IoU is largest. Only
+    puncta linked by overlaps can compete for a partner, so the assignment
+    is solved separately on each connected group of the overlap graph.
+    Isolated pairs are matched directly and only the remaining groups,
+    which are small, are solved with a dense assignment.
+
+    Returns
+    -------
+    np.ndarray
+        Indices of the matched pairs.
+    """
+
+    if len(first) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    graph = sparse.coo_matrix(
+        (np.ones(len(first)), (first - 1, n_first + second - 1)),
+        shape=(n_first + n_second, n_first + n_second),
+    )
+    _, groups = csgraph.connected_components(graph, directed=False)
+    pair_groups = groups[first - 1]
+    pairs_per_group = np.bincount(pair_groups, minlength=groups.max() + 1)
+
+    isolated = pairs_per_group[pair_groups] == 1
+    matched = [np.flatnonzero(isolated)]
+
+    shared = np.flatnonzero(~isolated)
+    shared = shared[np.argsort(pair_groups[shared], kind="stable")]
+    bounds = np.flatnonzero(np.diff(pair_groups[shared])) + 1
+
+    for pairs in np.split(shared, bounds):
+        if len(pairs) == 0:
+            continue
+
+        rows, row_index = np.unique(first[pairs], return_inverse=True)
+        cols, col_index = np.unique(second[pairs], return_inverse=True)
+        group_ious = np.zeros((len(rows), len(cols)))
+        group_ious[row_index, col_index] = ious[pairs]
+        pair_index = np.full((len(rows), len(cols)), -1, dtype=np.int64)
+        pair_index[row_index, col_index] = pairs
+
+        assigned_rows, assigned_cols = linear_sum_assignment(
+            group_ious, maximize=True
+        )
+        assigned = pair_index[assigned_rows, assigned_cols]
+        matched.append(assigned[assigned != -1])
+
+    return np.sort(np.concatenate(matched))
+
+
+def colocalized_per_mask(
+    puncta_masks: np.ndarray,
+    colocalized: np.ndarray,
+    mask_labels: np.ndarray,
+) -> list[tuple]:
+    """
+    Counts the puncta and colocalized puncta assigned to each mask.
+
+    Parameters
+    ----------
+    puncta_masks: np.ndarray
+        Mask of each punctum.
+
+    colocalized: np.ndarray
+        Whether each punctum is colocalized.
+
+    mask_labels: np.ndarray
+        Sorted masks to report, including those without puncta.
+
+    Returns
+    -------
+    list[tuple]
+        Number of puncta, number of colocalized puncta and their fraction,
+        rounded to 4 decimals, of each mask.
+    """
+
+    if len(mask_labels) == 0:
+        return []
+
+    index = np.searchsorted(mask_labels, puncta_masks)
+    index = np.minimum(index, len(mask_labels) - 1)
+    in_mask = mask_labels[index] == puncta_masks
+
+    num_puncta = np.bincount(index[in_mask], minlength=len(mask_labels))
+    num_colocalized = np.bincount(
+        index[in_mask & colocalized], minlength=len(mask_labels)
+    )
+
+    return [
+        (total, num, 0 if total == 0 else round(num / total, 4))
+        for total, num in zip(
+            num_puncta.tolist(), num_colocalized.tolist(), strict=True
+        )
+    ]
+
+
+def object_colocalization(
+    first: np.ndarray,
+    second: np.ndarray,
+    masks: np.ndarray | None,
+    method: str = "hungarian",
+    min_iou: float = 0.0,
+    progress: ProgressCallback | None = None,
+) -> tuple[pd.DataFrame, dict[int, tuple]]:
+    """
+    Colocalizes the puncta of two labels layers object by object. Each
+    layer is split into puncta with puncta_ids, the pixels shared by every
+    pair of puncta are counted in a sparse overlap matrix, and puncta are
+    matched one to one by their IoU. A punctum is colocalized if it has a
+    match.
+
+    Parameters
+    ----------
+    first: np.ndarray
+        Array of the first puncta labels layer.
+
+    second: np.ndarray
+        Array of the second puncta labels layer.
+
+    masks: np.ndarray | None
+        Array of a masks label layer. None summarizes the whole image under
+        -1.
+
+    method: str
+        "hungarian" maximizes the summed IoU of the matches, "greedy"
+        matches pairs in order of decreasing IoU.
+
+    min_iou: float
+        Smallest IoU of a pair that can be matched. Puncta always need to
+        overlap to be matched.
+
+    progress: ProgressCallback | None
+        Called before each stage.
+
+    Returns
+    -------
+    tuple[pd.DataFrame, dict[int, tuple]]
+        Table of the first layer's puncta, indexed by their ID, with the
+        columns of OBJECT_COLOC_COLUMNS, and the values of
+        OBJECT_SUMMARY_COLUMNS for each mask. Partner and match IDs are
+        puncta of the second layer, 0 where there is none. IDs are those
+        of puncta_ids.
+    """
+
+    if method not in MATCHING_METHODS:
+        raise ValueError(f"Unknown matching method: {method}")
+
+    if progress is not None:
+        progress(0, "Labelling puncta")
+
+    first_ids, n_first, first_values = puncta_ids(first)
+    second_ids, n_second, second_values = puncta_ids(second)
+    # Layer ID of each second punctum, and 0 for none.
+    second_lookup = np.r_[0, second_values]
+
+    if progress is not None:
+        progress(0.3, "Measuring overlaps")
+
+    first_centroids, first_areas = label_centroids(
+        ids=first_ids, n_ids=n_first
+    )
+    second_areas = np.bincount(second_ids.reshape(-1), minlength=n_second + 1)[
+        1:
+    ]
+    overlaps = overlap_matrix(
+        first_ids=first_ids,
+        second_ids=second_ids,
+        n_first=n_first,
+        n_second=n_second,
+    )
+    first_pairs, second_pairs, ious = pair_ious(
+        overlaps=overlaps, first_areas=first_areas, second_areas=second_areas
+    )
+
+    best_partner, best_iou = best_partners(
+        ids=first_pairs, partners=second_pairs, ious=ious, n_ids=n_first
+    )
+
+    if progress is not None:
+        progress(0.5, "Matching puncta")
+
+    candidates = np.flatnonzero(ious >= min_iou)
+
+    if method == "greedy":
+        matched = greedy_matches(
+            first=first_pairs[candidates],
+            second=second_pairs[candidates],
+            ious=ious[candidates],
+        )
+    else:
+        matched = hungarian_matches(
+            first=first_pairs[candidates],
+            second=second_pairs[candidates],
+            ious=ious[candidates],
+            n_first=n_first,
+            n_second=n_second,
+        )
+
+    matched = candidates[matched]
+    match = np.zeros(n_first + 1, dtype=np.int64)
+    match_iou = np.zeros(n_first + 1)
+    match[first_pairs[matched]] = second_pairs[matched]
+    match_iou[first_pairs[matched]] = ious[matched]
+    second_matched = np.zeros(n_second + 1, dtype=bool)
+    second_matched[second_pairs[matched]] = True
+
+    if progress is not None:
+        progress(0.8, "Summarizing masks")
+
+    mask_labels = mask_labels_of(masks)
+    first_masks = puncta_masks(ids=first_ids, n_ids=n_first, masks=masks)
+    second_masks = puncta_masks(ids=second_ids, n_ids=n_second, masks=masks)
+
+    table = pd.DataFrame(
+        {
+            "centroid_row": first_centroids[:, 0],
+            "centroid_col": first_centroids[:, 1],
+            "area": first_areas,
+            "best_partner": second_lookup[best_partner],
+            "best_iou": best_iou.round(4),
+            "match": second_lookup[match[1:]],
+            "match_iou": match_iou[1:].round(4),
+            "mask_label": first_masks,
+        },
+        index=pd.Index(first_values, name="puncta_id"),
+    )
+
+    first_summary = colocalized_per_mask(
+        puncta_masks=first_masks,
+        colocalized=match[1:] != 0,
+        mask_labels=mask_labels,
+    )
+    second_summary = colocalized_per_mask(
+        puncta_masks=second_masks,
+        colocalized=second_matched[1:],
+        mask_labels=mask_labels,
+    )
+    summary = {
+        mask_val: first_counts + second_counts
+        for mask_val, first_counts, second_counts in zip(
+            mask_labels.tolist(),
+            first_summary,
+            second_summary,
+            strict=True,
+        )
+    }
+
+    return table, summary
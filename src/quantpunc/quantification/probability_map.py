@@ -0,0 +1,87 @@
+import numpy as np
+
+UINT8_SCALE = 255
+
+
+def probability_dtype_for_budget(
+    shape: tuple[int, ...], memory_budget_mb: float | None
+) -> np.dtype:
+    """
+    Picks float16 for probability maps that take up at most an eighth of
+    the memory budget, and uint8 for larger ones.
+
+    Parameters
+    ----------
+    shape: tuple[int, ...]
+        Dimensions of the image.
+
+    memory_budget_mb: float | None
+        Memory budget of the labeler in megabytes. None always picks
+        float16.
+
+    Returns
+    -------
+    np.dtype
+        Data type of the cached probability map.
+    """
+
+    if memory_budget_mb is None:
+        return np.dtype(np.float16)
+
+    float16_bytes = int(np.prod(shape)) * 2
+
+    if float16_bytes <= memory_budget_mb * 1024**2 / 8:
+        return np.dtype(np.float16)
+
+    return np.dtype(np.uint8)
+
+
+def quantize_probability(
+    probability: np.ndarray, dtype: np.dtype
+) -> np.ndarray:
+    """
+    Converts probabilities in [0, 1] to the storage type of a probability
+    map. uint8 maps hold the probability scaled to [0, 255].
+    """
+
+    if np.dtype(dtype) == np.uint8:
+        return np.rint(probability * UINT8_SCALE).astype(np.uint8)
+
+    return probability.astype(dtype)
+
+
+def threshold_probability(
+    probability_map: np.ndarray, threshold: float
+) -> np.ndarray:
+    """
+    Marks the pixels whose probability exceeds a threshold.
+
+    Parameters
+    ----------
+    probability_map: np.ndarray
+        Map created with quantize_probability.
+
+    threshold: float
+        Probability in [0, 1].
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array of the pixels above the threshold.
+    """
+
+    if probability_map.dtype == np.uint8:
+        return probability_map > threshold * UINT8_SCALE
+
+    return probability_map > threshold
+
+
+def probability_for_display(probability_map: np.ndarray) -> np.ndarray:
+    """
+    Returns probabilities as float32 in [0, 1] for an image layer.
+    """
+
+    if probability_map.dtype == np.uint8:
+        return probability_map.astype(np.float32) / UINT8_SCALE
+
+    return probability_map.astype(np.float32)
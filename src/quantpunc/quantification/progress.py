@@ -0,0 +1,69 @@
+import threading
+from collections.abc import Callable
+
+# Reports the fraction of a task that is done and the stage it is in.
+ProgressCallback = Callable[[float, str], None]
+
+
+class TaskCancelled(Exception):
+    """
+    Raised inside a task to stop it once it has been cancelled.
+    """
+
+
+class CancelToken:
+    """
+    Flag that a running task checks between stages to find out whether it
+    should stop. Setting it is safe from any thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise TaskCancelled
+
+
+def stage_progress(
+    progress: ProgressCallback | None, cancel_token: CancelToken | None
+) -> ProgressCallback:
+    """
+    Combines an optional progress callback and cancel token into a single
+    callback, which raises TaskCancelled once the token is cancelled. Long
+    computations then only need a progress argument to be both observable
+    and interruptible.
+    """
+
+    def report(fraction: float, message: str = "") -> None:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
+        if progress is not None:
+            progress(fraction, message)
+
+    return report
+
+
+def sub_progress(
+    progress: ProgressCallback | None, start: float, stop: float
+) -> ProgressCallback | None:
+    """
+    Maps the progress of one stage onto the part of a task between start
+    and stop.
+    """
+
+    if progress is None:
+        return None
+
+    def report(fraction: float, message: str = "") -> None:
+        progress(start + fraction * (stop - start), message)
+
+    return report
@@ -1,30 +1,45 @@
+import threading
 from typing import TYPE_CHECKING
 
 import numpy as np
 from napari.utils.notifications import show_error, show_info
+from qtpy.QtCore import Qt, QTimer
 from qtpy.QtGui import QIntValidator
 from qtpy.QtWidgets import (
     QComboBox,
     QFormLayout,
+    QFrame,
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QPushButton,
+    QScrollArea,
     QSizePolicy,
     QVBoxLayout,
     QWidget,
 )
-from scipy.ndimage import center_of_mass, label
-from scipy.ndimage import sum as ndimage_sum
 
 from quantpunc.combobox_manager import ComboBoxManager
+from quantpunc.quantification.abstract_puncta_labeler import (
+    supports_progress,
+)
+from quantpunc.quantification.incremental_counts import (
+    PunctaCountState,
+    paint_bounding_box,
+    source_key,
+)
+from quantpunc.quantification.progress import CancelToken, ProgressCallback
 from quantpunc.quantification.puncta_labeler_registry import (
     PUNCTA_LABELER_REGISTRY,
     register_default_puncta_labelers,
 )
+from quantpunc.quantification.rasterize import instance_disk_stats
+from quantpunc.quantification.region_stats import region_stats
 from quantpunc.table.table_widget import TableWidget
+from quantpunc.task_runner import TaskRunner
 
 if TYPE_CHECKING:
+    import pandas as pd
     from napari import Viewer, layers
 register_default_puncta_labelers()
 
@@ -34,8 +49,13 @@ class PunctaAnalyzer(QWidget):
         super().__init__()
         self.viewer = viewer
         self.table_widget = table_widget
+        self.count_states: dict[str, PunctaCountState] = {}
+        # Held while a count is updated, on a worker thread or after edits.
+        self._count_lock = threading.Lock()
         self._init_widget()
 
+        self.viewer.layers.events.removed.connect(self._drop_removed_layer)
+
     def get_puncta_labels(self) -> None:
         """
         Produces puncta labels for an image using a user-specified method and
@@ -72,30 +92,68 @@ class PunctaAnalyzer(QWidget):
             mask_data = mask_data.astype(np.uint16)
 
         label_intensity = int(self.intensity_line_edit.text())
+        puncta_layer_name = f"{layer.name}_puncta"
+        labeler = self.blob_labeler
 
-        blob_labels = self.blob_labeler.label_puncta(
-            image=img,
-            masks=mask_data,
-            label_intensity=label_intensity,
-        )
-
-        if blob_labels.size == 0:
-            show_info("No puncta were detected.")
+        try:
+            parameters = labeler.labeling_parameters()
+        except ValueError as err:
+            show_error(str(err))
             return
 
-        puncta_layer_name = f"{layer.name}_puncta"
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> np.ndarray:
+            progress(0, "Labeling puncta")
+
+            if not supports_progress(labeler):
+                return labeler.label_puncta(
+                    image=img,
+                    masks=mask_data,
+                    label_intensity=label_intensity,
+                    **parameters,
+                )
 
-        if puncta_layer_name in self.viewer.layers:
-            self.viewer.layers.remove(puncta_layer_name)
+            return labeler.label_puncta(
+                image=img,
+                masks=mask_data,
+                label_intensity=label_intensity,
+                progress=progress,
+                cancel_token=cancel_token,
+                **parameters,
+            )
 
-        self.viewer.add_labels(
-            data=blob_labels,
-            name=puncta_layer_name,
-        )
+        def add_puncta_layer(blob_labels: np.ndarray) -> None:
+            labeler.update_viewer()
 
-        self.viewer.layers.selection.active = self.viewer.layers[
-            puncta_layer_name
-        ]
+            if blob_labels.size == 0:
+                show_info("No puncta were detected.")
+                return
+
+            if puncta_layer_name in self.viewer.layers:
+                self.viewer.layers.remove(puncta_layer_name)
+
+            puncta_layer = self.viewer.add_labels(
+                data=blob_labels,
+                name=puncta_layer_name,
+                metadata=labeler.layer_metadata(),
+            )
+
+            if "blob_table" in puncta_layer.metadata:
+                # Edits make the table stale, so counting falls back to
+                # relabelling the layer.
+                puncta_layer.events.paint.connect(self._drop_blob_table)
+                puncta_layer.events.data.connect(self._drop_blob_table)
+
+            self.viewer.layers.selection.active = self.viewer.layers[
+                puncta_layer_name
+            ]
+
+        self.task_runner.run(
+            task=task,
+            on_returned=add_puncta_layer,
+            button=self.label_puncta_button,
+        )
 
     def get_puncta_counts_and_stats(self) -> None:
         """
@@ -123,109 +181,355 @@ class PunctaAnalyzer(QWidget):
             )
             return
 
-        puncta_labels = np.unique(puncta_layer.data)
-        puncta_labels = puncta_labels[puncta_labels != 0]
-
-        puncta_region = np.isin(puncta_layer.data, puncta_labels)
-        counts: dict[int, int] = {}
-
         mask_layer = self.mask_combobox.currentData()
+        mask_data = None
 
         if mask_layer is not None:
             if mask_layer.data.ndim > 2:
                 show_error("Mask layer should be a 2D image.")
                 return
 
-            mask_labels = np.unique(mask_layer.data)
-            mask_labels = mask_labels[mask_labels != 0]
+            mask_data = mask_layer.data
 
-            for mask_val in mask_labels:
-                mask_region = mask_layer.data == mask_val
-                combined_region = np.logical_and(mask_region, puncta_region)
-                _, num_puncta = label(combined_region)
+        table = puncta_layer.metadata.get("blob_table")
+        image = layer.data
+        name = layer.name
+        puncta_id = puncta_layer.unique_id
+        # Painting goes on while counting, so the count is made from a copy.
+        puncta_data = puncta_layer.data.copy()
+
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> tuple:
+            progress(0, "Counting puncta")
+
+            if table is not None:
+                counts, puncta_stats = self.blob_counts_and_stats(
+                    table=table,
+                    image=image,
+                    puncta_labels=puncta_data,
+                    mask_data=mask_data,
+                )
+                progress(0.5, "Measuring puncta")
+                stats = region_stats(
+                    labels=puncta_data, image=image, masks=mask_data
+                )
 
-                counts[mask_val] = num_puncta
+                return counts, puncta_stats, stats, None
 
-        else:
-            _, num_puncta = label(puncta_region)
-            counts[-1] = num_puncta
+            with self._count_lock:
+                state = self.count_state(
+                    image=image,
+                    puncta_id=puncta_id,
+                    puncta_data=puncta_data,
+                    mask_data=mask_data,
+                )
+                progress(0.8, "Building tables")
+
+                return state.counts(), state.puncta_stats(), state.stats, state
+
+        def store_counts(result: tuple) -> None:
+            counts, puncta_stats, stats, state = result
+
+            # A layer removed while counting has no count to keep.
+            if state is not None and puncta_layer in self.viewer.layers:
+                if puncta_id not in self.count_states:
+                    puncta_layer.events.paint.connect(self._mark_painted)
+                    puncta_layer.events.data.connect(self._drop_count_state)
+
+                self.count_states[puncta_id] = state
+                num_split = state.num_split()
+
+                if num_split:
+                    show_info(
+                        f"{num_split} of {len(stats)} puncta span more than "
+                        "one mask and are counted in each of them."
+                    )
+
+            self._store_tables(
+                name=name,
+                puncta_layer=puncta_layer,
+                counts=counts,
+                puncta_stats=puncta_stats,
+                stats=stats,
+            )
+            self.viewer.layers.selection.active = puncta_layer
 
-        count_dict_model = self.table_widget.count_table_view.dict_model
+            if state is not None and state.dirty:
+                # Paint events that arrived while counting.
+                self._recount_painted(puncta_layer)
 
-        count_dict_model.names_to_uuids[layer.name] = puncta_layer.unique_id
-        count_dict_model.data_dict[puncta_layer.unique_id] = {
-            "name": layer.name,
-            "data": counts,
-        }
+        self.task_runner.run(
+            task=task,
+            on_returned=store_counts,
+            button=self.count_puncta_button,
+        )
+
+    def count_state(
+        self,
+        image: np.ndarray,
+        puncta_id: str,
+        puncta_data: np.ndarray,
+        mask_data: np.ndarray | None,
+    ) -> PunctaCountState:
+        """
+        Returns the count of a puncta labels layer, brought up to date with
+        its data. A count is kept per layer so that later counts and edits
+        only relabel the puncta that changed, and it is rebuilt when the
+        image or masks differ from the ones it was made from.
+
+        Parameters
+        ----------
+        image: np.ndarray
+            Array of the labeled image layer.
+
+        puncta_id: str
+            Unique ID of the puncta labels layer.
+
+        puncta_data: np.ndarray
+            Array of the puncta labels layer, counted as connected
+            components.
+
+        mask_data: np.ndarray | None
+            Array of a masks label layer. None counts the whole image.
+
+        Returns
+        -------
+        PunctaCountState
+            Count of puncta_data.
+        """
+
+        key = source_key(image=image, masks=mask_data)
+        state = self.count_states.get(puncta_id)
 
-        unique_puncta_labels, _ = label(puncta_layer.data)
-        puncta_mask = unique_puncta_labels != 0
+        if state is not None and state.key == key:
+            # Undo and redo emit no paint event, so the data is compared
+            # with the count before reusing it. Windows marked dirty stay
+            # marked, since they may have been painted after puncta_data
+            # was taken.
+            window = state.changed_window(puncta_data=puncta_data)
 
-        puncta_ids = np.unique(unique_puncta_labels)
-        puncta_ids = puncta_ids[puncta_ids != 0]
+            if window is not None:
+                state.update(puncta_data=puncta_data, edited=window)
 
-        areas = np.bincount(unique_puncta_labels.ravel())[1:]
-        intensities = ndimage_sum(
-            layer.data,
-            labels=unique_puncta_labels,
-            index=puncta_ids,
+            return state
+
+        return PunctaCountState(
+            puncta_data=puncta_data,
+            image=image,
+            masks=mask_data,
+            key=key,
         )
 
-        if mask_layer is not None:
-            mask_labels = []
-            centroids = center_of_mass(
-                puncta_mask,
-                labels=unique_puncta_labels,
-                index=puncta_ids,
-            )
+    def blob_counts_and_stats(
+        self,
+        table: dict[str, np.ndarray],
+        image: np.ndarray,
+        puncta_labels: np.ndarray,
+        mask_data: np.ndarray | None,
+    ) -> tuple[dict[int, int], dict[int, tuple]]:
+        """
+        Counts the puncta of a labels layer drawn by a blob labeler with
+        instance IDs from its blob table. Every blob is a punctum, even if it
+        touches another, and only the blobs' pixels are visited.
+
+        Parameters
+        ----------
+        table: dict[str, np.ndarray]
+            Blob table from the layer's metadata.
+
+        image: np.ndarray
+            Array of the labeled image layer.
 
-            for y, x in centroids:
-                y, x = int(round(y)), int(round(x))
-                mask_label = mask_layer.data[y, x]
-                mask_labels.append(mask_label)
+        puncta_labels: np.ndarray
+            Array of the puncta labels layer.
+
+        mask_data: np.ndarray | None
+            Array of a masks label layer. None counts the whole image.
+
+        Returns
+        -------
+        tuple[dict[int, int], dict[int, tuple]]
+            Number of puncta in each mask (-1 without masks), and the area,
+            summed intensity and mask of each punctum.
+        """
+
+        _, intensities = instance_disk_stats(
+            labels=puncta_labels,
+            centers=np.column_stack((table["row"], table["col"])),
+            radii=table["sigma"],
+            image=image,
+        )
+
+        # Blobs hidden by larger IDs are not visible in the layer.
+        visible = table["area"] > 0
+        puncta_ids = table["id"][visible]
+        areas = table["area"][visible]
+        intensities = intensities[visible]
+
+        if mask_data is not None:
+            mask_ids = mask_data[table["row"], table["col"]][visible]
+            mask_labels = np.unique(mask_data)
+            mask_labels = mask_labels[mask_labels != 0]
+            counted, num_puncta = np.unique(mask_ids, return_counts=True)
+            num_puncta_per_mask = dict(zip(counted, num_puncta, strict=True))
+
+            counts = {
+                mask_val: int(num_puncta_per_mask.get(mask_val, 0))
+                for mask_val in mask_labels
+            }
 
         else:
-            mask_labels = [-1] * len(puncta_ids)
+            mask_ids = np.full(len(puncta_ids), -1)
+            counts = {-1: len(puncta_ids)}
 
-        puncta_stats: dict[int, tuple] = {
+        puncta_stats = {
             int(p): (int(a), int(i), int(m))
             for p, a, i, m in zip(
-                puncta_ids,
-                areas,
-                intensities,
-                mask_labels,
+                puncta_ids, areas, intensities, mask_ids, strict=True
             )
         }
 
+        return counts, puncta_stats
+
+    def _store_tables(
+        self,
+        name: str,
+        puncta_layer: "layers.Labels",
+        counts: dict[int, int],
+        puncta_stats: dict[int, tuple],
+        stats: "pd.DataFrame",
+    ) -> None:
+        """
+        Stores the counts and statistics of a puncta labels layer in the
+        tables under the name of its image, and shows them.
+        """
+
+        count_dict_model = self.table_widget.count_table_view.dict_model
+
+        count_dict_model.names_to_uuids[name] = puncta_layer.unique_id
+        count_dict_model.data_dict[puncta_layer.unique_id] = {
+            "name": name,
+            "data": counts,
+        }
+
         puncta_dict_model = self.table_widget.puncta_table_view.dict_model
 
-        puncta_dict_model.names_to_uuids[layer.name] = puncta_layer.unique_id
+        puncta_dict_model.names_to_uuids[name] = puncta_layer.unique_id
         puncta_dict_model.data_dict[puncta_layer.unique_id] = {
-            "name": layer.name,
+            "name": name,
             "data": puncta_stats,
         }
 
+        region_dict_model = self.table_widget.region_table_view.dict_model
+
+        region_dict_model.names_to_uuids[name] = puncta_layer.unique_id
+        region_dict_model.data_dict[puncta_layer.unique_id] = {
+            "name": name,
+            "data": dict(
+                zip(
+                    stats.index.tolist(),
+                    stats.itertuples(index=False, name=None),
+                    strict=True,
+                )
+            ),
+        }
+
         if not self.table_widget.save_initialized:
             self.table_widget.initialize_table_settings()
 
-        selection_index = self.table_widget.table_selection_box.findText(
-            layer.name
-        )
+        selection_index = self.table_widget.table_selection_box.findText(name)
 
         if selection_index == -1:
             (
                 self.table_widget.table_selection_box.addItem(
-                    layer.name, userData=puncta_layer.unique_id
+                    name, userData=puncta_layer.unique_id
                 )
             )
 
             selection_index = self.table_widget.table_selection_box.findText(
-                layer.name
+                name
             )
 
         self.table_widget.table_selection_box.setCurrentIndex(0)
         self.table_widget.table_selection_box.setCurrentIndex(selection_index)
-        self.viewer.layers.selection.active = puncta_layer
+
+    def _mark_painted(self, event) -> None:
+        """
+        Marks the windows of a paint event dirty in the count of the painted
+        layer. Paint events can arrive before the layer's data is written, so
+        the count is updated once control returns to the event loop.
+        """
+
+        puncta_layer = event.source
+        state = self.count_states.get(puncta_layer.unique_id)
+
+        if state is None:
+            return
+
+        for atom in event.value:
+            window = paint_bounding_box(atom)
+
+            if window is not None:
+                state.dirty.append(window)
+
+        QTimer.singleShot(0, lambda: self._recount_painted(puncta_layer))
+
+    def _recount_painted(self, puncta_layer: "layers.Labels") -> None:
+        """
+        Updates the count of a painted puncta labels layer, and refreshes its
+        tables if they are shown.
+        """
+
+        state = self.count_states.get(puncta_layer.unique_id)
+
+        if state is None or not state.dirty:
+            return
+
+        if not self._count_lock.acquire(blocking=False):
+            # A count is being made on a worker thread, which brings the
+            # dirty windows up to date once it returns.
+            return
+
+        try:
+            state.update_dirty(puncta_data=puncta_layer.data)
+        finally:
+            self._count_lock.release()
+
+        count_dict_model = self.table_widget.count_table_view.dict_model
+        counted = count_dict_model.data_dict.get(puncta_layer.unique_id)
+
+        if counted is None:
+            return
+
+        self._store_tables(
+            name=counted["name"],
+            puncta_layer=puncta_layer,
+            counts=state.counts(),
+            puncta_stats=state.puncta_stats(),
+            stats=state.stats,
+        )
+
+    def _drop_count_state(self, event) -> None:
+        self._forget_count_state(puncta_layer=event.source)
+
+    def _drop_removed_layer(self, event) -> None:
+        self._forget_count_state(puncta_layer=event.value)
+
+    def _forget_count_state(self, puncta_layer: "layers.Layer") -> None:
+        """
+        Drops the count of a puncta labels layer and stops following its
+        edits, e.g., once the layer is removed or its data is replaced.
+        """
+
+        if self.count_states.pop(puncta_layer.unique_id, None) is None:
+            return
+
+        puncta_layer.events.paint.disconnect(self._mark_painted)
+        puncta_layer.events.data.disconnect(self._drop_count_state)
+
+    def _drop_blob_table(self, event) -> None:
+        event.source.metadata.pop("blob_table", None)
 
     def _init_widget(self) -> None:
         self.main_layout = QVBoxLayout()
@@ -262,24 +566,29 @@ class PunctaAnalyzer(QWidget):
         intensity_form_layout.addRow(intensity_label, self.intensity_line_edit)
 
         count_buttons_layout = QHBoxLayout()
-        label_puncta_button = QPushButton("Label puncta")
-        label_puncta_button.setObjectName("label_button")
-        label_puncta_button.clicked.connect(self.get_puncta_labels)
-        count_buttons_layout.addWidget(label_puncta_button)
-
-        count_puncta_button = QPushButton("Count puncta")
-        count_puncta_button.setObjectName("count_button")
-        count_puncta_button.clicked.connect(self.get_puncta_counts_and_stats)
-        count_buttons_layout.addWidget(count_puncta_button)
-
-        self.main_layout.addWidget(img_label)
-        self.main_layout.addWidget(self.img_combobox)
-        self.main_layout.addWidget(mask_label)
-        self.main_layout.addWidget(self.mask_combobox)
-        self.main_layout.addWidget(method_label)
-        self.main_layout.addWidget(self.method_combobox)
+        self.label_puncta_button = QPushButton("Label puncta")
+        self.label_puncta_button.setObjectName("label_button")
+        self.label_puncta_button.clicked.connect(self.get_puncta_labels)
+        count_buttons_layout.addWidget(self.label_puncta_button)
+
+        self.count_puncta_button = QPushButton("Count puncta")
+        self.count_puncta_button.setObjectName("count_button")
+        self.count_puncta_button.clicked.connect(
+            self.get_puncta_counts_and_stats
+        )
+        count_buttons_layout.addWidget(self.count_puncta_button)
+
+        self.task_runner = TaskRunner()
+
+        selection_form_layout = QFormLayout()
+        selection_form_layout.addRow(img_label, self.img_combobox)
+        selection_form_layout.addRow(mask_label, self.mask_combobox)
+        selection_form_layout.addRow(method_label, self.method_combobox)
+
+        self.main_layout.addLayout(selection_form_layout)
         self.main_layout.addLayout(intensity_form_layout)
         self.main_layout.addLayout(count_buttons_layout)
+        self.main_layout.addWidget(self.task_runner)
         self.main_layout.setSpacing(7)
         self.main_layout.setContentsMargins(7, 5, 7, 5)
 
@@ -289,18 +598,21 @@ class PunctaAnalyzer(QWidget):
         self.blob_labeler = selected_method(
             viewer=self.viewer, puncta_analyzer=self
         )
-        self.method_layout = self.blob_labeler.initialize_widgets()
-        self.method_layout_index = (
-            self.main_layout.indexOf(self.method_combobox) + 1
-        )
-        self.main_layout.insertLayout(
-            self.method_layout_index, self.method_layout
+        # The options of some labelers are taller than the tab, so they
+        # scroll instead of squeezing the rest of the widget.
+        self.method_scroll_area = QScrollArea()
+        self.method_scroll_area.setWidgetResizable(True)
+        self.method_scroll_area.setFrameShape(QFrame.Shape.NoFrame)
+        self.method_scroll_area.setHorizontalScrollBarPolicy(
+            Qt.ScrollBarPolicy.ScrollBarAlwaysOff
         )
+        self._set_method_widget()
+
+        self.main_layout.insertWidget(1, self.method_scroll_area, stretch=1)
 
         self.setLayout(self.main_layout)
 
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.setMaximumHeight(500)
 
     def _update_parameters(self) -> None:
         """
@@ -308,30 +620,20 @@ class PunctaAnalyzer(QWidget):
         and replaces them with the widgets associated with the current one.
         """
 
-        while self.method_layout.count():
-            item = self.method_layout.takeAt(0)
-
-            if item is None:
-                return
-
-            widget = item.widget()
-
-            if widget:
-                widget.deleteLater()
-
-        for i in range(self.main_layout.count()):
-            item = self.main_layout.itemAt(i)
-            if item and item.layout() == self.method_layout:
-                self.main_layout.takeAt(i)
-                break
-
         selected_labeler = self.method_combobox.currentText()
         selected_method = PUNCTA_LABELER_REGISTRY[selected_labeler]
 
         self.blob_labeler = selected_method(
             viewer=self.viewer, puncta_analyzer=self
         )
+        self._set_method_widget()
+
+    def _set_method_widget(self) -> None:
         self.method_layout = self.blob_labeler.initialize_widgets()
-        self.main_layout.insertLayout(
-            self.method_layout_index, self.method_layout
-        )
+        self.method_layout.setContentsMargins(0, 0, 0, 0)
+
+        method_widget = QWidget()
+        method_widget.setLayout(self.method_layout)
+
+        # Replacing the scroll area's widget deletes the previous one.
+        self.method_scroll_area.setWidget(method_widget)
@@ -0,0 +1,133 @@
+import numpy as np
+
+# Punctum IDs, mask IDs and number of shared pixels of every overlapping
+# pair.
+ContingencyTable = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def contingency_table(
+    puncta_ids: np.ndarray, masks: np.ndarray
+) -> ContingencyTable:
+    """
+    Counts the pixels shared by every punctum and mask in one pass over the
+    puncta pixels. Pairs of puncta with mask 0 hold the pixels outside every
+    mask.
+
+    Parameters
+    ----------
+    puncta_ids: np.ndarray
+        Puncta labelled with one ID each, 0 as background.
+
+    masks: np.ndarray
+        Array of a masks label layer with the same shape.
+
+    Returns
+    -------
+    ContingencyTable
+        Punctum ID, mask ID and pixel count of each pair, sorted by punctum
+        and then mask.
+    """
+
+    flat_puncta = puncta_ids.reshape(-1)
+    inside = np.flatnonzero(flat_puncta)
+    puncta = flat_puncta[inside].astype(np.int64)
+    mask_ids = masks.reshape(-1)[inside].astype(np.int64)
+
+    if len(inside) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    n_masks = int(mask_ids.max()) + 1
+    keys = puncta * n_masks + mask_ids
+    n_keys = (int(puncta.max()) + 1) * n_masks
+
+    # A dense histogram is faster than sorting while it stays small.
+    if n_keys <= 4 * len(keys) + 1024:
+        pixel_counts = np.bincount(keys, minlength=n_keys)
+        keys = np.flatnonzero(pixel_counts)
+        pixel_counts = pixel_counts[keys]
+    else:
+        keys, pixel_counts = np.unique(keys, return_counts=True)
+
+    return keys // n_masks, keys % n_masks, pixel_counts
+
+
+def puncta_per_mask(
+    table: ContingencyTable, mask_labels: np.ndarray
+) -> dict[int, int]:
+    """
+    Counts the puncta overlapping each mask. A punctum that spans several
+    masks is counted in each of them.
+
+    Parameters
+    ----------
+    table: ContingencyTable
+        Table from contingency_table.
+
+    mask_labels: np.ndarray
+        Masks to report, including those without puncta.
+
+    Returns
+    -------
+    dict[int, int]
+        Number of puncta of each mask.
+    """
+
+    _, mask_ids, _ = table
+    counted, num_puncta = np.unique(
+        mask_ids[mask_ids != 0], return_counts=True
+    )
+    num_puncta_per_mask = dict(
+        zip(counted.tolist(), num_puncta.tolist(), strict=True)
+    )
+
+    return {
+        mask_val: num_puncta_per_mask.get(int(mask_val), 0)
+        for mask_val in mask_labels
+    }
+
+
+def dominant_masks(table: ContingencyTable, n_puncta: int) -> np.ndarray:
+    """
+    Finds the mask sharing the most pixels with each punctum. Ties go to
+    the smaller mask ID.
+
+    Parameters
+    ----------
+    table: ContingencyTable
+        Table from contingency_table.
+
+    n_puncta: int
+        Largest punctum ID.
+
+    Returns
+    -------
+    np.ndarray
+        Mask of puncta 1 to n_puncta, 0 for puncta outside every mask.
+    """
+
+    puncta, mask_ids, pixel_counts = table
+    in_mask = mask_ids != 0
+    puncta, mask_ids = puncta[in_mask], mask_ids[in_mask]
+    pixel_counts = pixel_counts[in_mask]
+
+    order = np.lexsort((mask_ids, -pixel_counts, puncta))
+    puncta, mask_ids = puncta[order], mask_ids[order]
+    first = np.r_[True, puncta[1:] != puncta[:-1]]
+
+    dominant = np.zeros(n_puncta + 1, dtype=np.int64)
+    dominant[puncta[first]] = mask_ids[first]
+
+    return dominant[1:]
+
+
+def split_puncta(table: ContingencyTable) -> np.ndarray:
+    """
+    Returns the IDs of the puncta that overlap more than one mask.
+    """
+
+    puncta, mask_ids, _ = table
+    puncta_in_masks = puncta[mask_ids != 0]
+    ids, num_masks = np.unique(puncta_in_masks, return_counts=True)
+
+    return ids[num_masks > 1]
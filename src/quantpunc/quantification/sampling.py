@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+
+SAMPLING_MODES = ("spatial", "stratified")
+
+
+def balanced_sample(
+    labels: np.ndarray,
+    max_per_class: int,
+    pixel_indices: np.ndarray | None = None,
+    shape: tuple[int, ...] | None = None,
+    mode: str = "spatial",
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Selects at most max_per_class training samples of every class. Classes
+    with fewer samples are kept whole, so large flood-filled regions no
+    longer outweigh small, carefully painted ones.
+
+    Parameters
+    ----------
+    labels: np.ndarray
+        Annotation label of each sample.
+
+    max_per_class: int
+        Cap on the number of samples per class. Values below 1 keep every
+        sample.
+
+    pixel_indices: np.ndarray | None
+        Flat index of each sample's pixel in the image. Required for
+        spatial sampling.
+
+    shape: tuple[int, ...] | None
+        Dimensions of the image. Required for spatial sampling.
+
+    mode: str
+        "stratified" draws uniformly at random within each class.
+        "spatial" divides the image into a grid and draws from every
+        occupied grid cell in turn, which spreads the samples over the
+        whole annotated area.
+
+    seed: int
+        Seed of the random generator, so that the same annotations always
+        give the same sample.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices of the selected samples.
+    """
+
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode}.")
+
+    if mode == "spatial" and (pixel_indices is None or shape is None):
+        raise ValueError("Spatial sampling needs the pixel positions.")
+
+    if max_per_class < 1:
+        return np.arange(len(labels))
+
+    rng = np.random.default_rng(seed)
+    selected = []
+
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+
+        if len(rows) <= max_per_class:
+            selected.append(rows)
+            continue
+
+        rows = rng.permutation(rows)
+
+        if mode == "stratified":
+            selected.append(rows[:max_per_class])
+            continue
+
+        # Rank the shuffled samples within their grid cell and take the
+        # first sample of every cell, then the second, and so on.
+        height, width = shape[:2]
+        cell_size = max(1, math.isqrt(height * width // max_per_class))
+        y, x = np.unravel_index(pixel_indices[rows], (height, width))
+        cells = (y // cell_size) * (width // cell_size + 1) + x // cell_size
+
+        order = np.argsort(cells, kind="stable")
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(
+            np.r_[True, sorted_cells[1:] != sorted_cells[:-1]]
+        )
+        counts = np.diff(np.r_[starts, len(sorted_cells)])
+        rank = np.arange(len(sorted_cells)) - np.repeat(starts, counts)
+
+        # Cells in the last, partial round are drawn at random.
+        by_rank = order[np.lexsort((rng.random(len(rank)), rank))]
+        selected.append(rows[by_rank[:max_per_class]])
+
+    return np.sort(np.concatenate(selected))
@@ -0,0 +1,103 @@
+import math
+from collections.abc import Iterator
+
+TileSlices = tuple[slice, slice]
+
+
+def iter_tiles(
+    shape: tuple[int, ...], tile_size: int, halo: int
+) -> Iterator[tuple[TileSlices, TileSlices, TileSlices]]:
+    """
+    Splits a 2D image into square tiles padded by a halo of neighbouring
+    pixels. The halo is clipped at the image border, so filters applied to a
+    padded tile see the same border handling as when applied to the whole
+    image.
+
+    Parameters
+    ----------
+    shape: tuple[int, ...]
+        Dimensions of the image. Only the first two are tiled.
+
+    tile_size: int
+        Side length of the core of each tile.
+
+    halo: int
+        Number of pixels added on every side of the core.
+
+    Yields
+    ------
+    tuple[TileSlices, TileSlices, TileSlices]
+        Slices of the padded tile in the image, slices of the core in the
+        image, and slices of the core within the padded tile.
+    """
+
+    height, width = shape[:2]
+
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            y1 = min(y0 + tile_size, height)
+            x1 = min(x0 + tile_size, width)
+
+            pad_y0 = max(y0 - halo, 0)
+            pad_x0 = max(x0 - halo, 0)
+            pad_y1 = min(y1 + halo, height)
+            pad_x1 = min(x1 + halo, width)
+
+            padded = (slice(pad_y0, pad_y1), slice(pad_x0, pad_x1))
+            core = (slice(y0, y1), slice(x0, x1))
+            core_in_padded = (
+                slice(y0 - pad_y0, y1 - pad_y0),
+                slice(x0 - pad_x0, x1 - pad_x0),
+            )
+
+            yield padded, core, core_in_padded
+
+
+def tile_count(shape: tuple[int, ...], tile_size: int) -> int:
+    """
+    Number of tiles iter_tiles splits an image of this shape into.
+    """
+
+    height, width = shape[:2]
+
+    return math.ceil(height / tile_size) * math.ceil(width / tile_size)
+
+
+def tile_size_for_budget(
+    memory_budget_mb: float,
+    bytes_per_pixel: float,
+    n_workers: int,
+    halo: int,
+    min_tile_size: int = 64,
+) -> int:
+    """
+    Picks the largest square tile whose padded working set fits in an even
+    share of the memory budget for each worker.
+
+    Parameters
+    ----------
+    memory_budget_mb: float
+        Total memory the tiles processed at once may use, in megabytes.
+
+    bytes_per_pixel: float
+        Estimated peak memory needed per padded tile pixel.
+
+    n_workers: int
+        Number of tiles processed concurrently.
+
+    halo: int
+        Number of pixels added on every side of the core.
+
+    min_tile_size: int
+        Lower bound on the core size so that the halo does not dominate.
+
+    Returns
+    -------
+    int
+        Side length of the core of each tile.
+    """
+
+    budget_bytes = memory_budget_mb * 1024**2 / max(n_workers, 1)
+    padded_side = math.isqrt(int(budget_bytes / bytes_per_pixel))
+
+    return max(padded_side - 2 * halo, min_tile_size)
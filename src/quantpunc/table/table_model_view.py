@@ -55,10 +55,15 @@ class DictionaryModel(QAbstractTableModel):
             row, col = index.row(), index.column()
             label, data = self.current_data[row]
 
-            if isinstance(data, (int, float)):
-                return str(label) if col == 0 else str(data)
+            # Tuple labels, e.g. a mask and a radius, fill the first columns.
+            labels = label if isinstance(label, tuple) else (label,)
+
+            if col < len(labels):
+                return str(labels[col])
+            elif isinstance(data, (int, float)):
+                return str(data)
             elif isinstance(data, tuple):
-                return str(label) if col == 0 else str(data[col - 1])
+                return str(data[col - len(labels)])
 
         return None
 
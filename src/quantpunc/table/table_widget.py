@@ -15,6 +15,18 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
+from quantpunc.quantification.distance_colocalization import (
+    DISTANCE_COLOC_COLUMNS,
+    DISTANCE_CURVE_COLUMNS,
+)
+from quantpunc.quantification.intensity_colocalization import (
+    INTENSITY_COLOC_COLUMNS,
+)
+from quantpunc.quantification.object_colocalization import (
+    OBJECT_COLOC_COLUMNS,
+    OBJECT_SUMMARY_COLUMNS,
+)
+from quantpunc.quantification.region_stats import REGION_STATS_COLUMNS
 from quantpunc.table.table_model_view import TableView
 
 if TYPE_CHECKING:
@@ -55,13 +67,19 @@ class TableWidget(QWidget):
             table_view=self.puncta_table_view, layer_name=layer_name
         )
 
+        region_layer_data = self.get_data_dict(
+            table_view=self.region_table_view, layer_name=layer_name
+        )
+
         count_dict_model = self.count_table_view.dict_model
         coloc_dict_model = self.iou_table_view.dict_model
         puncta_dict_model = self.puncta_table_view.dict_model
+        region_dict_model = self.region_table_view.dict_model
 
         counts_dict = None
         coloc_dict = None
         puncta_dict = None
+        region_dict = None
 
         if counted_layer_data is not None:
             counts_dict = counted_layer_data["data"]
@@ -72,9 +90,25 @@ class TableWidget(QWidget):
         if puncta_layer_data is not None:
             puncta_dict = puncta_layer_data["data"]
 
+        if region_layer_data is not None:
+            region_dict = region_layer_data["data"]
+
         count_dict_model.setCurrentDict(layer_data=counts_dict)
         coloc_dict_model.setCurrentDict(layer_data=coloc_dict)
         puncta_dict_model.setCurrentDict(layer_data=puncta_dict)
+        region_dict_model.setCurrentDict(layer_data=region_dict)
+
+        for table_view in self.pair_table_formats:
+            pair_layer_data = self.get_data_dict(
+                table_view=table_view, layer_name=layer_name
+            )
+            table_view.dict_model.setCurrentDict(
+                layer_data=(
+                    None
+                    if pair_layer_data is None
+                    else pair_layer_data["data"]
+                )
+            )
 
     def get_data_dict(
         self, table_view: QTableView, layer_name: str
@@ -105,6 +139,7 @@ class TableWidget(QWidget):
             count_dict_model = self.count_table_view.dict_model
             coloc_dict_model = self.iou_table_view.dict_model
             puncta_dict_model = self.puncta_table_view.dict_model
+            region_dict_model = self.region_table_view.dict_model
 
             if layer.unique_id in count_dict_model.data_dict:
                 del count_dict_model.data_dict[layer.unique_id]
@@ -122,20 +157,19 @@ class TableWidget(QWidget):
                         del puncta_dict_model.names_to_uuids[name]
                         break
 
-            for uuid_pair in coloc_dict_model.data_dict:
-                if layer.unique_id in uuid_pair:
-                    del coloc_dict_model.data_dict[uuid_pair]
+            if layer.unique_id in region_dict_model.data_dict:
+                del region_dict_model.data_dict[layer.unique_id]
 
-                    names_to_remove = [
-                        name
-                        for name, pair in coloc_dict_model.names_to_uuids.items()
-                        if pair == uuid_pair
-                    ]
-
-                    for name in names_to_remove:
-                        del coloc_dict_model.names_to_uuids[name]
+                for name, uuid in region_dict_model.names_to_uuids.items():
+                    if layer.unique_id == uuid:
+                        del region_dict_model.names_to_uuids[name]
+                        break
 
-                    break
+            for table_view in [self.iou_table_view, *self.pair_table_formats]:
+                self.remove_pair_data(
+                    dict_model=table_view.dict_model,
+                    unique_id=layer.unique_id,
+                )
 
             for i in range(self.table_selection_box.count()):
                 if self.table_selection_box.itemData(i) == layer.unique_id:
@@ -179,11 +213,35 @@ class TableWidget(QWidget):
                 count_dict_model.setCurrentDict(layer_data=None)
                 coloc_dict_model.setCurrentDict(layer_data=None)
 
+                for table_view in self.pair_table_formats:
+                    table_view.dict_model.setCurrentDict(layer_data=None)
+
             self.table_selection_box.setCurrentIndex(-1)
             self.table_selection_box.setCurrentIndex(0)
 
         return
 
+    def remove_pair_data(self, dict_model, unique_id: str) -> None:
+        """
+        Removes the data of the layer pair that contains a layer from a
+        model keyed by pairs of layers.
+        """
+
+        for uuid_pair in dict_model.data_dict:
+            if unique_id in uuid_pair:
+                del dict_model.data_dict[uuid_pair]
+
+                names_to_remove = [
+                    name
+                    for name, pair in dict_model.names_to_uuids.items()
+                    if pair == uuid_pair
+                ]
+
+                for name in names_to_remove:
+                    del dict_model.names_to_uuids[name]
+
+                break
+
     def initialize_table_settings(self) -> None:
         """
         Adds save buttons after puncta quantification.
@@ -228,10 +286,12 @@ class TableWidget(QWidget):
             count_dict_model = self.count_table_view.dict_model
             coloc_dict_model = self.iou_table_view.dict_model
             puncta_dict_model = self.puncta_table_view.dict_model
+            region_dict_model = self.region_table_view.dict_model
 
             count_uuid = count_dict_model.names_to_uuids.get(img_name)
             coloc_uuid = coloc_dict_model.names_to_uuids.get(img_name)
             puncta_uuid = puncta_dict_model.names_to_uuids.get(img_name)
+            region_uuid = region_dict_model.names_to_uuids.get(img_name)
 
             if count_uuid is not None:
                 count_data = count_dict_model.data_dict[count_uuid]["data"]
@@ -267,6 +327,25 @@ class TableWidget(QWidget):
                 save_path = folder_path / f"{puncta_name}_puncta_summary.csv"
                 puncta_df.to_csv(save_path, index=False)
 
+            if region_uuid is not None:
+                region_data = region_dict_model.data_dict[region_uuid]
+                save_path = (
+                    folder_path / f"{region_data['name']}_region_stats.csv"
+                )
+                self.region_stats_frame(region_data["data"]).to_csv(
+                    save_path, index=False
+                )
+
+            for table_view in self.pair_table_formats:
+                pair_uuid = table_view.dict_model.names_to_uuids.get(img_name)
+
+                if pair_uuid is not None:
+                    self.save_pair_table(
+                        folder_path=folder_path,
+                        table_view=table_view,
+                        uuid_pair=pair_uuid,
+                    )
+
             return
 
     def save_counts_coords_all(self) -> None:
@@ -283,6 +362,7 @@ class TableWidget(QWidget):
             count_dict_model = self.count_table_view.dict_model
             coloc_dict_model = self.iou_table_view.dict_model
             puncta_dict_model = self.puncta_table_view.dict_model
+            region_dict_model = self.region_table_view.dict_model
 
             if count_dict_model.data_dict:
                 for _, count_data in count_dict_model.data_dict.items():
@@ -327,6 +407,54 @@ class TableWidget(QWidget):
                     )
                     puncta_df.to_csv(save_path, index=False)
 
+            for region_data in region_dict_model.data_dict.values():
+                save_path = (
+                    folder_path / f"{region_data['name']}_region_stats.csv"
+                )
+                self.region_stats_frame(region_data["data"]).to_csv(
+                    save_path, index=False
+                )
+
+            for table_view in self.pair_table_formats:
+                for uuid_pair in table_view.dict_model.data_dict:
+                    self.save_pair_table(
+                        folder_path=folder_path,
+                        table_view=table_view,
+                        uuid_pair=uuid_pair,
+                    )
+
+    def save_pair_table(
+        self, folder_path: Path, table_view: TableView, uuid_pair: tuple
+    ) -> None:
+        """
+        Saves a colocalization table of a pair or group of layers as a csv
+        file, with the columns and file suffix of its entry in
+        pair_table_formats.
+        """
+
+        index_columns, columns, suffix = self.pair_table_formats[table_view]
+        pair_data = table_view.dict_model.data_dict[uuid_pair]
+        pair_name = "-".join(pair_data["name"])
+
+        pair_df = pd.DataFrame(
+            [
+                (*(key if isinstance(key, tuple) else (key,)), *values)
+                for key, values in pair_data["data"].items()
+            ],
+            columns=index_columns + columns,
+        )
+        pair_df.to_csv(folder_path / f"{pair_name}_{suffix}.csv", index=False)
+
+    def region_stats_frame(
+        self, region_data: dict[int, tuple]
+    ) -> pd.DataFrame:
+        region_df = pd.DataFrame.from_dict(
+            region_data, orient="index", columns=REGION_STATS_COLUMNS
+        )
+        region_df.index.name = "puncta_id"
+
+        return region_df.reset_index()
+
     def _init_widget(self) -> None:
         self.main_layout = QVBoxLayout()
         self.table_layout = QVBoxLayout()
@@ -340,11 +468,68 @@ class TableWidget(QWidget):
         self.puncta_table_view = TableView(
             headers=["ID", "Area", "Intensity", "Mask"]
         )
+        self.region_table_view = TableView(
+            headers=["ID"]
+            + [
+                column.replace("_", " ").capitalize()
+                for column in REGION_STATS_COLUMNS
+            ]
+        )
         self.iou_table_view = TableView(headers=["Mask", "IoU"])
 
+        # Tables of pairs or groups of layers besides IoU, with the columns of
+        # their keys, the columns of their values and their csv suffixes.
+        self.pair_table_formats: dict[TableView, tuple] = {}
+
+        self.object_summary_table_view = self._add_pair_table(
+            index_columns=["mask"],
+            columns=OBJECT_SUMMARY_COLUMNS,
+            suffix="object_coloc_summary",
+        )
+        self.object_table_view = self._add_pair_table(
+            index_columns=["puncta_id"],
+            columns=OBJECT_COLOC_COLUMNS,
+            suffix="object_coloc_puncta",
+        )
+        self.distance_curve_table_view = self._add_pair_table(
+            index_columns=["mask", "radius"],
+            columns=DISTANCE_CURVE_COLUMNS,
+            suffix="distance_coloc_curve",
+        )
+        self.distance_table_view = self._add_pair_table(
+            index_columns=["puncta_id"],
+            columns=DISTANCE_COLOC_COLUMNS,
+            suffix="distance_coloc_puncta",
+        )
+
+        self.pairwise_iou_table_view = self._add_pair_table(
+            index_columns=["mask", "first", "second"],
+            columns=["intersection", "union", "iou"],
+            suffix="pairwise_iou",
+        )
+
+        self.intensity_table_view = self._add_pair_table(
+            index_columns=["mask"],
+            columns=INTENSITY_COLOC_COLUMNS,
+            suffix="intensity_coloc",
+        )
+
+        # Each colocalization method gets a tab of its own.
+        self.coloc_tabs = QTabWidget()
+        self.coloc_tabs.addTab(self.iou_table_view, "IoU")
+        self.coloc_tabs.addTab(self.object_summary_table_view, "Objects")
+        self.coloc_tabs.addTab(self.object_table_view, "Object Matches")
+        self.coloc_tabs.addTab(
+            self.distance_curve_table_view, "Distance Curve"
+        )
+        self.coloc_tabs.addTab(self.distance_table_view, "Distance Puncta")
+        self.coloc_tabs.addTab(self.pairwise_iou_table_view, "All Pairs")
+        self.coloc_tabs.addTab(self.intensity_table_view, "Intensity")
+
         self.table_tabs.addTab(self.count_table_view, "Counts")
         self.table_tabs.addTab(self.puncta_table_view, "Puncta Stats")
-        self.table_tabs.addTab(self.iou_table_view, "Colocalization")
+        self.table_tabs.addTab(self.region_table_view, "Region Stats")
+        self.table_tabs.addTab(self.coloc_tabs, "Colocalization")
         self.table_tabs.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.Expanding
         )
@@ -355,3 +540,20 @@ class TableWidget(QWidget):
 
         self.setLayout(self.main_layout)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def _add_pair_table(
+        self, index_columns: list[str], columns: list[str], suffix: str
+    ) -> TableView:
+        table_view = TableView(
+            headers=[
+                (
+                    "ID"
+                    if column == "puncta_id"
+                    else column.replace("_", " ").capitalize()
+                )
+                for column in index_columns + columns
+            ]
+        )
+        self.pair_table_formats[table_view] = (index_columns, columns, suffix)
+
+        return table_view
@@ -0,0 +1,188 @@
+from collections.abc import Callable
+
+from napari.utils.notifications import show_error, show_info
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, Signal
+from qtpy.QtWidgets import (
+    QHBoxLayout,
+    QProgressBar,
+    QPushButton,
+    QSizePolicy,
+    QWidget,
+)
+
+from quantpunc.quantification.progress import (
+    CancelToken,
+    ProgressCallback,
+    TaskCancelled,
+)
+
+# A task computes its result off the GUI thread, reporting progress and
+# checking the token between stages. It must not touch widgets or layers.
+Task = Callable[[ProgressCallback, CancelToken], object]
+
+
+class _TaskSignals(QObject):
+    progress = Signal(float, str)
+    returned = Signal(object)
+    errored = Signal(object)
+    cancelled = Signal()
+
+
+class _TaskRunnable(QRunnable):
+    def __init__(self, task: Task, cancel_token: CancelToken):
+        super().__init__()
+        self.task = task
+        self.cancel_token = cancel_token
+        self.signals = _TaskSignals()
+
+    def report_progress(self, fraction: float, message: str = "") -> None:
+        # Every progress report is also a point where the task can stop.
+        self.cancel_token.raise_if_cancelled()
+        self.signals.progress.emit(fraction, message)
+
+    def run(self) -> None:
+        try:
+            result = self.task(self.report_progress, self.cancel_token)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as err:  # noqa: BLE001
+            # Errors are shown on the GUI thread instead of being lost in
+            # the worker.
+            self.signals.errored.emit(err)
+        else:
+            self.signals.returned.emit(result)
+
+
+class TaskRunner(QWidget):
+    """
+    Runs one task at a time on a worker thread, showing its progress and a
+    button to cancel it. Results are handed back on the GUI thread, where
+    they can be applied to layers and tables.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.thread_pool = QThreadPool.globalInstance()
+        self._runnable: _TaskRunnable | None = None
+        self._on_returned: Callable[[object], None] | None = None
+        self._button: QPushButton | None = None
+        self._init_widget()
+
+    def run(
+        self,
+        task: Task,
+        on_returned: Callable[[object], None],
+        button: QPushButton | None = None,
+    ) -> bool:
+        """
+        Starts a task on a worker thread.
+
+        Parameters
+        ----------
+        task: Task
+            Function called with a progress callback and a cancel token,
+            returning the result of the task.
+
+        on_returned: Callable[[object], None]
+            Called with the result on the GUI thread if the task finishes
+            without being cancelled.
+
+        button: QPushButton | None
+            Button that started the task, disabled while it runs.
+
+        Returns
+        -------
+        bool
+            False if another task is still running.
+        """
+
+        if self.is_running():
+            show_error("Please wait for the running task or cancel it.")
+            return False
+
+        self._runnable = _TaskRunnable(task=task, cancel_token=CancelToken())
+        self._runnable.setAutoDelete(False)
+        self._on_returned = on_returned
+        self._button = button
+
+        signals = self._runnable.signals
+        signals.progress.connect(self._on_progress)
+        signals.returned.connect(self._on_task_returned)
+        signals.errored.connect(self._on_task_errored)
+        signals.cancelled.connect(self._on_task_cancelled)
+
+        if button is not None:
+            button.setEnabled(False)
+
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
+        self.cancel_button.setEnabled(True)
+        self.show()
+
+        self.thread_pool.start(self._runnable)
+
+        return True
+
+    def is_running(self) -> bool:
+        return self._runnable is not None
+
+    def cancel(self) -> None:
+        """
+        Asks the running task to stop at its next stage.
+        """
+
+        if self._runnable is not None:
+            self._runnable.cancel_token.cancel()
+            self.cancel_button.setEnabled(False)
+            self.progress_bar.setFormat("Cancelling...")
+
+    def _on_progress(self, fraction: float, message: str) -> None:
+        self.progress_bar.setValue(round(100 * min(max(fraction, 0), 1)))
+        self.progress_bar.setFormat(f"{message} %p%" if message else "%p%")
+
+    def _on_task_returned(self, result: object) -> None:
+        on_returned = self._on_returned
+        self._finish()
+
+        if on_returned is not None:
+            on_returned(result)
+
+    def _on_task_errored(self, err: Exception) -> None:
+        self._finish()
+        show_error(f"{type(err).__name__}: {err}")
+
+    def _on_task_cancelled(self) -> None:
+        self._finish()
+        show_info("Cancelled.")
+
+    def _finish(self) -> None:
+        if self._button is not None:
+            self._button.setEnabled(True)
+
+        self._runnable = None
+        self._on_returned = None
+        self._button = None
+        self.hide()
+
+    def _init_widget(self) -> None:
+        layout = QHBoxLayout()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setObjectName("cancel_button")
+        self.cancel_button.clicked.connect(self.cancel)
+
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cancel_button)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.setLayout(layout)
+
+        # Space is kept while idle so that fixed-height parents fit the
+        # progress bar once a task starts.
+        size_policy = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        size_policy.setRetainSizeWhenHidden(True)
+        self.setSizePolicy(size_policy)
+        self.hide()
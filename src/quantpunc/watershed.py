@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 
+import numpy as np
 from napari.utils.notifications import show_error
 from qtpy.QtWidgets import (
     QComboBox,
@@ -14,7 +15,9 @@ from skimage.filters import sobel
 from skimage.segmentation import watershed
 
 from quantpunc.combobox_manager import ComboBoxManager
+from quantpunc.quantification.progress import CancelToken, ProgressCallback
 from quantpunc.table.table_widget import TableWidget
+from quantpunc.task_runner import TaskRunner
 
 if TYPE_CHECKING:
     from napari import Viewer, layers
@@ -55,41 +58,56 @@ class WatershedWidget(QWidget):
             seed_points = None
 
         elevation_map = self.elevation_map_combobox.currentText()
+        watershed_layer_name = f"{layer.name}_watershed"
 
-        if elevation_map == "Distance Transform":
-            transformed_img = -distance_transform_edt(img)
-        elif elevation_map == "Sobel":
-            transformed_img = sobel(img)
-        else:
-            transformed_img = img
+        def task(
+            progress: ProgressCallback, cancel_token: CancelToken
+        ) -> np.ndarray:
+            progress(0, "Computing elevation map")
 
-        watershed_img = watershed(
-            image=transformed_img,
-            markers=seed_points,
-            mask=img,
-        )
+            if elevation_map == "Distance Transform":
+                transformed_img = -distance_transform_edt(img)
+            elif elevation_map == "Sobel":
+                transformed_img = sobel(img)
+            else:
+                transformed_img = img
 
-        watershed_layer_name = f"{layer.name}_watershed"
+            progress(0.5, "Flooding")
 
-        if watershed_layer_name in self.viewer.layers:
-            self.viewer.layers.events.removed.disconnect(
-                self.table_widget.on_layer_deleted
+            return watershed(
+                image=transformed_img,
+                markers=seed_points,
+                mask=img,
             )
-            self.viewer.layers.remove(watershed_layer_name)
-            self.viewer.layers.events.removed.connect(
-                self.table_widget.on_layer_deleted
+
+        def add_watershed_layer(watershed_img: np.ndarray) -> None:
+            if watershed_layer_name in self.viewer.layers:
+                self.viewer.layers.events.removed.disconnect(
+                    self.table_widget.on_layer_deleted
+                )
+                self.viewer.layers.remove(watershed_layer_name)
+                self.viewer.layers.events.removed.connect(
+                    self.table_widget.on_layer_deleted
+                )
+
+            self.viewer.add_labels(
+                data=watershed_img, name=watershed_layer_name
             )
 
-        self.viewer.add_labels(data=watershed_img, name=watershed_layer_name)
+            self.viewer.layers.selection.active = self.viewer.layers[
+                watershed_layer_name
+            ]
 
-        self.viewer.layers.selection.active = self.viewer.layers[
-            watershed_layer_name
-        ]
+            layer.visible = False
 
-        layer.visible = False
+            if seed_points_layer is not None:
+                seed_points_layer.visible = False
 
-        if seed_points_layer is not None:
-            seed_points_layer.visible = False
+        self.task_runner.run(
+            task=task,
+            on_returned=add_watershed_layer,
+            button=self.watershed_button,
+        )
 
     def _init_widget(self) -> None:
         self.main_layout = QVBoxLayout()
@@ -117,9 +135,11 @@ class WatershedWidget(QWidget):
 
         self.elevation_map_combobox.addItems(["Distance Transform", "Sobel"])
 
-        watershed_button = QPushButton("Watershed")
-        watershed_button.setObjectName("watershed_button")
-        watershed_button.clicked.connect(self.watershed_layer)
+        self.watershed_button = QPushButton("Watershed")
+        self.watershed_button.setObjectName("watershed_button")
+        self.watershed_button.clicked.connect(self.watershed_layer)
+
+        self.task_runner = TaskRunner()
 
         self.main_layout.addWidget(img_label)
         self.main_layout.addWidget(self.img_combobox)
@@ -127,7 +147,8 @@ class WatershedWidget(QWidget):
         self.main_layout.addWidget(self.seed_point_combobox)
         self.main_layout.addWidget(elevation_map_label)
         self.main_layout.addWidget(self.elevation_map_combobox)
-        self.main_layout.addWidget(watershed_button)
+        self.main_layout.addWidget(self.watershed_button)
+        self.main_layout.addWidget(self.task_runner)
         self.main_layout.setSpacing(7)
         self.main_layout.setContentsMargins(7, 5, 7, 5)
 